@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from core.enviroment import env
+from core.jobs import JobQueue
+from core.db.exercise_repository import AsyncExerciseRepository
+from core.db.job_repository import AsyncGenerationJobRepository
+from core.llm.exercise_parser import ExerciseParseError
+from core.llm.scheduler import LlmPriority, llm_priority
+from shared.utils.generation_context import aload_user_generation_context, build_user_profile
+
+logger = logging.getLogger(__name__)
+
+REFILL_COUNT = 5
+
+
+class RefillController:
+    """
+    Reposición de ejercicios fuera del request: el endpoint encola un trabajo
+    y responde al instante; un pool acotado de workers lo ejecuta.
+
+    El estado de cada trabajo se persiste en exercise_generation_jobs
+    (queued -> running -> completed | failed) y hay como mucho uno activo por usuario.
+
+    También hace la pregeneración especulativa: cuando los pendientes bajan de
+    PREFETCH_WATERMARK el siguiente lote se genera con antelación y se guarda
+    oculto ('queued') para activarlo sin esperar al LLM (ver should_prefetch).
+    """
+
+    def __init__(self):
+        self.jobs = AsyncGenerationJobRepository()
+        self.exercises = AsyncExerciseRepository()
+        self.queue = JobQueue("refill", workers=env.REFILL_WORKERS, maxsize=env.REFILL_QUEUE_SIZE)
+
+    async def start(self):
+        """Arranca los workers y recupera los trabajos que quedaron en cola"""
+        self.queue.start()
+
+        stale = await self.jobs.fail_stale_jobs(env.REFILL_JOB_TIMEOUT)
+        if stale:
+            logger.warning("%s trabajos de reposición interrumpidos marcados como fallidos", stale)
+
+        for job in await self.jobs.get_queued_jobs(limit=env.REFILL_QUEUE_SIZE):
+            self.queue.submit(self._run, job["id"], job["user_id"])
+
+    async def stop(self):
+        await self.queue.stop()
+
+    async def enqueue(self, user_id: str) -> Dict:
+        """
+        Crea (o reutiliza) el trabajo de reposición del usuario y lo encola.
+        Devuelve la fila del trabajo.
+        """
+        job = await self.jobs.create_job(user_id, REFILL_COUNT)
+        if job["created"] and not self.queue.submit(self._run, job["id"], user_id):
+            await self.jobs.fail_job(job["id"], "Cola de generación llena")
+            job = {**job, "status": "failed", "error": "Cola de generación llena"}
+        return job
+
+    @staticmethod
+    def should_prefetch(context) -> bool:
+        """
+        Política de pregeneración: pocos pendientes, ningún lote oculto esperando
+        y el usuario puede generar (suscripción activa y quiz)
+        """
+        return (
+            context.pending_count < env.PREFETCH_WATERMARK
+            and context.queued_count == 0
+            and context.has_active_subscription
+            and bool(context.quiz)
+        )
+
+    async def run_now(self, user_id: str) -> Optional[Dict]:
+        """
+        Crea el trabajo del usuario y lo ejecuta en la corrutina actual, sin la cola
+        (pregeneración fuera de horas punta). Devuelve None si ya había uno activo.
+        """
+        job = await self.jobs.create_job(user_id, REFILL_COUNT)
+        if not job["created"]:
+            return None
+        await self._run(job["id"], user_id)
+        return await self.jobs.get_job(job["id"])
+
+    async def get_job(self, job_id: str, user_id: str):
+        return await self.jobs.get_job(job_id, user_id)
+
+    async def _run(self, job_id: str, user_id: str):
+        # Otro worker (u otro proceso) ya lo tomó
+        if not await self.jobs.claim_job(job_id):
+            return
+
+        try:
+            # Las llamadas al LLM de la reposición ceden el turno a las del SSE
+            with llm_priority(LlmPriority.BACKGROUND):
+                generated = await asyncio.wait_for(
+                    self._refill(job_id, user_id), timeout=env.REFILL_JOB_TIMEOUT
+                )
+        except asyncio.TimeoutError:
+            await self.jobs.fail_job(job_id, "Tiempo de generación agotado")
+            raise
+        except Exception as e:
+            await self.jobs.fail_job(job_id, str(e) or type(e).__name__)
+            raise
+
+        await self.jobs.complete_job(job_id, generated)
+
+    async def _refill(self, job_id: str, user_id: str) -> int:
+        """Genera y guarda los ejercicios; devuelve cuántos se guardaron"""
+        # Importar aquí para evitar dependencias circulares
+        from core.llm import llm_pipe
+
+        context = await aload_user_generation_context(user_id)
+
+        # Sin suscripción no se generan ni se activan ejercicios pregenerados
+        if not context.has_active_subscription:
+            raise RuntimeError("El usuario no tiene una suscripción activa")
+        # Ya hay un lote pregenerado: basta con activarlo si hace falta
+        if context.queued_count > 0:
+            if context.pending_count == 0:
+                await self.exercises.promote_queued_exercises(user_id, REFILL_COUNT)
+            return 0
+        # Otra petición (el stream) ya repuso los ejercicios mientras el trabajo esperaba
+        if context.pending_count >= REFILL_COUNT:
+            return 0
+        if not context.quiz:
+            raise RuntimeError("Quiz no encontrado para el usuario")
+
+        user_quiz, user_profile = build_user_profile(context.quiz, REFILL_COUNT)
+
+        context_text, source_file = await llm_pipe.aget_stoic_context(user_profile, 5)
+
+        generation_kwargs = dict(
+            user_profile=user_profile,
+            total_exercises=REFILL_COUNT,
+            context_text=context_text,
+            source_file=source_file,
+            focus_offset=context.completed_count  # Offset para evitar repeticiones
+        )
+
+        # Generar en paralelo y guardarlos en un único INSERT
+        generated = {}
+        async for i, raw_response in llm_pipe.agenerate_exercises(**generation_kwargs):
+            # Un ejercicio irrecuperable no descarta los demás ya generados
+            try:
+                generated[i] = await llm_pipe.aparse_exercise(raw_response, i, **generation_kwargs)
+            except ExerciseParseError as e:
+                logger.warning("Ejercicio %s del trabajo %s descartado: %s", i, job_id, e)
+                continue
+            await self.jobs.update_progress(job_id, len(generated))
+
+        if not generated:
+            raise RuntimeError("No se pudo generar ningún ejercicio válido")
+
+        # Si al usuario aún le quedan pendientes el lote queda oculto ('queued')
+        # hasta que los termine; si ya no le quedan se activa directamente
+        pending_count = await self.exercises.get_pending_exercises_count(user_id)
+        status = "queued" if pending_count > 0 else "pending"
+
+        await self.exercises.create_exercises_batch(user_id, [generated[i] for i in sorted(generated)], status)
+        return len(generated)
+
+
+# Singleton global
+refill_controller = RefillController()
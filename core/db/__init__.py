@@ -1,3 +1,5 @@
-from .repository import BaseRepository
+from .repository import BaseRepository, AsyncBaseRepository
 from .connection import Database
-repository = BaseRepository(Database())
\ No newline at end of file
+database = Database()
+repository = BaseRepository(database)
+async_repository = AsyncBaseRepository(repository)
\ No newline at end of file
@@ -1,5 +1,65 @@
-import mysql.connector
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
 from core.enviroment import env
+from core.db.pool import mysql_pool
+from core.db.executor import db_slot, run_in_db_thread
+
+
+class _SessionConnection:
+    """
+    Conexión prestada por la sesión activa.
+
+    Los repositorios la cierran al terminar cada query como siempre, pero
+    close() aquí no hace nada: la conexión se devuelve al pool al cerrar la sesión.
+    """
+
+    def __init__(self, session: "_Session"):
+        self._session = session
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._session.conn, name)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._session.release()
+
+
+class _Session:
+    """Unidad de trabajo: una conexión del pool reutilizada por todas las queries de un request"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        # Las queries pueden venir de distintos hilos (executor); se serializan
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    def borrow(self) -> _SessionConnection:
+        self._lock.acquire()
+        self._depth += 1
+        return _SessionConnection(self)
+
+    def release(self):
+        try:
+            self._depth -= 1
+            # Igual que al cerrar una conexión propia: lo no confirmado se descarta,
+            # y no se arrastra el snapshot de lectura a la siguiente query
+            if self._depth == 0 and self.conn.in_transaction:
+                self.conn.rollback()
+        finally:
+            self._lock.release()
+
+    def close(self):
+        """Devuelve la conexión al pool cuando no queda ninguna query en curso"""
+        with self._lock:
+            self.conn.close()
+
+
+_current_session: ContextVar[Optional[_Session]] = ContextVar("mysql_session", default=None)
 
 
 class Database:
@@ -11,6 +71,59 @@ class Database:
             "database": env.MYSQL_DATABASE,
             "port": env.MYSQL_PORT,
         }
+        self.pool = mysql_pool
 
     def connect(self):
-        return mysql.connector.connect(**self.config)
+        """
+        Devuelve una conexión lista para usar; close() la libera.
+
+        Dentro de una sesión (ver session()) se reutiliza la conexión de la
+        sesión; fuera de ella se toma una del pool compartido.
+        """
+        session = _current_session.get()
+        if session is not None:
+            return session.borrow()
+        return self.pool.connect()
+
+    @contextmanager
+    def session(self):
+        """
+        Abre una sesión con alcance de request.
+
+        Todas las queries de los repositorios ejecutadas dentro del bloque
+        (en este contexto) usan una única conexión del pool. Las sesiones
+        anidadas reutilizan la sesión exterior.
+        """
+        if _current_session.get() is not None:
+            yield
+            return
+
+        session = _Session(self.pool.connect())
+        token = _current_session.set(session)
+        try:
+            yield
+        finally:
+            # No abrir sesiones que crucen un yield de un generador SSE: si el
+            # cliente se desconecta se cierra desde otro contexto y reset() falla
+            _current_session.reset(token)
+            session.close()
+
+    @asynccontextmanager
+    async def asession(self):
+        """
+        Variante async de session(): la sesión ocupa un slot del executor de
+        MySQL (ver db_slot) durante toda su vida, así que la conexión se toma
+        sin esperar dentro de un hilo del executor.
+        """
+        if _current_session.get() is not None:
+            yield
+            return
+
+        async with db_slot():
+            session = _Session(await run_in_db_thread(self.pool.connect))
+            token = _current_session.set(session)
+            try:
+                yield
+            finally:
+                _current_session.reset(token)
+                await run_in_db_thread(session.close)
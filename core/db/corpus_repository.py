@@ -0,0 +1,92 @@
+import hashlib
+from typing import Dict, List, Optional
+
+from core.db import Database
+from core.db.repository import BaseRepository
+
+
+class CorpusRepository(BaseRepository):
+    """Versión del corpus RAG de cada colección (invalida la caché de recuperación)"""
+
+    def __init__(self):
+        super().__init__(Database())
+
+    def get_version(self, collection: str) -> int:
+        """Versión actual de la colección (0 si nunca se ha ingerido nada)"""
+        row = self.fetch_one(
+            "SELECT version FROM rag_corpus_versions WHERE collection = %s",
+            (collection,)
+        )
+        return int(row["version"]) if row else 0
+
+    def bump_version(self, collection: str) -> int:
+        """
+        Incrementa la versión en una sola sentencia (atómica entre workers) y la
+        devuelve; si otro worker ingirió a la vez puede devolver una posterior
+        """
+        self.execute(
+            """
+            INSERT INTO rag_corpus_versions (collection, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+            """,
+            (collection,)
+        )
+        return self.get_version(collection)
+
+
+class ArchetypeContextRepository(BaseRepository):
+    """
+    Contextos RAG precalculados de los perfiles arquetipo (precompute_contexts.py).
+
+    Cada fila guarda la versión del corpus con la que se calculó: solo se sirve
+    mientras coincide con la actual (hasta que ingest_pdf la refresca).
+    """
+
+    def __init__(self):
+        super().__init__(Database())
+
+    @staticmethod
+    def _hash(search_query: str) -> str:
+        return hashlib.sha256(search_query.encode("utf-8")).hexdigest()
+
+    def get_context(self, collection: str, search_query: str, k: int) -> Optional[Dict]:
+        """Contexto y libro de la query si está precalculado con la versión actual del corpus"""
+        return self.fetch_one(
+            """
+            SELECT a.context_text, a.source_file
+            FROM rag_archetype_contexts a
+            LEFT JOIN rag_corpus_versions v ON v.collection = a.collection
+            WHERE a.collection = %s AND a.query_hash = %s AND a.k = %s
+              AND a.corpus_version = COALESCE(v.version, 0)
+            """,
+            (collection, self._hash(search_query), k)
+        )
+
+    def upsert_context(
+        self,
+        collection: str,
+        search_query: str,
+        k: int,
+        corpus_version: int,
+        context_text: str,
+        source_file: str
+    ) -> int:
+        return self.execute(
+            """
+            INSERT INTO rag_archetype_contexts
+                (collection, query_hash, k, search_query, corpus_version, context_text, source_file)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                corpus_version = VALUES(corpus_version),
+                context_text = VALUES(context_text),
+                source_file = VALUES(source_file)
+            """,
+            (collection, self._hash(search_query), k, search_query, corpus_version, context_text, source_file)
+        )
+
+    def list_queries(self, collection: str) -> List[Dict]:
+        """Queries precalculadas de la colección (para refrescarlas tras una ingesta)"""
+        return self.fetch_all(
+            "SELECT search_query, k FROM rag_archetype_contexts WHERE collection = %s",
+            (collection,)
+        )
@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from mysql.connector.errors import PoolError
+
+from core.enviroment import env
+
+# Conexiones que el pool puede dar como mucho (size + overflow)
+DB_SLOTS = env.MYSQL_POOL_SIZE + env.MYSQL_POOL_MAX_OVERFLOW
+
+# Hilos dedicados a MySQL, nunca menos que DB_SLOTS: así una query en espera no
+# ocupa hilos del executor por defecto de asyncio y cada titular de un slot
+# (ver db_slot) siempre encuentra un hilo libre
+db_executor = ThreadPoolExecutor(
+    max_workers=max(env.MYSQL_THREADPOOL_SIZE, DB_SLOTS),
+    thread_name_prefix="mysql",
+)
+
+# Un semáforo por event loop (uno por worker de uvicorn)
+_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_holding_slot: ContextVar[bool] = ContextVar("mysql_slot", default=False)
+
+
+def _loop_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(DB_SLOTS)
+    return slots
+
+
+@asynccontextmanager
+async def db_slot():
+    """
+    Reserva uno de los DB_SLOTS antes de pedir una conexión al pool.
+
+    La espera por una conexión libre se hace aquí, en el event loop, y no en un
+    hilo de db_executor: si los hilos se quedaran bloqueados en pool.connect,
+    las sesiones que ya tienen conexión no tendrían hilo para sus queries ni
+    para devolverla, y todo acabaría en PoolError por timeout.
+
+    Reentrante en el mismo contexto: las queries de una sesión abierta con
+    asession() usan el slot de la sesión.
+    """
+    if _holding_slot.get():
+        yield
+        return
+
+    slots = _loop_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=env.MYSQL_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PoolError(
+            f"Pool MySQL agotado: sin conexión libre tras {env.MYSQL_POOL_TIMEOUT}s"
+        ) from None
+    token = _holding_slot.set(True)
+    try:
+        yield
+    finally:
+        _holding_slot.reset(token)
+        slots.release()
+
+
+async def run_in_db_thread(fn, *args, **kwargs):
+    """
+    Ejecuta una llamada bloqueante a MySQL en el executor dedicado sin bloquear el event loop.
+
+    El contexto actual se propaga al hilo, así las queries respetan la sesión activa.
+    """
+    async with db_slot():
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(
+            db_executor,
+            functools.partial(ctx.run, fn, *args, **kwargs),
+        )
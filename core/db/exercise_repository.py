@@ -1,25 +1,35 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime
 from core.db import Database
-from core.db.repository import BaseRepository
+from core.db.repository import BaseRepository, AsyncBaseRepository
+from core.db.executor import run_in_db_thread
 import uuid
+import json
+import base64
+import binascii
 
 
 class ExerciseRepository(BaseRepository):
     def __init__(self):
         super().__init__(Database())
     
-    def create_exercise(self, user_id: str, exercise_data: Dict) -> str:
-        """Crea un nuevo ejercicio para el usuario"""
-        exercise_id = str(uuid.uuid4())
-        
-        query = """
-            INSERT INTO user_exercises 
-            (id, user_id, exercise_name, exercise_level, objective, instructions, 
-             duration, reflection, source, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending')
-        """
-        
-        params = (
+    # Columnas que necesitan las respuestas (evita SELECT *)
+    EXERCISE_COLUMNS = (
+        "id, exercise_name, exercise_level, objective, instructions, duration, "
+        "reflection, source, status, completed_at, created_at, available_at"
+    )
+
+    # available_at: cuándo el ejercicio pasa a ser visible (NULL mientras esté 'queued')
+    INSERT_EXERCISE_QUERY = """
+        INSERT INTO user_exercises 
+        (id, user_id, exercise_name, exercise_level, objective, instructions, 
+         duration, reflection, source, status, available_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, IF(%s = 'queued', NULL, NOW()))
+    """
+
+    @staticmethod
+    def _exercise_params(exercise_id: str, user_id: str, exercise_data: Dict, status: str = 'pending') -> tuple:
+        return (
             exercise_id,
             user_id,
             exercise_data.get('name'),
@@ -28,18 +38,32 @@ class ExerciseRepository(BaseRepository):
             exercise_data.get('instructions'),
             exercise_data.get('duration'),
             exercise_data.get('reflection'),
-            exercise_data.get('source')
+            exercise_data.get('source'),
+            status,
+            status
         )
-        
-        self.execute(query, params)
+
+    def create_exercise(self, user_id: str, exercise_data: Dict) -> str:
+        """Crea un nuevo ejercicio para el usuario"""
+        exercise_id = str(uuid.uuid4())
+        self.execute(self.INSERT_EXERCISE_QUERY, self._exercise_params(exercise_id, user_id, exercise_data))
         return exercise_id
     
-    def create_exercises_batch(self, user_id: str, exercises: List[Dict]) -> List[str]:
-        """Crea múltiples ejercicios en un lote"""
-        exercise_ids = []
-        for exercise in exercises:
-            exercise_id = self.create_exercise(user_id, exercise)
-            exercise_ids.append(exercise_id)
+    def create_exercises_batch(self, user_id: str, exercises: List[Dict], status: str = 'pending') -> List[str]:
+        """
+        Crea múltiples ejercicios con un único INSERT multi-fila en una sola transacción.
+
+        Con status='queued' quedan ocultos hasta que promote_queued_exercises los active.
+        """
+        if not exercises:
+            return []
+
+        exercise_ids = [str(uuid.uuid4()) for _ in exercises]
+        rows = [
+            self._exercise_params(exercise_id, user_id, exercise, status)
+            for exercise_id, exercise in zip(exercise_ids, exercises)
+        ]
+        self.execute_many(self.INSERT_EXERCISE_QUERY, rows)
         return exercise_ids
     
     def get_pending_exercises_count(self, user_id: str) -> int:
@@ -52,24 +76,111 @@ class ExerciseRepository(BaseRepository):
         result = self.fetch_one(query, (user_id,))
         return result['count'] if result else 0
     
-    def get_user_exercises(self, user_id: str, status: Optional[str] = None) -> List[Dict]:
-        """Obtiene los ejercicios del usuario, opcionalmente filtrados por estado"""
+    def count_user_exercises(self, user_id: str, status: Optional[str] = None) -> int:
+        """Total de ejercicios del listado (mismo filtro que get_user_exercises, sin paginar)"""
         if status:
-            query = """
-                SELECT * FROM user_exercises 
-                WHERE user_id = %s AND status = %s
-                ORDER BY created_at DESC
-            """
+            query = "SELECT COUNT(*) as count FROM user_exercises WHERE user_id = %s AND status = %s"
             params = (user_id, status)
         else:
-            query = """
-                SELECT * FROM user_exercises 
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-            """
+            query = "SELECT COUNT(*) as count FROM user_exercises WHERE user_id = %s AND status <> 'queued'"
             params = (user_id,)
-        
-        return self.fetch_all(query, params)
+        result = self.fetch_one(query, params)
+        return result['count'] if result else 0
+
+    def get_queued_exercises_count(self, user_id: str) -> int:
+        """Cuenta los ejercicios pregenerados (ocultos) del usuario"""
+        query = """
+            SELECT COUNT(*) as count
+            FROM user_exercises
+            WHERE user_id = %s AND status = 'queued'
+        """
+        result = self.fetch_one(query, (user_id,))
+        return result['count'] if result else 0
+
+    def promote_queued_exercises(self, user_id: str, limit: int = 5) -> int:
+        """
+        Pasa a 'pending' hasta `limit` ejercicios pregenerados, los más antiguos primero.
+
+        available_at se fija al momento de la promoción para que el listado los
+        muestre como los más recientes; created_at conserva cuándo se generaron.
+        """
+        query = """
+            UPDATE user_exercises
+            SET status = 'pending', available_at = NOW()
+            WHERE user_id = %s AND status = 'queued'
+            ORDER BY created_at, id
+            LIMIT %s
+        """
+        return self.execute(query, (user_id, limit))
+
+    def get_user_exercises(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict]:
+        """
+        Obtiene los ejercicios del usuario, opcionalmente filtrados por estado.
+        Sin estado se listan todos salvo los pregenerados ('queued').
+
+        Paginación por keyset sobre (available_at, id) descendente: `before` es la
+        clave del último ejercicio de la página anterior (ver decode_cursor).
+        """
+        return self._list_exercises(user_id, (status,) if status else None, limit, before)
+
+    def get_pending_exercises(self, user_id: str, limit: int = 5) -> List[Dict]:
+        """Obtiene los ejercicios pendientes o en progreso más recientes del usuario"""
+        return self._list_exercises(user_id, ('pending', 'in_progress'), limit)
+
+    def _list_exercises(
+        self,
+        user_id: str,
+        statuses: Optional[Tuple[str, ...]] = None,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict]:
+        conditions = ["user_id = %s"]
+        params: list = [user_id]
+
+        if statuses:
+            conditions.append(f"status IN ({', '.join(['%s'] * len(statuses))})")
+            params.extend(statuses)
+        else:
+            # Los pregenerados no son visibles hasta que se promocionan
+            conditions.append("status <> 'queued'")
+
+        if before:
+            available_at, exercise_id = before
+            conditions.append("(available_at < %s OR (available_at = %s AND id < %s))")
+            params.extend([available_at, available_at, exercise_id])
+
+        query = f"""
+            SELECT {self.EXERCISE_COLUMNS}
+            FROM user_exercises
+            WHERE {' AND '.join(conditions)}
+            ORDER BY available_at DESC, id DESC
+        """
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+
+        return self.fetch_all(query, tuple(params))
+
+    @staticmethod
+    def encode_cursor(exercise: Dict) -> str:
+        """Cursor opaco con la clave (available_at, id) de un ejercicio"""
+        raw = json.dumps([exercise['available_at'].isoformat(), exercise['id']])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        """Inverso de encode_cursor; lanza ValueError si el cursor no es válido"""
+        try:
+            available_at, exercise_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(available_at), str(exercise_id)
+        except (TypeError, ValueError, binascii.Error) as e:
+            raise ValueError("Cursor inválido") from e
     
     def mark_exercise_completed(self, exercise_id: str, user_id: str) -> bool:
         """Marca un ejercicio como completado"""
@@ -83,8 +194,8 @@ class ExerciseRepository(BaseRepository):
     
     def get_exercise_by_id(self, exercise_id: str, user_id: str) -> Optional[Dict]:
         """Obtiene un ejercicio específico del usuario"""
-        query = """
-            SELECT * FROM user_exercises 
+        query = f"""
+            SELECT {self.EXERCISE_COLUMNS} FROM user_exercises 
             WHERE id = %s AND user_id = %s
         """
         return self.fetch_one(query, (exercise_id, user_id))
@@ -104,3 +215,52 @@ class ExerciseRepository(BaseRepository):
         result = self.fetch_one(query, (user_id,))
         return result['count'] if result else 0
 
+
+
+class AsyncExerciseRepository(AsyncBaseRepository):
+    """Variante async de ExerciseRepository (mismos métodos, sin bloquear el event loop)"""
+
+    def __init__(self):
+        super().__init__(ExerciseRepository())
+
+    async def create_exercise(self, user_id: str, exercise_data: Dict) -> str:
+        return await run_in_db_thread(self.sync.create_exercise, user_id, exercise_data)
+
+    async def create_exercises_batch(self, user_id: str, exercises: List[Dict], status: str = 'pending') -> List[str]:
+        return await run_in_db_thread(self.sync.create_exercises_batch, user_id, exercises, status)
+
+    async def get_pending_exercises_count(self, user_id: str) -> int:
+        return await run_in_db_thread(self.sync.get_pending_exercises_count, user_id)
+
+    async def count_user_exercises(self, user_id: str, status: Optional[str] = None) -> int:
+        return await run_in_db_thread(self.sync.count_user_exercises, user_id, status)
+
+    async def get_queued_exercises_count(self, user_id: str) -> int:
+        return await run_in_db_thread(self.sync.get_queued_exercises_count, user_id)
+
+    async def promote_queued_exercises(self, user_id: str, limit: int = 5) -> int:
+        return await run_in_db_thread(self.sync.promote_queued_exercises, user_id, limit)
+
+    async def get_user_exercises(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[datetime, str]] = None
+    ) -> List[Dict]:
+        return await run_in_db_thread(self.sync.get_user_exercises, user_id, status, limit, before)
+
+    async def get_pending_exercises(self, user_id: str, limit: int = 5) -> List[Dict]:
+        return await run_in_db_thread(self.sync.get_pending_exercises, user_id, limit)
+
+    async def mark_exercise_completed(self, exercise_id: str, user_id: str) -> bool:
+        return await run_in_db_thread(self.sync.mark_exercise_completed, exercise_id, user_id)
+
+    async def get_exercise_by_id(self, exercise_id: str, user_id: str) -> Optional[Dict]:
+        return await run_in_db_thread(self.sync.get_exercise_by_id, exercise_id, user_id)
+
+    async def should_generate_new_exercises(self, user_id: str, required_count: int = 5) -> bool:
+        return await run_in_db_thread(self.sync.should_generate_new_exercises, user_id, required_count)
+
+    async def get_completed_exercises_count(self, user_id: str) -> int:
+        return await run_in_db_thread(self.sync.get_completed_exercises_count, user_id)
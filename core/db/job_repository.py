@@ -0,0 +1,150 @@
+from typing import List, Dict, Optional
+from mysql.connector.errors import IntegrityError
+from core.db import Database
+from core.db.repository import BaseRepository, AsyncBaseRepository
+from core.db.executor import run_in_db_thread
+import uuid
+
+
+class GenerationJobRepository(BaseRepository):
+    """Estado persistido de los trabajos de generación de ejercicios en segundo plano"""
+
+    def __init__(self):
+        super().__init__(Database())
+
+    JOB_COLUMNS = (
+        "id, user_id, status, requested_count, generated_count, error, "
+        "created_at, started_at, finished_at"
+    )
+
+    def create_job(self, user_id: str, requested_count: int) -> Dict:
+        """
+        Crea un trabajo en cola para el usuario.
+
+        Idempotente: si el usuario ya tiene un trabajo en cola o en curso
+        devuelve ese trabajo en lugar de crear otro (clave 'created' = False).
+        """
+        job_id = str(uuid.uuid4())
+        try:
+            self.execute(
+                """
+                INSERT INTO exercise_generation_jobs (id, user_id, status, requested_count)
+                VALUES (%s, %s, 'queued', %s)
+                """,
+                (job_id, user_id, requested_count)
+            )
+        except IntegrityError:
+            # uq_generation_jobs_active_user: ya hay un trabajo activo
+            active = self.get_active_job(user_id)
+            if active:
+                return {**active, "created": False}
+            raise
+
+        return {**self.get_job(job_id), "created": True}
+
+    def get_job(self, job_id: str, user_id: Optional[str] = None) -> Optional[Dict]:
+        """Obtiene un trabajo; con user_id solo si pertenece a ese usuario"""
+        query = f"SELECT {self.JOB_COLUMNS} FROM exercise_generation_jobs WHERE id = %s"
+        params = (job_id,)
+        if user_id is not None:
+            query += " AND user_id = %s"
+            params += (user_id,)
+        return self.fetch_one(query, params)
+
+    def get_active_job(self, user_id: str) -> Optional[Dict]:
+        """Trabajo en cola o en curso del usuario, si lo hay"""
+        query = f"""
+            SELECT {self.JOB_COLUMNS} FROM exercise_generation_jobs
+            WHERE active_user_id = %s
+        """
+        return self.fetch_one(query, (user_id,))
+
+    def get_queued_jobs(self, limit: int = 100) -> List[Dict]:
+        """Trabajos que siguen en cola (p. ej. tras reiniciar el proceso)"""
+        query = f"""
+            SELECT {self.JOB_COLUMNS} FROM exercise_generation_jobs
+            WHERE status = 'queued'
+            ORDER BY created_at
+            LIMIT %s
+        """
+        return self.fetch_all(query, (limit,))
+
+    def claim_job(self, job_id: str) -> bool:
+        """Pasa el trabajo de 'queued' a 'running'; False si otro worker ya lo tomó"""
+        query = """
+            UPDATE exercise_generation_jobs
+            SET status = 'running', started_at = NOW()
+            WHERE id = %s AND status = 'queued'
+        """
+        return self.execute(query, (job_id,)) > 0
+
+    def update_progress(self, job_id: str, generated_count: int) -> bool:
+        query = """
+            UPDATE exercise_generation_jobs
+            SET generated_count = %s
+            WHERE id = %s AND status = 'running'
+        """
+        return self.execute(query, (generated_count, job_id)) > 0
+
+    def complete_job(self, job_id: str, generated_count: int) -> bool:
+        query = """
+            UPDATE exercise_generation_jobs
+            SET status = 'completed', generated_count = %s, finished_at = NOW()
+            WHERE id = %s
+        """
+        return self.execute(query, (generated_count, job_id)) > 0
+
+    def fail_job(self, job_id: str, error: str) -> bool:
+        query = """
+            UPDATE exercise_generation_jobs
+            SET status = 'failed', error = %s, finished_at = NOW()
+            WHERE id = %s
+        """
+        return self.execute(query, (error[:500], job_id)) > 0
+
+    def fail_stale_jobs(self, max_running_seconds: int) -> int:
+        """
+        Marca como fallidos los trabajos 'running' que llevan demasiado tiempo
+        (el proceso que los ejecutaba murió) para liberar al usuario
+        """
+        query = """
+            UPDATE exercise_generation_jobs
+            SET status = 'failed', error = 'Trabajo interrumpido', finished_at = NOW()
+            WHERE status = 'running'
+              AND started_at < NOW() - INTERVAL %s SECOND
+        """
+        return self.execute(query, (max_running_seconds,))
+
+
+class AsyncGenerationJobRepository(AsyncBaseRepository):
+    """Variante async de GenerationJobRepository (mismos métodos, sin bloquear el event loop)"""
+
+    def __init__(self):
+        super().__init__(GenerationJobRepository())
+
+    async def create_job(self, user_id: str, requested_count: int) -> Dict:
+        return await run_in_db_thread(self.sync.create_job, user_id, requested_count)
+
+    async def get_job(self, job_id: str, user_id: Optional[str] = None) -> Optional[Dict]:
+        return await run_in_db_thread(self.sync.get_job, job_id, user_id)
+
+    async def get_active_job(self, user_id: str) -> Optional[Dict]:
+        return await run_in_db_thread(self.sync.get_active_job, user_id)
+
+    async def get_queued_jobs(self, limit: int = 100) -> List[Dict]:
+        return await run_in_db_thread(self.sync.get_queued_jobs, limit)
+
+    async def claim_job(self, job_id: str) -> bool:
+        return await run_in_db_thread(self.sync.claim_job, job_id)
+
+    async def update_progress(self, job_id: str, generated_count: int) -> bool:
+        return await run_in_db_thread(self.sync.update_progress, job_id, generated_count)
+
+    async def complete_job(self, job_id: str, generated_count: int) -> bool:
+        return await run_in_db_thread(self.sync.complete_job, job_id, generated_count)
+
+    async def fail_job(self, job_id: str, error: str) -> bool:
+        return await run_in_db_thread(self.sync.fail_job, job_id, error)
+
+    async def fail_stale_jobs(self, max_running_seconds: int) -> int:
+        return await run_in_db_thread(self.sync.fail_stale_jobs, max_running_seconds)
@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+from core.enviroment import env
+
+
+class _PoolEntry:
+    """Conexión física más el instante en que se abrió (para el recycle)"""
+
+    __slots__ = ("raw", "created_at")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+
+
+class PooledConnection:
+    """
+    Proxy de una conexión del pool.
+
+    Expone la misma interfaz que una conexión de mysql.connector, pero
+    close() la devuelve al pool en lugar de cerrar el socket.
+    """
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise PoolError("La conexión ya fue devuelta al pool")
+        return getattr(self._entry.raw, name)
+
+    def close(self):
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._checkin(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones MySQL compartido por el proceso (uno por worker de uvicorn).
+
+    - size: conexiones que se mantienen abiertas en reposo
+    - max_overflow: conexiones extra permitidas en picos (se cierran al devolverse)
+    - timeout: segundos máximos esperando una conexión libre antes de fallar
+    - recycle: segundos tras los que una conexión se reabre (evita wait_timeout de MySQL)
+    - pre_ping: verifica la conexión antes de entregarla
+    """
+
+    def __init__(
+        self,
+        creator: Callable,
+        size: int = 5,
+        max_overflow: int = 10,
+        timeout: float = 30.0,
+        recycle: int = 3600,
+        pre_ping: bool = True,
+    ):
+        self._creator = creator
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle: Deque[_PoolEntry] = deque()
+        self._opened = 0  # conexiones físicas abiertas (en uso + en reposo)
+        self._in_use = 0
+        self._waiters: Deque[object] = deque()
+        self._cond = threading.Condition(threading.Lock())
+
+        # Métricas
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._recycled = 0
+        self._ping_failures = 0
+        self._peak_in_use = 0
+
+    def connect(self) -> PooledConnection:
+        """Obtiene una conexión del pool, esperando hasta `timeout` si está agotado"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        with self._cond:
+            # Orden FIFO entre los que esperan para que nadie se quede sin conexión
+            ticket = object()
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    if self._waiters[0] is ticket:
+                        if self._idle:
+                            entry = self._idle.pop()
+                            break
+                        if self._opened < self.size + self.max_overflow:
+                            entry = None
+                            self._opened += 1
+                            break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolError(
+                            f"Pool MySQL agotado: sin conexión libre tras {self.timeout}s "
+                            f"({self._in_use} en uso)"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        # La apertura / validación se hace fuera del lock
+        try:
+            entry = self._validate(entry)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._opened -= 1
+                self._cond.notify_all()
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        return PooledConnection(self, entry)
+
+    def _validate(self, entry: Optional[_PoolEntry]) -> _PoolEntry:
+        """Abre una conexión nueva o comprueba que la reutilizada siga viva"""
+        if entry is not None and self.recycle >= 0 and time.monotonic() - entry.created_at > self.recycle:
+            self._close_quietly(entry.raw)
+            with self._cond:
+                self._recycled += 1
+            entry = None
+
+        if entry is not None and self.pre_ping:
+            try:
+                entry.raw.ping(reconnect=False)
+            except Exception:
+                self._close_quietly(entry.raw)
+                with self._cond:
+                    self._ping_failures += 1
+                entry = None
+
+        if entry is None:
+            entry = _PoolEntry(self._creator())
+        return entry
+
+    def _checkin(self, entry: _PoolEntry):
+        """Devuelve una conexión al pool (la cierra si sobra o quedó inservible)"""
+        keep = True
+        try:
+            # No dejar transacciones abiertas en conexiones reutilizadas
+            if entry.raw.in_transaction:
+                entry.raw.rollback()
+        except Exception:
+            keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep and len(self._idle) < self.size:
+                self._idle.append(entry)
+                entry = None
+            else:
+                self._opened -= 1
+            self._cond.notify_all()
+
+        if entry is not None:
+            self._close_quietly(entry.raw)
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Cierra todas las conexiones en reposo"""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._opened -= len(idle)
+        for entry in idle:
+            self._close_quietly(entry.raw)
+
+    def stats(self) -> Dict:
+        """Métricas del pool para dimensionarlo por worker"""
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "opened": self._opened,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "checkout_wait_avg_ms": round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "checkout_wait_max_ms": round(self._wait_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "ping_failures": self._ping_failures,
+            }
+
+
+def _create_mysql_connection():
+    return mysql.connector.connect(
+        host=env.MYSQL_HOST,
+        port=env.MYSQL_PORT,
+        user=env.MYSQL_USER,
+        password=env.MYSQL_PASSWORD,
+        database=env.MYSQL_DATABASE,
+    )
+
+
+# Pool compartido del proceso
+mysql_pool = ConnectionPool(
+    creator=_create_mysql_connection,
+    size=env.MYSQL_POOL_SIZE,
+    max_overflow=env.MYSQL_POOL_MAX_OVERFLOW,
+    timeout=env.MYSQL_POOL_TIMEOUT,
+    recycle=env.MYSQL_POOL_RECYCLE,
+    pre_ping=env.MYSQL_POOL_PRE_PING,
+)
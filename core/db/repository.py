@@ -1,3 +1,6 @@
+from core.db.executor import run_in_db_thread
+
+
 class BaseRepository:
     def __init__(self, db):
         self.db = db
@@ -32,3 +35,42 @@ class BaseRepository:
         finally:
             cursor.close()
             conn.close()
+
+    def execute_many(self, query, seq_params):
+        """Ejecuta la misma sentencia para muchas filas en una sola transacción"""
+        conn = self.db.connect()
+        cursor = conn.cursor()
+        try:
+            # mysql.connector agrupa los INSERT ... VALUES en un único INSERT multi-fila
+            cursor.executemany(query, seq_params)
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+
+class AsyncBaseRepository:
+    """
+    Variante async de BaseRepository con la misma interfaz.
+
+    Cada query corre en el executor dedicado de MySQL para no bloquear el event loop.
+    """
+
+    def __init__(self, repository: BaseRepository):
+        self.sync = repository
+
+    async def fetch_one(self, query, params=None):
+        return await run_in_db_thread(self.sync.fetch_one, query, params)
+
+    async def fetch_all(self, query, params=None):
+        return await run_in_db_thread(self.sync.fetch_all, query, params)
+
+    async def execute(self, query, params=None):
+        return await run_in_db_thread(self.sync.execute, query, params)
+
+    async def execute_many(self, query, seq_params):
+        return await run_in_db_thread(self.sync.execute_many, query, seq_params)
@@ -33,12 +33,79 @@ class Environment:
             self.MYSQL_PASSWORD: str = os.environ["MYSQL_PASSWORD"]
             self.MYSQL_DATABASE: str = os.environ["MYSQL_DATABASE"]
 
+            # Pool de conexiones (por worker de uvicorn)
+            self.MYSQL_POOL_SIZE: int = int(os.environ.get("MYSQL_POOL_SIZE", 5))
+            self.MYSQL_POOL_MAX_OVERFLOW: int = int(os.environ.get("MYSQL_POOL_MAX_OVERFLOW", 10))
+            self.MYSQL_POOL_TIMEOUT: float = float(os.environ.get("MYSQL_POOL_TIMEOUT", 10))
+            self.MYSQL_POOL_RECYCLE: int = int(os.environ.get("MYSQL_POOL_RECYCLE", 3600))
+            self.MYSQL_POOL_PRE_PING: bool = (
+                os.environ.get("MYSQL_POOL_PRE_PING", "True").lower() == "true"
+            )
+            # Hilos del executor de MySQL; nunca menos que size + overflow (ver core/db/executor.py)
+            self.MYSQL_THREADPOOL_SIZE: int = int(
+                os.environ.get(
+                    "MYSQL_THREADPOOL_SIZE",
+                    self.MYSQL_POOL_SIZE + self.MYSQL_POOL_MAX_OVERFLOW,
+                )
+            )
+
             # ==========================
             # LLM / Embeddings
             # ==========================
             self.OPENAI_API_KEY: str = os.environ["OPENAI_API_KEY"]
             self.OPENAI_MODEL: str = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
             self.EMBEDDING_MODEL: str = os.environ["EMBEDDING_MODEL"]
+            # "torch", "onnx" u "onnx_int8" (ONNX con cuantización dinámica, exportado a EMBEDDING_EXPORT_DIR)
+            self.EMBEDDING_BACKEND: str = os.environ.get("EMBEDDING_BACKEND", "torch")
+            if self.EMBEDDING_BACKEND not in ("torch", "onnx", "onnx_int8"):
+                raise RuntimeError(
+                    f"EMBEDDING_BACKEND inválido: {self.EMBEDDING_BACKEND} (torch|onnx|onnx_int8)"
+                )
+            self.EMBEDDING_EXPORT_DIR: str = os.environ.get("EMBEDDING_EXPORT_DIR", ".embedding_models")
+            # Configuración de cuantización según la CPU: arm64, avx2, avx512 o avx512_vnni
+            self.EMBEDDING_QUANTIZATION: str = os.environ.get("EMBEDDING_QUANTIZATION", "avx2")
+            # Caché de embeddings de las consultas RAG: LRU en memoria y, opcionalmente,
+            # en disco para que sobreviva a los reinicios ("" = solo memoria)
+            self.QUERY_EMBEDDING_CACHE_SIZE: int = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+            self.QUERY_EMBEDDING_CACHE_DIR: str = os.environ.get("QUERY_EMBEDDING_CACHE_DIR", "")
+            # Micro-batching de los embeddings de consultas concurrentes (ventana en ms y tamaño máximo)
+            self.EMBEDDING_BATCH_WINDOW_MS: float = float(os.environ.get("EMBEDDING_BATCH_WINDOW_MS", 5))
+            self.EMBEDDING_BATCH_MAX_SIZE: int = int(os.environ.get("EMBEDDING_BATCH_MAX_SIZE", 32))
+            # Caché de resultados RAG (query, k) -> chunks y caché del texto de los chunks
+            self.RETRIEVAL_CACHE_SIZE: int = int(os.environ.get("RETRIEVAL_CACHE_SIZE", 1024))
+            self.CHUNK_CACHE_SIZE: int = int(os.environ.get("CHUNK_CACHE_SIZE", 2000))
+            # Segundos que cada worker reutiliza la versión del corpus leída de MySQL.
+            # Por defecto 0: se lee en cada consulta de contexto. Con un valor > 0, tras
+            # una ingesta en otro worker este sirve hasta ese tiempo el contexto anterior
+            self.CORPUS_VERSION_TTL: float = float(os.environ.get("CORPUS_VERSION_TTL", 0))
+            # Ejercicios generados en paralelo por petición
+            self.LLM_MAX_CONCURRENCY: int = int(os.environ.get("LLM_MAX_CONCURRENCY", 5))
+            # Scheduler global del LLM (por worker de uvicorn; 0 = sin límite)
+            self.LLM_REQUESTS_PER_MINUTE: float = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 500))
+            self.LLM_TOKENS_PER_MINUTE: float = float(os.environ.get("LLM_TOKENS_PER_MINUTE", 200000))
+            self.LLM_MAX_IN_FLIGHT: int = int(os.environ.get("LLM_MAX_IN_FLIGHT", 20))
+            # "per_exercise" (una llamada por ejercicio) o "batch" (una llamada estructurada)
+            self.EXERCISE_GENERATION_MODE: str = os.environ.get("EXERCISE_GENERATION_MODE", "per_exercise")
+            if self.EXERCISE_GENERATION_MODE not in ("per_exercise", "batch"):
+                raise RuntimeError(
+                    f"EXERCISE_GENERATION_MODE inválido: {self.EXERCISE_GENERATION_MODE} (per_exercise|batch)"
+                )
+            # Reintentos de un ejercicio cuya respuesta no es JSON válido
+            self.EXERCISE_PARSE_MAX_RETRIES: int = int(os.environ.get("EXERCISE_PARSE_MAX_RETRIES", 2))
+            # Presupuestos por etapa de la generación interactiva, en segundos (0 = sin límite)
+            self.RETRIEVAL_DEADLINE: float = float(os.environ.get("RETRIEVAL_DEADLINE", 3))
+            self.EXERCISE_DEADLINE: float = float(os.environ.get("EXERCISE_DEADLINE", 40))
+            # Hedging: duplicar la llamada al LLM que supera este percentil de latencia (0 = desactivado)
+            self.LLM_HEDGE_PERCENTILE: float = float(os.environ.get("LLM_HEDGE_PERCENTILE", 0.95))
+            # Retraso del duplicado mientras no hay muestras suficientes para el percentil
+            self.LLM_HEDGE_INITIAL_DELAY: float = float(os.environ.get("LLM_HEDGE_INITIAL_DELAY", 15))
+
+            # Reposición de ejercicios en segundo plano (por worker de uvicorn)
+            self.REFILL_WORKERS: int = int(os.environ.get("REFILL_WORKERS", 2))
+            self.REFILL_QUEUE_SIZE: int = int(os.environ.get("REFILL_QUEUE_SIZE", 100))
+            self.REFILL_JOB_TIMEOUT: int = int(os.environ.get("REFILL_JOB_TIMEOUT", 300))
+            # Pregenerar el siguiente lote cuando quedan menos pendientes que esto (0 = desactivado)
+            self.PREFETCH_WATERMARK: int = int(os.environ.get("PREFETCH_WATERMARK", 2))
 
             # ==========================
             # MinIO
@@ -65,6 +132,19 @@ class Environment:
             self.JWT_EXPIRES_IN: int = int(os.environ.get("JWT_EXPIRES_IN", 86400))
             self.JWT_VERIFICATION_EXPIRES_IN: int = int(os.environ.get("JWT_VERIFICATION_EXPIRES_IN", 86400))
 
+            # Caché de usuarios autenticados (por worker)
+            self.USER_CACHE_SIZE: int = int(os.environ.get("USER_CACHE_SIZE", 10000))
+            self.USER_CACHE_TTL: float = float(os.environ.get("USER_CACHE_TTL", 60))
+            self.USER_CACHE_NEGATIVE_TTL: float = float(os.environ.get("USER_CACHE_NEGATIVE_TTL", 10))
+
+            # Caché de tokens JWT verificados (por worker)
+            self.TOKEN_CACHE_SIZE: int = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+            self.TOKEN_CACHE_MAX_TTL: float = float(os.environ.get("TOKEN_CACHE_MAX_TTL", 3600))
+
+            # Caché de suscripciones (por worker)
+            self.SUBSCRIPTION_CACHE_SIZE: int = int(os.environ.get("SUBSCRIPTION_CACHE_SIZE", 10000))
+            self.SUBSCRIPTION_CACHE_TTL: float = float(os.environ.get("SUBSCRIPTION_CACHE_TTL", 60))
+
         except KeyError as e:
             raise RuntimeError(
                 f"Falta la variable de entorno requerida: {e.args[0]}"
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Cola de trabajos en segundo plano dentro del proceso.
+
+    Un número fijo de workers (tasks de asyncio) consume la cola, así el trabajo
+    pesado nunca ocupa más de `workers` ranuras a la vez. El estado durable de
+    cada trabajo lo guarda quien lo encola; la cola solo lo ejecuta.
+    """
+
+    def __init__(self, name: str, workers: int, maxsize: int = 0):
+        self.name = name
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self._running = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def start(self):
+        """Arranca los workers en el event loop actual"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{n}")
+            for n in range(self.workers)
+        ]
+
+    async def stop(self):
+        """Cancela los workers; los trabajos pendientes se pierden de la cola en memoria"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(self, fn: Callable[..., Awaitable], *args) -> bool:
+        """Encola fn(*args); False si la cola está llena o parada"""
+        if self._queue is None:
+            self._rejected += 1
+            return False
+        try:
+            self._queue.put_nowait((fn, args))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            return False
+        return True
+
+    async def _worker(self):
+        while True:
+            fn, args = await self._queue.get()
+            self._running += 1
+            try:
+                await fn(*args)
+                self._succeeded += 1
+            except Exception:
+                self._failed += 1
+                logger.exception("Trabajo de la cola %s falló", self.name)
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "maxsize": self.maxsize,
+            "running": self._running,
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "rejected": self._rejected,
+        }
@@ -0,0 +1,109 @@
+from itertools import combinations
+from typing import Dict, Iterable, Iterator, List
+
+from schemas.exercise_schema import DailyChallenge, StoicLevel, StoicPath
+
+# Variantes de Laravel/BD -> valor canónico: mismo significado, misma query RAG
+_PATH_VARIANTS = {
+    StoicPath.INNER_PEACE_ALT: StoicPath.INNER_PEACE,
+    StoicPath.INNER_PEACE_UNDERSCORE: StoicPath.INNER_PEACE,
+    StoicPath.SELF_CONTROL_ALT: StoicPath.SELF_CONTROL,
+    StoicPath.WISDOM_ALT: StoicPath.WISDOM,
+    StoicPath.WISDOM_NO_ACCENT: StoicPath.WISDOM,
+    StoicPath.RESILIENCE_ALT: StoicPath.RESILIENCE,
+    StoicPath.GRATITUDE_ALT: StoicPath.GRATITUDE,
+    StoicPath.JUSTICE_ALT: StoicPath.JUSTICE,
+    StoicPath.COURAGE_ALT: StoicPath.COURAGE,
+    StoicPath.TEMPERANCE_ALT: StoicPath.TEMPERANCE,
+}
+
+_CHALLENGE_VARIANTS = {
+    DailyChallenge.MEDITATION: DailyChallenge.MORNING_MEDITATION,
+    DailyChallenge.MEDITATION_ALT: DailyChallenge.MORNING_MEDITATION,
+    DailyChallenge.REFLECTION: DailyChallenge.EVENING_REFLECTION,
+    DailyChallenge.REFLECTION_ALT: DailyChallenge.EVENING_REFLECTION,
+    DailyChallenge.JOURNAL: DailyChallenge.STOIC_JOURNAL,
+}
+
+CANONICAL_PATHS = [p for p in StoicPath if p not in _PATH_VARIANTS]
+CANONICAL_CHALLENGES = [c for c in DailyChallenge if c not in _CHALLENGE_VARIANTS]
+
+
+def _canonical_values(enum_cls, variants: Dict, items: Iterable) -> List[str]:
+    """Valores canónicos, sin repetir y ordenados; lo que no es del enum se deja tal cual"""
+    values = set()
+    for item in items or []:
+        raw = item.value if hasattr(item, "value") else str(item)
+        try:
+            member = enum_cls(raw)
+        except ValueError:
+            values.add(raw)
+            continue
+        values.add(variants.get(member, member).value)
+    return sorted(values)
+
+
+def canonical_paths(paths: Iterable) -> List[str]:
+    return _canonical_values(StoicPath, _PATH_VARIANTS, paths)
+
+
+def canonical_challenges(challenges: Iterable) -> List[str]:
+    return _canonical_values(DailyChallenge, _CHALLENGE_VARIANTS, challenges)
+
+
+def build_search_query(profile: Dict) -> str:
+    """
+    Query RAG de un perfil (la de LlmPipe.get_stoic_context).
+
+    Caminos y desafíos van canónicos (variantes de Laravel unificadas), ordenados
+    y sin repetir: el mismo perfil da siempre la misma query, que es la clave de
+    los contextos precalculados y de las cachés de embeddings y resultados.
+    """
+    parts = ["estoicismo filosofía"]  # Base para textos estoicos
+
+    # Agregar caminos estoicos de interés
+    parts.extend(canonical_paths(profile.get("stoic_paths")))
+
+    # Agregar desafíos/prácticas del usuario
+    parts.extend(canonical_challenges(profile.get("daily_challenges")))
+
+    # Nivel de conocimiento estoico
+    if profile.get("stoic_level"):
+        level = profile["stoic_level"]
+        level_value = level.value if hasattr(level, 'value') else str(level)
+        parts.append(level_value)
+
+    return " ".join(parts)
+
+
+def enumerate_archetypes(max_paths: int = 2, max_challenges: int = 1) -> Iterator[Dict]:
+    """
+    Perfiles arquetipo: cada nivel estoico con cada combinación de hasta
+    `max_paths` caminos y hasta `max_challenges` desafíos canónicos.
+
+    Solo lo que entra en la query RAG (build_search_query); el espacio
+    completo (hasta 4 caminos y desafíos sin límite) es inabarcable, así que los
+    perfiles reales se añaden aparte desde los quizzes (precompute_contexts.py).
+    """
+    path_sets = [
+        combo for size in range(1, max_paths + 1) for combo in combinations(CANONICAL_PATHS, size)
+    ]
+    challenge_sets = [
+        combo for size in range(1, max_challenges + 1) for combo in combinations(CANONICAL_CHALLENGES, size)
+    ]
+    for level in StoicLevel:
+        for paths in path_sets:
+            for challenges in challenge_sets:
+                yield {
+                    "stoic_level": level,
+                    "stoic_paths": list(paths),
+                    "daily_challenges": list(challenges),
+                }
+
+
+def archetype_queries(max_paths: int = 2, max_challenges: int = 1) -> List[str]:
+    """Queries RAG distintas de los perfiles arquetipo, en el orden de enumerate_archetypes"""
+    queries = dict.fromkeys(
+        build_search_query(profile) for profile in enumerate_archetypes(max_paths, max_challenges)
+    )
+    return list(queries)
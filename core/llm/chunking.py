@@ -0,0 +1,34 @@
+from pathlib import Path
+from typing import List
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+def split_pdf(path: Path) -> List[str]:
+    """Texto de un PDF troceado en chunks como los que se guardan en pgvector"""
+    loader = PyPDFLoader(str(path))
+    pages: List[Document] = loader.load()
+
+    full_text = "\n\n".join([page.page_content for page in pages])
+
+    # Optimizado para textos filosóficos estoicos
+    # - Chunks más grandes para preservar argumentos completos
+    # - Mayor overlap para mantener contexto filosófico
+    # - Separadores priorizando estructura de párrafos y oraciones
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1200,
+        chunk_overlap=300,
+        separators=[
+            "\n\n\n",  # Secciones grandes
+            "\n\n",    # Párrafos (prioridad alta para textos filosóficos)
+            "\n",      # Líneas
+            ". ",      # Oraciones completas
+            "; ",      # Cláusulas
+            ", ",      # Frases
+            " ",       # Palabras
+            ""         # Caracteres
+        ],
+    )
+    return splitter.split_text(full_text)
@@ -0,0 +1,215 @@
+import asyncio
+import threading
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Una etapa de la generación no terminó dentro de su presupuesto de tiempo"""
+
+
+def _discard(task: asyncio.Future):
+    """Cancela un intento perdedor sin dejar excepciones sin recoger"""
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()
+
+
+class LatencyTracker:
+    """Latencias recientes de una etapa (ventana deslizante) para estimar percentiles"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentil q (0-1) de la ventana; None si no hay muestras"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class Hedger:
+    """
+    Peticiones con cobertura (hedged requests) de una etapa del pipeline.
+
+    Lanza la llamada y, si no ha terminado tras el percentil `percentile` de las
+    latencias observadas (o `initial_delay` mientras hay menos de `min_samples`),
+    lanza un duplicado y se queda con el primero que termine; el otro se cancela.
+    Si ninguno termina dentro del presupuesto lanza DeadlineExceeded.
+
+    Los contadores (duplicados lanzados/ganados, presupuestos agotados) salen en
+    /health/llm.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float,
+        initial_delay: float,
+        min_samples: int = 20,
+        window: int = 200
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+
+        self._calls = 0
+        self._hedges_fired = 0
+        self._hedges_won = 0
+        self._deadlines_exceeded = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Segundos tras los que se lanza el duplicado (None = hedging desactivado)"""
+        if self.percentile <= 0:
+            return None
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        return self.latencies.percentile(self.percentile)
+
+    async def run(
+        self,
+        factory: Callable[[], Awaitable[T]],
+        deadline: Optional[float],
+        hedge: bool = True
+    ) -> T:
+        """Ejecuta factory() con cobertura; deadline en segundos (None = sin límite)"""
+        loop = asyncio.get_running_loop()
+        self._calls += 1
+
+        def launch() -> asyncio.Future:
+            task = asyncio.ensure_future(factory())
+            started[task] = loop.time()
+            return task
+
+        started: Dict[asyncio.Future, float] = {}
+        primary = launch()
+        try:
+            result, winner = await self._race(loop, launch, primary, deadline, hedge)
+        finally:
+            for task in started:
+                _discard(task)
+
+        if winner is not primary:
+            self._hedges_won += 1
+        self.latencies.record(loop.time() - started[winner])
+        return result
+
+    async def stream(
+        self,
+        factory: Callable[[], AsyncIterator[T]],
+        deadline: Optional[float],
+        hedge: bool = True
+    ) -> AsyncIterator[T]:
+        """
+        Variante para streaming: la cobertura se decide por el primer fragmento
+        (time to first token) y el presupuesto cubre el stream completo
+        """
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline if deadline is not None else None
+        self._calls += 1
+
+        iterators: Dict[asyncio.Future, AsyncIterator[T]] = {}
+        started: Dict[asyncio.Future, float] = {}
+
+        def launch() -> asyncio.Future:
+            iterator = factory().__aiter__()
+            task = asyncio.ensure_future(iterator.__anext__())
+            iterators[task] = iterator
+            started[task] = loop.time()
+            return task
+
+        primary = launch()
+        winner = None
+        try:
+            first, winner = await self._race(loop, launch, primary, deadline, hedge)
+        except StopAsyncIteration:
+            return
+        finally:
+            for task, iterator in iterators.items():
+                if task is winner:
+                    continue
+                if task.done():
+                    # El perdedor ya tenía su primer fragmento: cerrar su stream
+                    await iterator.aclose()
+                _discard(task)
+
+        if winner is not primary:
+            self._hedges_won += 1
+        self.latencies.record(loop.time() - started[winner])
+
+        iterator = iterators[winner]
+        try:
+            yield first
+            while True:
+                timeout = None if deadline_at is None else max(0.0, deadline_at - loop.time())
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self._deadlines_exceeded += 1
+                    raise DeadlineExceeded(f"{self.name}: stream sin terminar tras {deadline}s") from None
+                yield chunk
+        finally:
+            await iterator.aclose()
+
+    async def _race(self, loop, launch, primary: asyncio.Future, deadline: Optional[float], hedge: bool):
+        """Espera al primer intento que termine bien; devuelve (resultado, task ganadora)"""
+        now = loop.time()
+        deadline_at = now + deadline if deadline is not None else None
+        delay = self.hedge_delay() if hedge else None
+        hedge_at = now + delay if delay is not None else None
+        if hedge_at is not None and deadline_at is not None and hedge_at >= deadline_at:
+            hedge_at = None
+
+        pending = {primary}
+        error: Optional[BaseException] = None
+        while pending:
+            wake_at = min((t for t in (hedge_at, deadline_at) if t is not None), default=None)
+            timeout = None if wake_at is None else max(0.0, wake_at - loop.time())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), task
+                # Si falla uno se sigue esperando al otro (si lo hay)
+                error = error or task.exception()
+            if done:
+                continue
+
+            now = loop.time()
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                self._hedges_fired += 1
+                pending.add(launch())
+            elif deadline_at is not None and now >= deadline_at:
+                self._deadlines_exceeded += 1
+                raise DeadlineExceeded(f"{self.name}: sin respuesta tras {deadline}s")
+
+        raise error
+
+    def stats(self) -> Dict:
+        delay = self.hedge_delay()
+        return {
+            "calls": self._calls,
+            "hedges_fired": self._hedges_fired,
+            "hedges_won": self._hedges_won,
+            "deadlines_exceeded": self._deadlines_exceeded,
+            "hedge_delay_seconds": round(delay, 3) if delay is not None else None,
+            "samples": len(self.latencies),
+        }
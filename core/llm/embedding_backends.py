@@ -0,0 +1,63 @@
+import fcntl
+import re
+from pathlib import Path
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+# - torch: modelo original en PyTorch fp32
+# - onnx: el mismo modelo exportado a ONNX Runtime
+# - onnx_int8: ONNX con cuantización dinámica int8 (exportado una vez a export_dir)
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx_int8")
+
+
+def build_embeddings(
+    model_name: str,
+    backend: str = "torch",
+    export_dir: str = ".embedding_models",
+    quantization: str = "avx2"
+) -> HuggingFaceEmbeddings:
+    """
+    Embeddings locales con el backend indicado.
+
+    Los vectores de onnx/onnx_int8 no son idénticos a los de torch: antes de
+    cambiar de backend con un corpus ya ingerido, medir la deriva con
+    scripts/embedding_parity.py.
+    """
+    if backend == "torch":
+        return HuggingFaceEmbeddings(model_name=model_name)
+    if backend == "onnx":
+        return HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"backend": "onnx"})
+    if backend == "onnx_int8":
+        model_dir, file_name = export_quantized_onnx(model_name, export_dir, quantization)
+        return HuggingFaceEmbeddings(
+            model_name=str(model_dir),
+            model_kwargs={"backend": "onnx", "model_kwargs": {"file_name": file_name}},
+        )
+    raise ValueError(f"Backend de embeddings desconocido: {backend} ({'|'.join(EMBEDDING_BACKENDS)})")
+
+
+def export_quantized_onnx(model_name: str, export_dir: str, quantization: str = "avx2") -> tuple[Path, str]:
+    """
+    Exporta el modelo a ONNX con cuantización dinámica int8 (solo la primera vez).
+
+    `quantization` es la configuración de sentence-transformers según la CPU:
+    arm64, avx2, avx512 o avx512_vnni. Devuelve (directorio del modelo, fichero ONNX).
+    Varios workers de uvicorn pueden arrancar a la vez: la exportación va bajo flock.
+    """
+    model_dir = Path(export_dir) / re.sub(r"[^\w.-]+", "__", model_name)
+    file_name = f"onnx/model_qint8_{quantization}.onnx"
+    if (model_dir / file_name).exists():
+        return model_dir, file_name
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    with open(model_dir / ".export.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)  # se libera al cerrar el fichero
+        if not (model_dir / file_name).exists():
+            # Importar aquí: solo hace falta para exportar
+            from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+            model = SentenceTransformer(model_name, backend="onnx")
+            model.save_pretrained(str(model_dir))
+            export_dynamic_quantized_onnx_model(model, quantization, str(model_dir))
+
+    return model_dir, file_name
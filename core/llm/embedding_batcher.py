@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher(Embeddings):
+    """
+    Micro-batching de embed_query entre peticiones concurrentes.
+
+    Cada llamada deja su texto en una cola y espera su future; un hilo propio
+    junta lo que llega en `window` segundos (o hasta `max_batch` textos) y hace
+    UNA pasada del modelo con embed_documents en lugar de muchas de tamaño 1
+    peleándose por los núcleos de la CPU.
+
+    embed_documents se usa también para las consultas: con HuggingFaceEmbeddings
+    ambas codifican igual salvo que se configuren query_encode_kwargs.
+
+    Los futures cancelados antes de procesar su lote (p. ej. la tarea que
+    esperaba aembed_query) se descartan sin calcular su texto.
+    """
+
+    def __init__(self, embeddings: Embeddings, window: float = 0.005, max_batch: int = 32):
+        self.embeddings = embeddings
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Los documentos ya llegan en lote (ingest_pdf)
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def submit(self, text: str) -> Future:
+        """Encola el texto; el future se resuelve con su vector al procesar el lote"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # La ventana empieza con el primer texto: latencia añadida acotada a `window`
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._flush(batch)
+            except Exception as e:
+                # El hilo es único: un fallo inesperado no puede dejar sin servicio
+                # a todas las consultas siguientes ni colgadas las de este lote
+                logger.exception("Fallo al procesar un lote de %s embeddings", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _flush(self, batch: List[tuple]):
+        # Los cancelados se descartan; los demás pasan a "running" y ya no se
+        # pueden cancelar, así que set_result/set_exception no fallan
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        # Textos repetidos dentro del lote se calculan una vez
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._max_seen = max(self._max_seen, len(batch))
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "window_ms": round(self.window * 1000, 1),
+                "max_batch": self.max_batch,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "max_batch_seen": self._max_seen,
+                "queued": self._queue.qsize(),
+            }
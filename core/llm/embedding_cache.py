@@ -0,0 +1,169 @@
+import fcntl
+import json
+import os
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from shared.utils.cache import MISSING, TTLCache
+from shared.utils.singleflight import SingleFlight
+
+
+def canonical_query(text: str) -> str:
+    """Forma canónica de una consulta (Unicode NFC y espacios colapsados): es la clave de la caché"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class DiskEmbeddingStore:
+    """
+    Nivel persistente de la caché de embeddings de consultas.
+
+    - vectors.f32: vectores float32, una fila por consulta, mapeados en memoria
+    - index.json: modelo, dimensión y consulta -> fila
+
+    Lo comparten los workers de uvicorn: las escrituras van bajo flock, el vector
+    se escribe antes que el índice y el índice se reemplaza de forma atómica, así
+    nunca apunta a una fila a medio escribir. El fichero de vectores solo crece
+    (truncarlo con otro proceso mapeándolo daría SIGBUS). Si cambia el modelo
+    de embeddings el índice se descarta y las filas se reutilizan.
+    """
+
+    _GROW_ROWS = 1024
+
+    def __init__(self, directory: str, model: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self._vectors_path = self.directory / "vectors.f32"
+        self._index_path = self.directory / "index.json"
+        self._lock_path = self.directory / ".lock"
+        self._vectors_path.touch(exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._dim = 0
+        self._rows: Dict[str, int] = {}
+        self._mmap: Optional[np.memmap] = None
+
+        index = self._read_index()
+        if index is not None:
+            self._dim, self._rows = index["dim"], index["rows"]
+
+    def _read_index(self) -> Optional[Dict]:
+        try:
+            index = json.loads(self._index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        return index if index.get("model") == self.model else None
+
+    def _vectors(self, rows: int) -> np.memmap:
+        """Mapa del fichero de vectores que cubre al menos `rows` filas"""
+        mmap = self._mmap
+        if mmap is None or mmap.shape[0] < rows or mmap.shape[1] != self._dim:
+            capacity = os.path.getsize(self._vectors_path) // (4 * self._dim)
+            mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+            self._mmap = mmap
+        return mmap
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                return None
+            return self._vectors(row + 1)[row].tolist()
+
+    def put(self, key: str, vector: List[float]):
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # se libera al cerrar el fichero
+
+            # Otro worker pudo añadir filas desde que se leyó el índice
+            index = self._read_index()
+            if index is None or index["dim"] != len(vector):
+                index = {"model": self.model, "dim": len(vector), "rows": {}}
+            self._dim, self._rows = index["dim"], index["rows"]
+            if key in self._rows:
+                return
+
+            row = len(self._rows)
+            needed = (row + 1) * self._dim * 4
+            if os.path.getsize(self._vectors_path) < needed:
+                os.truncate(self._vectors_path, needed + self._GROW_ROWS * self._dim * 4)
+
+            vectors = self._vectors(row + 1)
+            vectors[row] = vector
+            vectors.flush()
+
+            self._rows[key] = row
+            tmp = self._index_path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(index, ensure_ascii=False))
+            os.replace(tmp, self._index_path)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings con caché de consultas delante del modelo local.
+
+    Las consultas de get_stoic_context salen de un espacio pequeño (valores de
+    enums del quiz), así que casi todas se repiten: embed_query se sirve de una
+    LRU en memoria y, si se indica `directory`, de un nivel en disco que
+    sobrevive a los reinicios. Los documentos (ingest_pdf) van directos al modelo.
+    """
+
+    def __init__(self, embeddings: Embeddings, maxsize: int, directory: Optional[str] = None, model_name: str = ""):
+        self.embeddings = embeddings
+        # Sin TTL: el embedding de una consulta solo cambia con el modelo
+        self.memory = TTLCache(maxsize=maxsize, ttl=float("inf"))
+        self.disk = DiskEmbeddingStore(directory, model_name) if directory else None
+        self._lookups = SingleFlight()
+
+        self._lock = threading.Lock()
+        self._disk_hits = 0
+        self._computed = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = canonical_query(text)
+        vector = self.memory.get(key)
+        if vector is not MISSING:
+            return vector
+        # Varios hilos con la misma consulta fría: un solo cálculo
+        return self._lookups.do(key, self._load, key)
+
+    def _load(self, key: str) -> List[float]:
+        vector = self.disk.get(key) if self.disk is not None else None
+        if vector is not None:
+            with self._lock:
+                self._disk_hits += 1
+        else:
+            vector = self.embeddings.embed_query(key)
+            with self._lock:
+                self._computed += 1
+            if self.disk is not None:
+                self.disk.put(key, vector)
+
+        self.memory.set(key, vector)
+        return vector
+
+    def stats(self) -> Dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        with self._lock:
+            disk_hits, computed = self._disk_hits, self._computed
+        return {
+            "lookups": lookups,
+            "memory_hits": memory["hits"],
+            "disk_hits": disk_hits,
+            "computed": computed,
+            # Aciertos de cualquier nivel (incluye las esperas coalescidas)
+            "hit_ratio": round((lookups - computed) / lookups, 4) if lookups else 0.0,
+            "memory": memory,
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+        }
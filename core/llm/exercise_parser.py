@@ -0,0 +1,143 @@
+import json
+import re
+import threading
+from typing import Dict, Tuple
+
+from schemas.exercise_schema import Exercise
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.S)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+# Clave sin valor al final de una respuesta truncada: ..., "source"
+_DANGLING_KEY = re.compile(r'([,{])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+
+
+class ExerciseParseError(ValueError):
+    """La respuesta del modelo no contiene un ejercicio válido ni reparable"""
+
+
+class ExerciseParser:
+    """
+    Extrae y valida el JSON de un ejercicio a partir de la respuesta del modelo.
+
+    Repara defectos de formato (bloques ```json, texto antes o después del
+    objeto y comas finales) y las llaves sin cerrar de una respuesta truncada
+    entre valores, y valida el resultado contra schemas.exercise_schema.Exercise,
+    que decide si lo reparado es un ejercicio completo. Un corte a mitad de un
+    string no se completa: es inválido y se re-pide.
+
+    Los contadores permiten seguir las tasas de reparación y de reintento.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parsed = 0
+        self._repaired = 0
+        self._invalid = 0
+        self._retries = 0
+        self._exhausted = 0
+
+    def parse(self, raw: str) -> Dict:
+        """Devuelve el ejercicio validado como dict o lanza ExerciseParseError"""
+        try:
+            text, repaired = self.extract_json(raw)
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError:
+                data = json.loads(_TRAILING_COMMA.sub(r"\1", text))
+                repaired = True
+
+            if not isinstance(data, dict):
+                raise ExerciseParseError("La respuesta no es un objeto JSON")
+
+            exercise = Exercise.model_validate(data).model_dump()
+        except ValueError as e:
+            # Incluye JSONDecodeError y la ValidationError de pydantic
+            with self._lock:
+                self._invalid += 1
+            if isinstance(e, ExerciseParseError):
+                raise
+            raise ExerciseParseError(f"Ejercicio inválido: {e}") from e
+
+        with self._lock:
+            self._parsed += 1
+            if repaired:
+                self._repaired += 1
+        return exercise
+
+    @staticmethod
+    def extract_json(raw: str) -> Tuple[str, bool]:
+        """Aísla el primer objeto JSON de la respuesta; indica si hubo que repararla"""
+        text = (raw or "").strip()
+        repaired = False
+
+        if "```" in text:
+            text = _FENCE.search(text).group(1).strip()
+            repaired = True
+
+        start = text.find("{")
+        if start == -1:
+            raise ExerciseParseError("La respuesta no contiene un objeto JSON")
+        if start > 0:
+            repaired = True
+
+        closers = []
+        in_string = False
+        escape = False
+        for pos in range(start, len(text)):
+            ch = text[pos]
+            if in_string:
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                closers.append("}")
+            elif ch == "[":
+                closers.append("]")
+            elif ch in "}]" and closers:
+                closers.pop()
+                if not closers:
+                    # Objeto completo: se descarta el texto que venga después
+                    end = pos + 1
+                    return text[start:end], repaired or bool(text[end:].strip())
+
+        if in_string:
+            # Cerrarlo daría por bueno un texto cortado a mitad de frase
+            raise ExerciseParseError("Respuesta truncada a mitad de un string")
+
+        # Corte entre valores: se descarta la clave sin valor y se cierran los
+        # contenedores abiertos; la validación del schema decide si basta
+        text = text[start:].rstrip()
+        if closers[-1] == "}":
+            text = _DANGLING_KEY.sub(r"\1", text)
+        text = text.rstrip().rstrip(",")
+        return text + "".join(reversed(closers)), True
+
+    def record_retry(self):
+        with self._lock:
+            self._retries += 1
+
+    def record_exhausted(self):
+        with self._lock:
+            self._exhausted += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            attempts = self._parsed + self._invalid
+            return {
+                "parsed": self._parsed,
+                "repaired": self._repaired,
+                "invalid": self._invalid,
+                "retries": self._retries,
+                "exhausted": self._exhausted,
+                "repair_rate": round(self._repaired / self._parsed, 4) if self._parsed else 0.0,
+                "retry_rate": round(self._retries / attempts, 4) if attempts else 0.0,
+            }
+
+
+# Singleton global
+exercise_parser = ExerciseParser()
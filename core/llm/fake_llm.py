@@ -0,0 +1,104 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+from typing import Dict, Tuple
+
+from schemas.exercise_schema import ExerciseBatch
+
+FAKE_CONTEXT = (
+    "De las cosas existentes, unas dependen de nosotros y otras no dependen de nosotros. "
+    "Dependen de nosotros el juicio, el impulso, el deseo y la aversión."
+)
+FAKE_SOURCE = "Enchiridion (fake)"
+
+_EXERCISE_NUMBER = re.compile(r"#(\d+)")
+_BATCH_SIZE = re.compile(r"Genera (\d+) ejercicios")
+
+
+class FakeChatModel:
+    """
+    Sustituto local de ChatOpenAI para ejecutar la generación sin red ni coste
+    (pregenerate.py --fake-llm). Responde ejercicios JSON válidos tras `latency`
+    segundos e imita usage_metadata, astream y with_structured_output.
+    """
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+
+    @staticmethod
+    def _text(prompt) -> str:
+        if isinstance(prompt, str):
+            return prompt
+        return "\n".join(getattr(message, "content", str(message)) for message in prompt)
+
+    @staticmethod
+    def _exercise(number: int) -> Dict:
+        return {
+            "name": f"Ejercicio de prueba {number}",
+            "level": "principiante",
+            "objective": "Distinguir lo que depende de ti",
+            "instructions": "Anota tres situaciones del día y separa lo controlable de lo que no.",
+            "duration": "1 día",
+            "reflection": "¿Qué parte de tu inquietud dependía realmente de ti?",
+            "source": f"De {FAKE_SOURCE} - Epicteto, I",
+        }
+
+    def _message(self, prompt, content: str) -> SimpleNamespace:
+        self.calls += 1
+        usage = {
+            "input_tokens": len(self._text(prompt)) // 4,
+            "output_tokens": len(content) // 4,
+        }
+        return SimpleNamespace(content=content, usage_metadata=usage)
+
+    def _single(self, prompt) -> str:
+        match = _EXERCISE_NUMBER.search(self._text(prompt))
+        return json.dumps(self._exercise(int(match.group(1)) if match else 1), ensure_ascii=False)
+
+    def invoke(self, prompt):
+        return self._message(prompt, self._single(prompt))
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        return self._message(prompt, self._single(prompt))
+
+    async def astream(self, prompt):
+        content = self._single(prompt)
+        await asyncio.sleep(self.latency)
+        self.calls += 1
+        for start in range(0, len(content), 16):
+            yield SimpleNamespace(content=content[start:start + 16])
+
+    def with_structured_output(self, schema, include_raw: bool = False):
+        return _FakeStructuredModel(self, include_raw)
+
+
+class _FakeStructuredModel:
+    def __init__(self, llm: FakeChatModel, include_raw: bool):
+        self.llm = llm
+        self.include_raw = include_raw
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.llm.latency)
+        match = _BATCH_SIZE.search(FakeChatModel._text(prompt))
+        total = int(match.group(1)) if match else 5
+        data = {"exercises": [FakeChatModel._exercise(n) for n in range(1, total + 1)]}
+
+        parsed = ExerciseBatch.model_validate(data)
+        if not self.include_raw:
+            self.llm.calls += 1
+            return parsed
+        raw = self.llm._message(prompt, json.dumps(data, ensure_ascii=False))
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+
+def fake_stoic_context(user_profile: Dict, k: int = 5) -> Tuple[str, str]:
+    """Sustituto de LlmPipe.get_stoic_context que no necesita pgvector"""
+    return FAKE_CONTEXT, FAKE_SOURCE
+
+
+async def afake_stoic_context(user_profile: Dict, k: int = 5) -> Tuple[str, str]:
+    """Sustituto de LlmPipe.aget_stoic_context (sin MySQL ni pgvector)"""
+    return fake_stoic_context(user_profile, k)
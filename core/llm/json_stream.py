@@ -0,0 +1,172 @@
+import json
+import string
+from typing import List, Optional, Tuple
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class IncrementalJsonParser:
+    """
+    Parser incremental de un objeto JSON plano ({"campo": "texto", ...}) que llega por tokens.
+
+    feed() recibe cada trozo del stream del modelo y devuelve los fragmentos nuevos
+    de cada campo de texto como tuplas (campo, delta, terminado). Ignora lo que haya
+    antes de la primera llave (p. ej. ```json) y no emite valores que no sean strings.
+    """
+
+    def __init__(self):
+        self._state = "start"
+        self._key: List[str] = []
+        self._field: Optional[str] = None
+        self._escape: Optional[str] = None  # secuencia de escape a medio recibir
+        self._high_surrogate: Optional[str] = None
+        self._other_depth = 0
+        self._other_in_string = False
+        self._other_escape = False
+
+    @property
+    def finished(self) -> bool:
+        return self._state == "end"
+
+    def feed(self, text: str) -> List[Tuple[str, str, bool]]:
+        events: List[Tuple[str, str, bool]] = []
+        delta: List[str] = []
+
+        def flush(done: bool):
+            if delta or done:
+                events.append((self._field, "".join(delta), done))
+                delta.clear()
+
+        for ch in text:
+            state = self._state
+
+            if state == "start":
+                if ch == "{":
+                    self._state = "before_key"
+
+            elif state == "before_key":
+                if ch == '"':
+                    self._key = []
+                    self._state = "key"
+                elif ch == "}":
+                    self._state = "end"
+
+            elif state == "key":
+                if self._escape is not None:
+                    self._key.append(_SIMPLE_ESCAPES.get(ch, ch))
+                    self._escape = None
+                elif ch == "\\":
+                    self._escape = ""
+                elif ch == '"':
+                    self._field = "".join(self._key)
+                    self._state = "colon"
+                else:
+                    self._key.append(ch)
+
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "before_value"
+
+            elif state == "before_value":
+                if ch == '"':
+                    self._state = "string"
+                elif not ch.isspace():
+                    self._other_depth = 0
+                    self._other_in_string = False
+                    self._other_escape = False
+                    self._state = "other"
+                    self._consume_other(ch)
+
+            elif state == "string":
+                if self._escape is not None:
+                    decoded = self._consume_escape(ch)
+                    if decoded:
+                        delta.append(decoded)
+                elif ch == "\\":
+                    self._escape = ""
+                elif ch == '"':
+                    delta.append(self._orphan_surrogate())
+                    flush(done=True)
+                    self._state = "before_key"
+                else:
+                    delta.append(self._orphan_surrogate() + ch)
+
+            elif state == "other":
+                self._consume_other(ch)
+
+            elif state == "end":
+                break
+
+        if self._state == "string":
+            flush(done=False)
+
+        return events
+
+    def _consume_escape(self, ch: str) -> str:
+        """Acumula una secuencia de escape; devuelve el texto decodificado cuando está completa"""
+        seq = self._escape + ch
+        if seq[0] != "u":
+            self._escape = None
+            return self._orphan_surrogate() + _SIMPLE_ESCAPES.get(seq, seq)
+
+        if len(seq) < 5:
+            self._escape = seq
+            return ""
+
+        self._escape = None
+        high, self._high_surrogate = self._high_surrogate, None
+        if not all(c in string.hexdigits for c in seq[1:]):
+            # \u mal formado: se emite tal cual en lugar de cortar el stream
+            # (la validación del ejercicio completo decide si sirve)
+            return ("\ufffd" if high else "") + "\\" + seq
+        code = int(seq[1:], 16)
+        if 0xD800 <= code <= 0xDBFF:
+            # Primera mitad de un par sustituto (emojis, etc.): esperar la segunda
+            self._high_surrogate = seq
+            return "\ufffd" if high else ""
+        if high is not None:
+            if 0xDC00 <= code <= 0xDFFF:
+                return json.loads(f'"\\{high}\\{seq}"')
+            # Mitad de un par sin su pareja: carácter de reemplazo
+            return "\ufffd" + chr(code)
+        if 0xDC00 <= code <= 0xDFFF:
+            return "\ufffd"
+        return chr(code)
+
+    def _orphan_surrogate(self) -> str:
+        """Carácter de reemplazo si quedó media pareja sustituta sin su segunda mitad"""
+        if self._high_surrogate is None:
+            return ""
+        self._high_surrogate = None
+        return "\ufffd"
+
+    def _consume_other(self, ch: str):
+        """Salta valores que no son strings (números, listas, objetos) hasta el siguiente campo"""
+        if self._other_in_string:
+            if self._other_escape:
+                self._other_escape = False
+            elif ch == "\\":
+                self._other_escape = True
+            elif ch == '"':
+                self._other_in_string = False
+            return
+
+        if ch == '"':
+            self._other_in_string = True
+        elif ch in "[{":
+            self._other_depth += 1
+        elif ch in "]}" and self._other_depth > 0:
+            self._other_depth -= 1
+        elif self._other_depth == 0 and ch == ",":
+            self._state = "before_key"
+        elif self._other_depth == 0 and ch == "}":
+            self._state = "end"
@@ -1,38 +1,181 @@
-from typing import List, Dict
+from typing import List, Dict, AsyncIterator, Optional
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 import uuid
+import asyncio
+import json
+import logging
+import threading
 
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_postgres import PGVector
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage
 from langchain_openai import ChatOpenAI
 
 from core.enviroment import env
+from core.db.executor import run_in_db_thread
+from core.db.corpus_repository import ArchetypeContextRepository, CorpusRepository
+from core.llm.archetypes import build_search_query
+from core.llm.chunking import split_pdf
+from core.llm.deadlines import DeadlineExceeded, Hedger
+from core.llm.embedding_backends import build_embeddings
+from core.llm.embedding_batcher import EmbeddingBatcher
+from core.llm.embedding_cache import CachedQueryEmbeddings
+from core.llm.retrieval_cache import RetrievalCache
+from core.llm.exercise_parser import ExerciseParseError, exercise_parser
+from core.llm.json_stream import IncrementalJsonParser
+from core.llm.prompts import (
+    FOCUS_AREAS,
+    NO_CONTEXT_SOURCE,
+    build_single_exercise_messages,
+    format_book_context,
+    format_profile_summary,
+)
+from core.llm.scheduler import LlmPriority, LlmScheduler, current_llm_priority
+from schemas.exercise_schema import ExerciseBatch
+from shared.utils.cache import MISSING, TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def _raw_batch_exercises(message) -> List[str]:
+    """JSON de cada ejercicio de una respuesta batch que no validó como ExerciseBatch"""
+    if message is None:
+        return []
+    tool_calls = getattr(message, "tool_calls", None) or []
+    if tool_calls:
+        payload = tool_calls[0].get("args")
+    else:
+        try:
+            payload = json.loads(message.content or "")
+        except (TypeError, ValueError):
+            return []
+
+    exercises = payload.get("exercises") if isinstance(payload, dict) else None
+    if not isinstance(exercises, list):
+        return []
+    return [json.dumps(e, ensure_ascii=False) if isinstance(e, dict) else "" for e in exercises]
+
 
 class LlmPipe:
     def __init__(self):
-        # Embeddings locales
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=env.EMBEDDING_MODEL,
-        )
-
-        # Vector store para textos estoicos
+        # Embeddings y vector store se crean en el primer uso (ver _retrieval_stack):
+        # cargar el modelo y conectar a pgvector no debe ocurrir al importar core.llm
         self.collection_name = "stoic_texts"
-        self.vector_store = PGVector(
-            embeddings=self.embeddings,
-            connection=env.RAG_DB_CONN,
-            collection_name=self.collection_name,
-            use_jsonb=True,
+        self._retrieval_lock = threading.Lock()
+        self._retrieval = None
+
+        # Resultados de get_stoic_context, válidos mientras no cambie la versión del corpus
+        self.corpus = CorpusRepository()
+        self.retrieval_cache = RetrievalCache(
+            maxsize=env.RETRIEVAL_CACHE_SIZE,
+            chunk_maxsize=env.CHUNK_CACHE_SIZE,
+            fetch_chunks=lambda ids: self.vector_store.get_by_ids(ids),
+        )
+        # Versión del corpus por colección: con CORPUS_VERSION_TTL = 0 (por defecto)
+        # se relee de MySQL en cada get_stoic_context; con más, como mucho cada TTL
+        self._corpus_versions = TTLCache(maxsize=16, ttl=env.CORPUS_VERSION_TTL)
+
+        # Contextos precalculados de los perfiles arquetipo (precompute_contexts.py);
+        # se recalculan en segundo plano, de uno en uno, tras cada ingest_pdf
+        self.archetypes = ArchetypeContextRepository()
+        self._archetype_refresh = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archetype-refresh")
+
+        # "per_exercise": una llamada por ejercicio (en paralelo)
+        # "batch": todos los ejercicios en una llamada con salida estructurada
+        self.generation_mode = env.EXERCISE_GENERATION_MODE
+
+        # LLM OpenAI, detrás del scheduler global (límites del proveedor y prioridades)
+        self.scheduler = LlmScheduler(
+            ChatOpenAI(
+                model=env.OPENAI_MODEL,
+                temperature=0.8,  # Aumentada para mayor creatividad y variedad
+                api_key=env.OPENAI_API_KEY,
+            ),
+            requests_per_minute=env.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=env.LLM_TOKENS_PER_MINUTE,
+            max_in_flight=env.LLM_MAX_IN_FLIGHT,
         )
+        self.llm = self.scheduler
 
-        # LLM OpenAI
-        self.llm = ChatOpenAI(
-            model=env.OPENAI_MODEL,
-            temperature=0.8,  # Aumentada para mayor creatividad y variedad
-            api_key=env.OPENAI_API_KEY,
+        # Presupuestos por etapa y hedging de las llamadas de un ejercicio:
+        # la completa (p95 de duración) y el stream (p95 del primer token)
+        self.exercise_hedger = Hedger(
+            "exercise", env.LLM_HEDGE_PERCENTILE, env.LLM_HEDGE_INITIAL_DELAY
         )
+        self.exercise_stream_hedger = Hedger(
+            "exercise_stream", env.LLM_HEDGE_PERCENTILE, env.LLM_HEDGE_INITIAL_DELAY
+        )
+        self.retrieval_fallbacks = 0
+
+    def _retrieval_stack(self) -> SimpleNamespace:
+        """Embeddings, caché de consultas y vector store (se construyen una vez)"""
+        if self._retrieval is not None:
+            return self._retrieval
+        with self._retrieval_lock:
+            if self._retrieval is not None:
+                return self._retrieval
+
+            # Embeddings locales (PyTorch u ONNX Runtime, ver EMBEDDING_BACKEND)
+            embeddings = build_embeddings(
+                env.EMBEDDING_MODEL,
+                env.EMBEDDING_BACKEND,
+                export_dir=env.EMBEDDING_EXPORT_DIR,
+                quantization=env.EMBEDDING_QUANTIZATION,
+            )
+
+            # Los fallos de la caché de muchas peticiones a la vez se calculan en lotes
+            embedding_batcher = EmbeddingBatcher(
+                embeddings,
+                window=env.EMBEDDING_BATCH_WINDOW_MS / 1000,
+                max_batch=env.EMBEDDING_BATCH_MAX_SIZE,
+            )
+
+            # Las consultas de get_stoic_context se repiten mucho: caché de sus embeddings
+            query_embeddings = CachedQueryEmbeddings(
+                embedding_batcher,
+                maxsize=env.QUERY_EMBEDDING_CACHE_SIZE,
+                directory=env.QUERY_EMBEDDING_CACHE_DIR or None,
+                # Los vectores cambian (ligeramente) con el backend: no mezclar en disco
+                model_name=f"{env.EMBEDDING_MODEL}:{env.EMBEDDING_BACKEND}",
+            )
+
+            # Vector store para textos estoicos
+            vector_store = PGVector(
+                embeddings=query_embeddings,
+                connection=env.RAG_DB_CONN,
+                collection_name=self.collection_name,
+                use_jsonb=True,
+            )
+
+            self._retrieval = SimpleNamespace(
+                embeddings=embeddings,
+                embedding_batcher=embedding_batcher,
+                query_embeddings=query_embeddings,
+                vector_store=vector_store,
+            )
+            return self._retrieval
+
+    @property
+    def embeddings(self):
+        return self._retrieval_stack().embeddings
+
+    @property
+    def embedding_batcher(self) -> EmbeddingBatcher:
+        return self._retrieval_stack().embedding_batcher
+
+    @property
+    def query_embeddings(self) -> CachedQueryEmbeddings:
+        return self._retrieval_stack().query_embeddings
+
+    @property
+    def vector_store(self) -> PGVector:
+        return self._retrieval_stack().vector_store
+
+    def warm_up(self):
+        """Carga el modelo de embeddings y conecta a pgvector antes de la primera petición"""
+        self._retrieval_stack()
 
     def ingest_pdf(
         self, 
@@ -48,30 +191,7 @@ class LlmPipe:
         doc_id = document_id or str(uuid.uuid4())
         minio_path = minio_path or f"pdfs/{path.name}"
 
-        loader = PyPDFLoader(str(path))
-        pages: List[Document] = loader.load()
-
-        full_text = "\n\n".join([page.page_content for page in pages])
-
-        # Optimizado para textos filosóficos estoicos
-        # - Chunks más grandes para preservar argumentos completos
-        # - Mayor overlap para mantener contexto filosófico
-        # - Separadores priorizando estructura de párrafos y oraciones
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1200,
-            chunk_overlap=300,
-            separators=[
-                "\n\n\n",  # Secciones grandes
-                "\n\n",    # Párrafos (prioridad alta para textos filosóficos)
-                "\n",      # Líneas
-                ". ",      # Oraciones completas
-                "; ",      # Cláusulas
-                ", ",      # Frases
-                " ",       # Palabras
-                ""         # Caracteres
-            ],
-        )
-        chunks = splitter.split_text(full_text)
+        chunks = split_pdf(path)
 
         documents = []
         for idx, chunk_text in enumerate(chunks):
@@ -89,6 +209,12 @@ class LlmPipe:
 
         self.vector_store.add_documents(documents)
 
+        # Nueva versión del corpus: ningún worker vuelve a servir resultados anteriores
+        version = self.corpus.bump_version(self.collection_name)
+        self._corpus_versions.set(self.collection_name, version)
+        self.retrieval_cache.invalidate()
+        self._archetype_refresh.submit(self._refresh_archetype_contexts_logged)
+
         return {
             "document_id": doc_id,
             "file_name": path.name,
@@ -131,22 +257,384 @@ class LlmPipe:
         resp = self.llm.invoke(prompt)
         return resp.content
 
+    async def agenerate_single_exercise(
+        self,
+        user_profile: Dict,
+        exercise_number: int,
+        total_exercises: int,
+        context_text: str,
+        source_file: str,
+        focus_offset: int = 0
+    ) -> str:
+        """Variante async de generate_single_exercise (no bloquea el event loop)"""
+        prompt = self._build_single_exercise_prompt(
+            user_profile=user_profile,
+            exercise_number=exercise_number,
+            total_exercises=total_exercises,
+            context=context_text,
+            source_file=source_file,
+            focus_offset=focus_offset
+        )
+
+        deadline, hedge = self._exercise_budget()
+        resp = await self.exercise_hedger.run(lambda: self.llm.ainvoke(prompt), deadline, hedge)
+        return resp.content
+
+    def _exercise_budget(self) -> tuple[float | None, bool]:
+        """
+        Presupuesto (segundos) y hedging de la llamada de un ejercicio.
+
+        Solo el tráfico interactivo tiene presupuesto y duplicados: en segundo
+        plano nadie espera (el límite es REFILL_JOB_TIMEOUT) y el duplicado solo
+        gastaría cupo. Tampoco se duplica si el scheduler ya tiene cola: el
+        duplicado esperaría turno igual que el original.
+        """
+        if current_llm_priority() != LlmPriority.INTERACTIVE:
+            return None, False
+        deadline = env.EXERCISE_DEADLINE or None
+        return deadline, self.scheduler.queue_depth() == 0
+
+    async def aparse_exercise(
+        self,
+        raw: str,
+        exercise_number: int,
+        user_profile: Dict,
+        total_exercises: int,
+        context_text: str,
+        source_file: str,
+        focus_offset: int = 0
+    ) -> Dict:
+        """
+        Valida la respuesta de un ejercicio (reparando defectos de formato).
+
+        Si no es válida (o no llegó dentro de su presupuesto: raw vacío) vuelve
+        a pedir SOLO ese ejercicio, hasta EXERCISE_PARSE_MAX_RETRIES veces;
+        después lanza ExerciseParseError.
+        """
+        for attempt in range(env.EXERCISE_PARSE_MAX_RETRIES + 1):
+            try:
+                return exercise_parser.parse(raw)
+            except ExerciseParseError:
+                if attempt == env.EXERCISE_PARSE_MAX_RETRIES:
+                    exercise_parser.record_exhausted()
+                    raise
+
+            exercise_parser.record_retry()
+            try:
+                raw = await self.agenerate_single_exercise(
+                    user_profile, exercise_number, total_exercises, context_text, source_file, focus_offset
+                )
+            except DeadlineExceeded as e:
+                logger.warning("Ejercicio %s sin respuesta a tiempo: %s", exercise_number, e)
+                raw = ""
+            except Exception:
+                # Solo falla este ejercicio (ExerciseParseError al agotar reintentos)
+                logger.exception("Fallo al re-pedir el ejercicio %s", exercise_number)
+                raw = ""
+
+    async def agenerate_exercises(
+        self,
+        user_profile: Dict,
+        total_exercises: int,
+        context_text: str,
+        source_file: str,
+        focus_offset: int = 0,
+        max_concurrency: int | None = None
+    ) -> AsyncIterator[tuple[int, str]]:
+        """
+        Genera los N ejercicios en paralelo (como mucho max_concurrency a la vez).
+
+        Produce tuplas (exercise_number, respuesta) en orden de finalización,
+        así cada ejercicio puede enviarse en cuanto está listo.
+        """
+        if self.generation_mode == "batch":
+            async for item in self._agenerate_batch_items(
+                user_profile, total_exercises, context_text, source_file, focus_offset
+            ):
+                yield item
+            return
+
+        semaphore = asyncio.Semaphore(max_concurrency or env.LLM_MAX_CONCURRENCY)
+
+        async def generate(exercise_number: int) -> tuple[int, str]:
+            async with semaphore:
+                try:
+                    raw = await self.agenerate_single_exercise(
+                        user_profile=user_profile,
+                        exercise_number=exercise_number,
+                        total_exercises=total_exercises,
+                        context_text=context_text,
+                        source_file=source_file,
+                        focus_offset=focus_offset
+                    )
+                except DeadlineExceeded as e:
+                    # Con la respuesta vacía aparse_exercise lo re-pide; los demás no esperan
+                    logger.warning("Ejercicio %s sin respuesta a tiempo: %s", exercise_number, e)
+                    raw = ""
+                return exercise_number, raw
+
+        tasks = [asyncio.ensure_future(generate(i)) for i in range(1, total_exercises + 1)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Si el cliente se desconecta o falla un ejercicio, no dejar llamadas huérfanas
+            for task in tasks:
+                task.cancel()
+
+    async def astream_single_exercise(
+        self,
+        user_profile: Dict,
+        exercise_number: int,
+        total_exercises: int,
+        context_text: str,
+        source_file: str,
+        focus_offset: int = 0
+    ) -> AsyncIterator[str]:
+        """Genera UN ejercicio produciendo el texto del modelo token a token"""
+        prompt = self._build_single_exercise_prompt(
+            user_profile=user_profile,
+            exercise_number=exercise_number,
+            total_exercises=total_exercises,
+            context=context_text,
+            source_file=source_file,
+            focus_offset=focus_offset
+        )
+
+        deadline, hedge = self._exercise_budget()
+        async for chunk in self.exercise_stream_hedger.stream(lambda: self.llm.astream(prompt), deadline, hedge):
+            if chunk.content:
+                yield chunk.content
+
+    async def astream_exercises(
+        self,
+        user_profile: Dict,
+        total_exercises: int,
+        context_text: str,
+        source_file: str,
+        focus_offset: int = 0,
+        max_concurrency: int | None = None
+    ) -> AsyncIterator[tuple[int, str, object]]:
+        """
+        Variante en streaming de agenerate_exercises.
+
+        Produce tuplas (exercise_number, tipo, datos) a medida que llegan tokens:
+        - ("delta", {"field", "delta", "done"}): texto nuevo de un campo del JSON
+        - ("done", respuesta): respuesta completa del ejercicio
+        """
+        if self.generation_mode == "batch":
+            # Una sola llamada estructurada: no hay tokens por ejercicio que reenviar
+            async for exercise_number, raw in self._agenerate_batch_items(
+                user_profile, total_exercises, context_text, source_file, focus_offset
+            ):
+                yield exercise_number, "done", raw
+            return
+
+        semaphore = asyncio.Semaphore(max_concurrency or env.LLM_MAX_CONCURRENCY)
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def stream(exercise_number: int):
+            try:
+                async with semaphore:
+                    parser = IncrementalJsonParser()
+                    parts = []
+                    async for text in self.astream_single_exercise(
+                        user_profile=user_profile,
+                        exercise_number=exercise_number,
+                        total_exercises=total_exercises,
+                        context_text=context_text,
+                        source_file=source_file,
+                        focus_offset=focus_offset
+                    ):
+                        parts.append(text)
+                        for field, delta, done in parser.feed(text):
+                            await queue.put((exercise_number, "delta", {"field": field, "delta": delta, "done": done}))
+                    await queue.put((exercise_number, "done", "".join(parts)))
+            except DeadlineExceeded as e:
+                # Respuesta vacía: aparse_exercise re-pide el ejercicio (sin streaming)
+                logger.warning("Ejercicio %s sin terminar a tiempo: %s", exercise_number, e)
+                await queue.put((exercise_number, "done", ""))
+            except Exception:
+                # Un fallo de este ejercicio no corta el stream del resto: respuesta
+                # vacía, se re-pide y, si se agotan los reintentos, exercise_failed
+                logger.exception("Fallo en el stream del ejercicio %s", exercise_number)
+                await queue.put((exercise_number, "done", ""))
+
+        tasks = [asyncio.ensure_future(stream(i)) for i in range(1, total_exercises + 1)]
+        try:
+            remaining = total_exercises
+            while remaining:
+                exercise_number, kind, payload = await queue.get()
+                if kind == "done":
+                    remaining -= 1
+                yield exercise_number, kind, payload
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def agenerate_exercise_batch(
+        self,
+        user_profile: Dict,
+        total_exercises: int,
+        context_text: str,
+        source_file: str,
+        focus_offset: int = 0
+    ) -> List[str]:
+        """
+        Genera los N ejercicios en UNA llamada con salida estructurada
+        validada contra schemas.exercise_schema.Exercise.
+
+        El contexto RAG y las instrucciones se envían una sola vez en lugar de N.
+        Devuelve el JSON de cada ejercicio. Si el lote no valida entero, cada
+        ejercicio se devuelve crudo (o vacío si falta o la llamada falló) para
+        que aparse_exercise re-pida solo los que no sirvan.
+        """
+        try:
+            result = await self._ainvoke_exercise_batch(
+                user_profile, total_exercises, context_text, source_file, focus_offset
+            )
+        except Exception:
+            logger.exception("Fallo en la llamada batch; se generan los ejercicios uno a uno")
+            return [""] * total_exercises
+
+        if not result.get("parsing_error") and result.get("parsed") is not None:
+            exercises = [
+                json.dumps(exercise.model_dump(), ensure_ascii=False)
+                for exercise in result["parsed"].exercises[:total_exercises]
+            ]
+        else:
+            logger.warning("Respuesta batch inválida, se validan los ejercicios uno a uno: %s", result.get("parsing_error"))
+            exercises = _raw_batch_exercises(result.get("raw"))[:total_exercises]
+
+        return exercises + [""] * (total_exercises - len(exercises))
+
+    async def _ainvoke_exercise_batch(
+        self,
+        user_profile: Dict,
+        total_exercises: int,
+        context_text: str,
+        source_file: str,
+        focus_offset: int = 0
+    ) -> Dict:
+        """Llamada batch cruda: dict con raw (AIMessage, incluye usage_metadata), parsed y parsing_error"""
+        prompt = self._build_exercise_batch_prompt(
+            user_profile=user_profile,
+            context=context_text,
+            source_file=source_file,
+            total_exercises=total_exercises,
+            focus_offset=focus_offset
+        )
+        structured_llm = self.llm.with_structured_output(ExerciseBatch, include_raw=True)
+        return await structured_llm.ainvoke(prompt)
+
+    async def _agenerate_batch_items(
+        self,
+        user_profile: Dict,
+        total_exercises: int,
+        context_text: str,
+        source_file: str,
+        focus_offset: int = 0
+    ) -> AsyncIterator[tuple[int, str]]:
+        """Adapta el modo batch a la interfaz (exercise_number, respuesta JSON) del modo por ejercicio"""
+        exercises = await self.agenerate_exercise_batch(
+            user_profile, total_exercises, context_text, source_file, focus_offset
+        )
+        for exercise_number, raw in enumerate(exercises, 1):
+            yield exercise_number, raw
+
     def get_stoic_context(self, user_profile: Dict, k: int = 5) -> tuple[str, str]:
         """
         Obtiene el contexto de textos estoicos una sola vez para todas las recomendaciones.
 
+        Los perfiles iguales recuperan los mismos chunks: el resultado se cachea
+        (ver RetrievalCache) hasta que ingest_pdf cambia la versión del corpus.
+
         Returns:
             Tuple de (context_text, source_file)
         """
         search_query = self._build_search_query(user_profile)
 
+        # La versión se lee ANTES de buscar: un resultado calculado mientras se
+        # ingería queda guardado con la versión anterior y no llega a servirse
+        corpus_version = self._corpus_version()
+        return (
+            self._cached_context(search_query, k, corpus_version)
+            or self._precomputed_context(
+                search_query, k, corpus_version,
+                self.archetypes.get_context(self.collection_name, search_query, k),
+            )
+            or self._searched_context(search_query, k, corpus_version)
+        )
+
+    async def _aget_stoic_context(self, user_profile: Dict, k: int) -> tuple[str, str]:
+        """
+        Mismos pasos que get_stoic_context, pero las lecturas de MySQL van por el
+        executor de la BD (esperan un slot del pool en el event loop, ver db_slot)
+        y la caché y pgvector por el pool de hilos por defecto
+        """
+        search_query = self._build_search_query(user_profile)
+
+        corpus_version = self._corpus_versions.get(self.collection_name)
+        if corpus_version is MISSING:
+            corpus_version = await run_in_db_thread(self._corpus_version)
+
+        context = await asyncio.to_thread(self._cached_context, search_query, k, corpus_version)
+        if context is None:
+            precomputed = await run_in_db_thread(
+                self.archetypes.get_context, self.collection_name, search_query, k
+            )
+            context = self._precomputed_context(search_query, k, corpus_version, precomputed)
+        if context is None:
+            context = await asyncio.to_thread(self._searched_context, search_query, k, corpus_version)
+        return context
+
+    def _cached_context(self, search_query: str, k: int, corpus_version: int) -> Optional[tuple[str, str]]:
+        """Resultado de la caché en memoria (puede releer de pgvector chunks expulsados)"""
+        cached = self.retrieval_cache.get(search_query, k, corpus_version)
+        if cached is None:
+            return None
+        texts, source_file = cached
+        return ("\n\n".join(texts), source_file)
+
+    def _precomputed_context(
+        self,
+        search_query: str,
+        k: int,
+        corpus_version: int,
+        precomputed: Optional[Dict]
+    ) -> Optional[tuple[str, str]]:
+        """
+        Arquetipo precalculado para la versión actual del corpus (una consulta a
+        MySQL, sin embedding ni búsqueda vectorial); se guarda en la caché en memoria
+        """
+        if precomputed is None:
+            return None
+        self.retrieval_cache.put_context(
+            search_query, k, corpus_version, precomputed["context_text"], precomputed["source_file"]
+        )
+        return (precomputed["context_text"], precomputed["source_file"])
+
+    def _searched_context(self, search_query: str, k: int, corpus_version: int) -> tuple[str, str]:
+        docs, source_file = self._search(search_query, k)
+        self.retrieval_cache.put(search_query, k, corpus_version, docs, source_file)
+        return ("\n\n".join([d.page_content for d in docs]), source_file)
+
+    def _corpus_version(self) -> int:
+        """Versión del corpus de la colección (cacheada si CORPUS_VERSION_TTL > 0)"""
+        version = self._corpus_versions.get(self.collection_name)
+        if version is MISSING:
+            version = self.corpus.get_version(self.collection_name)
+            self._corpus_versions.set(self.collection_name, version)
+        return version
+
+    def _search(self, search_query: str, k: int) -> tuple[List[Document], str]:
+        """Búsqueda vectorial: (chunks, nombre del libro del primero)"""
         retriever = self.vector_store.as_retriever(search_kwargs={"k": k})
         docs = retriever.invoke(search_query)
 
         if not docs:
-            return ("", "principios fundamentales del estoicismo")
+            return docs, NO_CONTEXT_SOURCE
 
-        context_text = "\n\n".join([d.page_content for d in docs])
         source_file = docs[0].metadata.get("file_name", "textos estoicos")
 
         # Limpiar el nombre del archivo: eliminar UUID de MinIO si existe
@@ -154,32 +642,78 @@ class LlmPipe:
         import re
         source_file = re.sub(r'^[a-f0-9\-]{36}_', '', source_file)
 
-        return (context_text, source_file)
+        return docs, source_file
+
+    def precompute_context(self, user_profile: Dict, k: int = 5) -> str:
+        """
+        Recupera el contexto de un perfil arquetipo y lo guarda en la tabla de
+        contextos precalculados con la versión actual del corpus. Devuelve la query.
+        """
+        search_query = self._build_search_query(user_profile)
+        self._precompute_query(search_query, k)
+        return search_query
+
+    def _precompute_query(self, search_query: str, k: int):
+        # Versión leída antes de buscar (mismo criterio que la caché de resultados)
+        corpus_version = self.corpus.get_version(self.collection_name)
+        docs, source_file = self._search(search_query, k)
+        self.archetypes.upsert_context(
+            self.collection_name,
+            search_query,
+            k,
+            corpus_version,
+            "\n\n".join([d.page_content for d in docs]),
+            source_file,
+        )
+
+    def refresh_archetype_contexts(self) -> int:
+        """Recalcula los contextos ya precalculados con la versión actual del corpus"""
+        rows = self.archetypes.list_queries(self.collection_name)
+        for row in rows:
+            self._precompute_query(row["search_query"], row["k"])
+        return len(rows)
+
+    def _refresh_archetype_contexts_logged(self):
+        try:
+            refreshed = self.refresh_archetype_contexts()
+            logger.info("%s contextos precalculados actualizados tras la ingesta", refreshed)
+        except Exception:
+            logger.exception("Error al actualizar los contextos precalculados")
+
+    async def aget_stoic_context(self, user_profile: Dict, k: int = 5) -> tuple[str, str]:
+        """
+        get_stoic_context sin bloquear el event loop y, en el tráfico interactivo,
+        con presupuesto RETRIEVAL_DEADLINE.
+
+        Si la búsqueda no llega a tiempo se genera sin contexto RAG (mismo camino
+        que cuando no hay documentos); la consulta sigue en su hilo y se descarta.
+        """
+        deadline = env.RETRIEVAL_DEADLINE or None
+        if current_llm_priority() != LlmPriority.INTERACTIVE:
+            deadline = None
+
+        search = self._aget_stoic_context(user_profile, k)
+        try:
+            return await asyncio.wait_for(search, timeout=deadline)
+        except asyncio.TimeoutError:
+            self.retrieval_fallbacks += 1
+            logger.warning("Búsqueda RAG sin respuesta tras %ss: generando sin contexto", env.RETRIEVAL_DEADLINE)
+            return ("", NO_CONTEXT_SOURCE)
+
+    def deadline_stats(self) -> Dict:
+        """Duplicados lanzados/ganados y presupuestos agotados por etapa"""
+        return {
+            "exercise": self.exercise_hedger.stats(),
+            "exercise_stream": self.exercise_stream_hedger.stats(),
+            "retrieval": {
+                "deadline_seconds": env.RETRIEVAL_DEADLINE,
+                "fallbacks": self.retrieval_fallbacks,
+            },
+        }
 
     def _build_search_query(self, profile: Dict) -> str:
-        """Construye query optimizada para búsqueda en textos estoicos"""
-        parts = ["estoicismo filosofía"]  # Base para textos estoicos
-
-        # Agregar caminos estoicos de interés
-        if profile.get("stoic_paths"):
-            paths = profile["stoic_paths"]
-            # Convertir enums a valores si es necesario
-            path_values = [p.value if hasattr(p, 'value') else str(p) for p in paths]
-            parts.extend(path_values)
-
-        # Agregar desafíos/prácticas del usuario
-        if profile.get("daily_challenges"):
-            challenges = profile["daily_challenges"]
-            challenge_values = [c.value if hasattr(c, 'value') else str(c) for c in challenges]
-            parts.extend(challenge_values)
-
-        # Nivel de conocimiento estoico
-        if profile.get("stoic_level"):
-            level = profile["stoic_level"]
-            level_value = level.value if hasattr(level, 'value') else str(level)
-            parts.append(level_value)
-
-        return " ".join(parts)
+        """Query RAG del perfil (ver archetypes.build_search_query)"""
+        return build_search_query(profile)
 
     def _build_single_exercise_prompt(
         self,
@@ -189,175 +723,66 @@ class LlmPipe:
         context: str,
         source_file: str,
         focus_offset: int = 0
+    ) -> List[BaseMessage]:
+        """
+        Construye los mensajes para generar UN solo ejercicio estoico práctico (streaming):
+        system estático precompilado + mensaje de usuario con libro, perfil y enfoque
+        """
+        # Usar offset para variar y evitar repeticiones
+        current_focus = FOCUS_AREAS[(exercise_number - 1 + focus_offset) % len(FOCUS_AREAS)]
+
+        return build_single_exercise_messages(
+            user_profile=user_profile,
+            exercise_number=exercise_number,
+            total_exercises=total_exercises,
+            context=context,
+            source_file=source_file,
+            focus=current_focus
+        )
+
+    def _build_exercise_batch_prompt(
+        self,
+        user_profile: Dict,
+        context: str,
+        source_file: str,
+        total_exercises: int = 5,
+        focus_offset: int = 0
     ) -> str:
-        """Construye el prompt para generar UN solo ejercicio estoico práctico (streaming)"""
+        """Construye el prompt para generar los N ejercicios en UNA sola llamada (modo batch)"""
 
-        # Extraer valores de enums si es necesario
         def get_value(item):
             return item.value if hasattr(item, 'value') else str(item)
 
-        age_range = get_value(user_profile.get('age_range', 'adulto'))
-        practice_level = get_value(user_profile.get('practice_level', 'principiante'))
-        practice_freq = get_value(user_profile.get('practice_frequency', 'ocasionalmente'))
         stoic_level = get_value(user_profile.get('stoic_level', 'principiante'))
 
-        # Procesar listas
         stoic_paths = user_profile.get('stoic_paths', [])
         paths_str = ', '.join([get_value(p) for p in stoic_paths]) if stoic_paths else 'No especificados'
 
         daily_challenges = user_profile.get('daily_challenges', [])
         challenges_str = ', '.join([get_value(c) for c in daily_challenges]) if daily_challenges else 'No especificados'
 
-        belief = user_profile.get('belief', 'No especificada')
-        country = user_profile.get('country', '')
-
-        profile_summary = f"""
-PERFIL DEL PRACTICANTE:
-- Rango de edad: {age_range}
-- País: {country}
-- Creencia actual: {belief}
-- Nivel de práctica espiritual: {practice_level} (frecuencia: {practice_freq})
-- Nivel de conocimiento estoico: {stoic_level}
-- Caminos estoicos de interés: {paths_str}
-- Desafíos/prácticas diarias: {challenges_str}
-"""
-
-        # Determinar enfoque basado en el número de ejercicio
-        # Lista ampliada de áreas de enfoque estoico para máxima variedad
-        focus_areas = [
-            # Principios fundamentales
-            "Dicotomía del Control - Distinguir lo que depende de ti",
-            "Virtudes Cardinales - Sabiduría, Coraje, Justicia, Templanza",
-            "Vivir según la Naturaleza - Alineación con el cosmos",
-            "Amor Fati - Aceptación radical del destino",
-            "Memento Mori - Consciencia de la mortalidad",
-
-            # Prácticas de autocontrol
-            "Autocontrol - Gestión de impulsos y deseos",
-            "Indiferencia ante circunstancias externas - Ecuanimidad",
-            "Desapego de resultados - Enfoque en el proceso",
-            "Juicios y percepciones - Observación sin valoración",
-            "Gestión de emociones destructivas - Ira, miedo, ansiedad",
-
-            # Ejercicios espirituales clásicos
-            "Premeditatio Malorum - Visualización negativa",
-            "Examen diario - Revisión de acciones y pensamientos",
-            "Meditación matutina - Preparación para el día",
-            "Contemplación vespertina - Reflexión sobre virtudes",
-            "Vista desde arriba - Perspectiva cósmica",
-
-            # Virtudes específicas
-            "Sabiduría práctica - Phronesis en decisiones diarias",
-            "Coraje moral - Enfrentar adversidades con valor",
-            "Justicia y benevolencia - Trato equitativo hacia otros",
-            "Templanza y moderación - Equilibrio en placeres",
-            "Fortaleza interior - Resiliencia ante dificultades",
-
-            # Relaciones y comunidad
-            "Cosmopolitismo - Ciudadano del mundo",
-            "Empatía y comprensión - Ver desde perspectiva ajena",
-            "Perdón y compasión - Liberación del resentimiento",
-            "Servicio a la comunidad - Bien común sobre interés personal",
-            "Relaciones virtuosas - Amistades basadas en virtud",
-
-            # Desapego y aceptación
-            "Desapego de posesiones - Libertad interior",
-            "Aceptación de cambio e impermanencia - Heráclito",
-            "Simplicidad voluntaria - Reducción de necesidades",
-            "Indiferencia a la fama y reputación - Ego y vanidad",
-            "Aceptación de la muerte - Tranquilidad ante lo inevitable",
-
-            # Razón y logos
-            "Razón como guía - Hegemonikon y facultad gobernante",
-            "Assentimiento consciente - Control de impresiones",
-            "Lógica estoica - Claridad de pensamiento",
-            "Contemplación filosófica - Estudio de la naturaleza",
-            "Coherencia entre pensamientos y acciones - Integridad",
-
-            # Prácticas avanzadas
-            "Atención plena estoica - Prosoche",
-            "Reserva de clausura - Anticipación de obstáculos",
-            "Ejercicio de roles - Padre, hijo, ciudadano",
-            "Gratitud estoica - Apreciar lo presente",
-            "Transformación de adversidad - Obstáculo como oportunidad",
-
-            # Desarrollo del carácter
-            "Progreso moral - Prokope",
-            "Hábitos virtuosos - Construcción de carácter",
-            "Eliminación de vicios - Identificación y corrección",
-            "Coherencia interna - Alineación de valores",
-            "Autosuficiencia - Autarquía estoica",
-
-            # Sabiduría aplicada
-            "Decisiones según naturaleza racional - Kata physin",
-            "Preferibles vs indiferentes - Adiaphora",
-            "Deber apropiado - Kathekonta",
-            "Sabiduría en adversidad - Enseñanzas de Epicteto",
-            "Acción recta - Katorthoma",
-
-            # Perspectiva y contexto
-            "Relatividad del juicio - Opiniones como construcciones",
-            "Zoom out cósmico - Pequeñez en el universo",
-            "Transitoriedad - Todo fluye y cambia",
-            "Interconexión universal - Simpatía cósmica",
-            "Ciclos naturales - Aceptación del ritmo de la vida"
-        ]
+        profile_summary = format_profile_summary(user_profile)
 
-        # Usar offset para variar y evitar repeticiones
-        current_focus = focus_areas[(exercise_number - 1 + focus_offset) % len(focus_areas)]
-
-        # Guía de niveles
-        level_guide = """
-NIVELES ESTOICOS:
-
-📗 PRINCIPIANTE:
-- Ejercicios simples, cortos (1 día)
-- Conceptos básicos: Dicotomía del Control, Observación de emociones
-- Lenguaje claro, motivador y accesible
-- Ejemplos cotidianos modernos
-
-📘 INTERMEDIO:
-- Ejercicios que requieren reflexión diaria (3-7 días)
-- Aplicación en conflictos reales
-- Juicios y percepciones, resiliencia emocional
-- Seguimiento constante
-
-📙 AVANZADO:
-- Prácticas profundas de dominio interior (1-2 semanas)
-- Desapego, virtud, responsabilidad moral
-- Premeditatio malorum, Amor fati
-- Alto nivel de disciplina
-
-📕 MAESTRO:
-- Integración completa del estoicismo (1 mes+)
-- Transformación de carácter profunda
-- Aplicación universal de principios
-- Máximo nivel de exigencia
-"""
+        # Mismo reparto de enfoques que en el modo de un ejercicio por llamada
+        focus_lines = "\n".join(
+            f"{i}. {FOCUS_AREAS[(i - 1 + focus_offset) % len(FOCUS_AREAS)]}"
+            for i in range(1, total_exercises + 1)
+        )
 
         prompt = f"""Eres un maestro creativo que genera EJERCICIOS PRÁCTICOS ÚNICOS y VARIADOS basados en filosofía estoica para ayudar al usuario a desarrollar dominio del temperamento, autocontrol, virtud y claridad mental.
 
-🎯 PRINCIPIO FUNDAMENTAL: VARIEDAD Y CREATIVIDAD
-Cada ejercicio que generes debe ser COMPLETAMENTE DIFERENTE a los demás. No repitas estructuras, nombres, objetivos o enfoques similares. Sé innovador y creativo en cada ejercicio.
-
-{level_guide}
-
 {profile_summary}
 
-CONTENIDO DEL LIBRO "{source_file}":
-{context}
+{format_book_context(context, source_file)}
 
 INSTRUCCIONES:
-Estás generando el ejercicio #{exercise_number} de {total_exercises} para este practicante.
-
-ENFOQUE PARA ESTE EJERCICIO: {current_focus}
-
-⚠️ RECUERDA: Este ejercicio debe ser ÚNICO y DIFERENTE a cualquier otro que hayas generado antes. Varía el enfoque, la estructura, los ejemplos y el estilo.
+Genera {total_exercises} ejercicios para este practicante, uno por cada enfoque y en este orden:
+{focus_lines}
 
-El ejercicio debe:
+Cada ejercicio debe:
 1. Estar DIRECTAMENTE INSPIRADO en el CONTENIDO DEL LIBRO proporcionado arriba
 2. Extraer ideas, principios y enseñanzas específicas del texto
-3. Enfocarse en: {current_focus}
+3. Enfocarse en el enfoque que le corresponde
 4. Ser relevante a los caminos de interés: {paths_str}
 5. Abordar sus desafíos específicos: {challenges_str}
 6. Adaptarse a su nivel: {stoic_level}
@@ -370,201 +795,22 @@ Enfoque por nivel:
 - "avanzado": 1-2 semanas, dominio interior profundo, desapego
 - "maestro": 1 mes+, transformación de carácter, máxima exigencia
 
-FORMATO DE RESPUESTA (JSON con UN solo ejercicio):
-{{
-  "name": "Nombre descriptivo del ejercicio basado en el contenido del libro",
-  "level": "{stoic_level}",
-  "objective": "Objetivo claro y específico conectado con las enseñanzas del texto",
-  "instructions": "Instrucciones paso a paso muy claras y prácticas, inspiradas en las ideas del libro. Sé específico sobre qué hacer, cuándo hacerlo, y cómo aplicarlo en la vida diaria.",
-  "duration": "Duración del ejercicio según el nivel (ej: '1 día', '3 días', '1 semana', '1 mes')",
-  "reflection": "Pregunta de reflexión o autoevaluación relacionada con el ejercicio",
-  "source": "INCLUYE: 1) El nombre del libro fuente '{source_file}', 2) El autor/concepto que aparece en el contenido, 3) Capítulo o sección si está disponible. Formato: 'De [libro] - [autor], [capítulo/concepto]'. Ejemplo: 'De 24 Stoic Spiritual Exercises - Epictetus, Enchiridion IV'"
-}}
-
-TONO Y ESTILO:
-- Directo y práctico
-- Instrucciones claras que cualquiera pueda seguir
-- Conecta las enseñanzas del libro con desafíos modernos
-- Motivador pero realista
-- Enfoque estoico basado en el CONTENIDO REAL del libro
-
-CRÍTICO - MUY IMPORTANTE - VARIEDAD Y CREATIVIDAD:
-- RESPONDE SOLO CON EL JSON, SIN TEXTO ADICIONAL
-- Basa el ejercicio en las IDEAS ESPECÍFICAS del contenido proporcionado
-- Las instrucciones deben ser específicas y accionables
-- La duración debe corresponder al nivel del usuario
-- El ejercicio debe complementar los otros {total_exercises - 1} ejercicios
-
-⚠️ VARIEDAD Y NO REPETICIÓN (CRÍTICO):
-- CADA ejercicio debe ser COMPLETAMENTE ÚNICO y DIFERENTE
-- NO repitas nombres, objetivos o instrucciones similares
-- Varía el enfoque, el formato y la estructura de cada ejercicio
-- Usa diferentes ejemplos, situaciones y contextos
-- Sé CREATIVO: cada ejercicio debe tener su propia personalidad
-- Si generas ejercicios similares, el usuario notará la repetición - EVÍTALO
-- Busca diferentes ángulos del mismo concepto para mantener variedad
+CAMPOS DE CADA EJERCICIO:
+- name: nombre descriptivo basado en el contenido del libro
+- level: "{stoic_level}"
+- objective: objetivo claro y específico conectado con las enseñanzas del texto
+- instructions: instrucciones paso a paso, específicas y accionables (qué hacer, cuándo y cómo)
+- duration: duración según el nivel (ej: '1 día', '3 días', '1 semana', '1 mes')
+- reflection: pregunta de reflexión o autoevaluación
+- source: 'De [libro] - [autor], [capítulo/concepto]', con el libro '{source_file}' y el autor que aparece en el contenido
+
+VARIEDAD (CRÍTICO):
+- Los {total_exercises} ejercicios deben ser COMPLETAMENTE DIFERENTES entre sí: nombres, objetivos, estructura y ejemplos
 - Varía el estilo de las instrucciones (algunas más narrativas, otras más directas)
-- Usa diferentes metáforas, analogías y formas de explicar
-
-FUENTES Y REFERENCIAS:
-- En el campo "source": SIEMPRE incluye el nombre del libro "{source_file}" + el autor/concepto del contenido
-- FORMATO DE SOURCE: "De [nombre_libro] - [autor], [capítulo/concepto]"
-- EXTRAE Y CITA a los autores que aparecen en el contenido del libro para dar VARIEDAD
-- Si el texto menciona autores específicos (Marcus Aurelius, Epictetus, Seneca, u otros), ÚSALOS
-- Si el texto menciona un libro específico o capítulo, inclúyelo después del autor
-- Proporciona referencias DIVERSAS basadas en lo que realmente dice el contenido
-- Varía las citas y referencias entre ejercicios para evitar repetición
-"""
-        return prompt
-
-    def _build_exercise_batch_prompt(
-        self,
-        user_profile: Dict,
-        context: str,
-        source_file: str
-    ) -> str:
-        """Construye el prompt especializado en filosofía estoica (DEPRECATED - usar _build_single_exercise_prompt)"""
-
-        # Extraer valores de enums si es necesario
-        def get_value(item):
-            return item.value if hasattr(item, 'value') else str(item)
-
-        age_range = get_value(user_profile.get('age_range', 'adulto'))
-        practice_level = get_value(user_profile.get('practice_level', 'principiante'))
-        practice_freq = get_value(user_profile.get('practice_frequency', 'ocasionalmente'))
-        stoic_level = get_value(user_profile.get('stoic_level', 'principiante'))
-
-        # Procesar listas
-        stoic_paths = user_profile.get('stoic_paths', [])
-        paths_str = ', '.join([get_value(p) for p in stoic_paths]) if stoic_paths else 'No especificados'
-
-        daily_challenges = user_profile.get('daily_challenges', [])
-        challenges_str = ', '.join([get_value(c) for c in daily_challenges]) if daily_challenges else 'No especificados'
-
-        belief = user_profile.get('belief', 'No especificada')
-        country = user_profile.get('country', '')
-
-        profile_summary = f"""
-PERFIL DEL DISCÍPULO:
-- Rango de edad: {age_range}
-- País: {country}
-- Creencia actual: {belief}
-- Nivel de práctica espiritual: {practice_level} (frecuencia: {practice_freq})
-- Nivel de conocimiento estoico: {stoic_level}
-- Caminos estoicos de interés: {paths_str}
-- Desafíos/prácticas diarias: {challenges_str}
-"""
-
-        num_exercises = user_profile.get('num_exercises', 5)
-
-        prompt = f"""Eres un sabio filósofo estoico, seguidor de las enseñanzas de Marco Aurelio, Epicteto y Séneca.
-
-PRINCIPIOS ESTOICOS FUNDAMENTALES:
-1. Dicotomía del Control: Distinguir entre lo que está en nuestro poder (juicios, deseos, acciones) y lo que no (eventos externos, opiniones ajenas, salud)
-2. Las Cuatro Virtudes Cardinales:
-   - Sabiduría (Sophia): Conocimiento práctico y buen juicio
-   - Coraje (Andreia): Fortaleza para enfrentar adversidades
-   - Justicia (Dikaiosyne): Trato equitativo hacia otros
-   - Templanza (Sophrosyne): Moderación y autocontrol
-3. Vivir según la Naturaleza y la Razón
-4. Amor Fati: Aceptación radical del destino
-5. Memento Mori: Recordatorio de la mortalidad
-6. Premeditatio Malorum: Visualización negativa para prepararse
-
-{profile_summary}
-
-TEXTO ESTOICO "{source_file}":
-{context}
-
-INSTRUCCIONES:
-Como maestro estoico, genera {num_exercises} ejercicios PERSONALIZADOS basados en los textos clásicos y el perfil del discípulo.
-
-Cada ejercicio debe:
-1. Estar fundamentado en el TEXTO ESTOICO proporcionado
-2. Ser relevante a los caminos estoicos de interés del discípulo ({paths_str})
-3. Abordar sus desafíos/prácticas específicas ({challenges_str})
-4. Adaptarse a su nivel de conocimiento estoico ({stoic_level})
-5. Incluir prácticas estoicas concretas
-6. Citar directamente a los maestros estoicos cuando sea posible
-
-Enfoque pedagógico:
-- Para nivel "principiante": Explica conceptos básicos con ejemplos cotidianos modernos
-- Para nivel "intermedio": Profundiza en las virtudes cardinales y su aplicación
-- Para nivel "avanzado": Enfócate en paradojas estoicas y prácticas avanzadas
-- Para nivel "maestro": Analiza matices filosóficos y conexiones profundas
-
-FORMATO DE RESPUESTA (JSON):
-{{
-  "exercises": [
-    {{
-      "title": "Título del ejercicio estoico",
-      "content": "Explicación filosófica detallada conectando el texto clásico con la vida moderna del discípulo. Incluye un ejercicio práctico estoico específico (ej: meditación matutina, examen vespertino, visualización negativa).",
-      "source_reference": "Cita textual del maestro estoico (Marco Aurelio, Epicteto o Séneca) del texto proporcionado",
-      "level": "principiante|intermedio|avanzado|maestro"
-    }}
-  ]
-}}
-
-TONO Y ESTILO:
-- Usa lenguaje filosófico pero accesible, al estilo de los estoicos clásicos
-- Sé directo y sin rodeos, como Epicteto
-- Conecta la sabiduría antigua con desafíos modernos ({challenges_str})
-- Usa metáforas naturales (río, piedra, árbol) cuando sea apropiado
-- Termina cada ejercicio con una práctica concreta aplicable HOY
-
-IMPORTANTE:
-- RESPONDE SOLO CON EL JSON, SIN TEXTO ADICIONAL
-- Cada "content" debe tener mínimo 150 palabras para ser sustancial
-- Las citas en "source_reference" deben ser del texto estoico proporcionado
+- Varía las citas y autores del contenido (Marcus Aurelius, Epictetus, Seneca u otros que aparezcan)
+- Tono directo, práctico, motivador pero realista
 """
         return prompt
 
-    def _generate_without_context(self, user_profile: Dict) -> str:
-        """Fallback con ejercicios estoicos generales (sin RAG)"""
-
-        def get_value(item):
-            return item.value if hasattr(item, 'value') else str(item)
-
-        stoic_level = get_value(user_profile.get('stoic_level', 'principiante'))
-        stoic_paths = user_profile.get('stoic_paths', [])
-        paths_str = ', '.join([get_value(p) for p in stoic_paths]) if stoic_paths else 'las virtudes cardinales'
-
-        num_exercises = user_profile.get('num_exercises', 5)
-
-        prompt = f"""Eres un maestro estoico. No se encontró contenido específico en los textos, pero genera {num_exercises} ejercicios estoicos FUNDAMENTALES.
-
-Nivel del discípulo: {stoic_level}
-Caminos de interés: {paths_str}
-
-Genera ejercicios basados en los PRINCIPIOS CLÁSICOS del estoicismo:
-1. Dicotomía del Control (Epicteto)
-2. Las Cuatro Virtudes Cardinales
-3. Amor Fati (Marco Aurelio)
-4. Memento Mori
-5. Premeditatio Malorum
-
-Cada ejercicio debe incluir:
-- Explicación del principio estoico
-- Práctica concreta
-- Referencia al maestro estoico que lo enseñó
-
-Formato JSON:
-{{
-  "exercises": [
-    {{
-      "title": "Título del principio estoico",
-      "content": "Explicación detallada (mínimo 150 palabras) con ejercicio práctico aplicable hoy",
-      "source_reference": "Principio fundamental del estoicismo (Marco Aurelio/Epicteto/Séneca)",
-      "level": "principiante|intermedio|avanzado|maestro"
-    }}
-  ]
-}}
-
-IMPORTANTE: RESPONDE SOLO CON EL JSON, SIN TEXTO ADICIONAL
-"""
-        resp = self.llm.invoke(prompt)
-        return resp.content
-
 
-# Singleton global
 llm_pipe = LlmPipe()
\ No newline at end of file
@@ -0,0 +1,195 @@
+from typing import Dict, List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+# Áreas de enfoque estoico (lista amplia para máxima variedad);
+# cada ejercicio usa una distinta según su número y el offset del usuario
+FOCUS_AREAS = (
+    # Principios fundamentales
+    "Dicotomía del Control - Distinguir lo que depende de ti",
+    "Virtudes Cardinales - Sabiduría, Coraje, Justicia, Templanza",
+    "Vivir según la Naturaleza - Alineación con el cosmos",
+    "Amor Fati - Aceptación radical del destino",
+    "Memento Mori - Consciencia de la mortalidad",
+
+    # Prácticas de autocontrol
+    "Autocontrol - Gestión de impulsos y deseos",
+    "Indiferencia ante circunstancias externas - Ecuanimidad",
+    "Desapego de resultados - Enfoque en el proceso",
+    "Juicios y percepciones - Observación sin valoración",
+    "Gestión de emociones destructivas - Ira, miedo, ansiedad",
+
+    # Ejercicios espirituales clásicos
+    "Premeditatio Malorum - Visualización negativa",
+    "Examen diario - Revisión de acciones y pensamientos",
+    "Meditación matutina - Preparación para el día",
+    "Contemplación vespertina - Reflexión sobre virtudes",
+    "Vista desde arriba - Perspectiva cósmica",
+
+    # Virtudes específicas
+    "Sabiduría práctica - Phronesis en decisiones diarias",
+    "Coraje moral - Enfrentar adversidades con valor",
+    "Justicia y benevolencia - Trato equitativo hacia otros",
+    "Templanza y moderación - Equilibrio en placeres",
+    "Fortaleza interior - Resiliencia ante dificultades",
+
+    # Relaciones y comunidad
+    "Cosmopolitismo - Ciudadano del mundo",
+    "Empatía y comprensión - Ver desde perspectiva ajena",
+    "Perdón y compasión - Liberación del resentimiento",
+    "Servicio a la comunidad - Bien común sobre interés personal",
+    "Relaciones virtuosas - Amistades basadas en virtud",
+
+    # Desapego y aceptación
+    "Desapego de posesiones - Libertad interior",
+    "Aceptación de cambio e impermanencia - Heráclito",
+    "Simplicidad voluntaria - Reducción de necesidades",
+    "Indiferencia a la fama y reputación - Ego y vanidad",
+    "Aceptación de la muerte - Tranquilidad ante lo inevitable",
+
+    # Razón y logos
+    "Razón como guía - Hegemonikon y facultad gobernante",
+    "Assentimiento consciente - Control de impresiones",
+    "Lógica estoica - Claridad de pensamiento",
+    "Contemplación filosófica - Estudio de la naturaleza",
+    "Coherencia entre pensamientos y acciones - Integridad",
+
+    # Prácticas avanzadas
+    "Atención plena estoica - Prosoche",
+    "Reserva de clausura - Anticipación de obstáculos",
+    "Ejercicio de roles - Padre, hijo, ciudadano",
+    "Gratitud estoica - Apreciar lo presente",
+    "Transformación de adversidad - Obstáculo como oportunidad",
+
+    # Desarrollo del carácter
+    "Progreso moral - Prokope",
+    "Hábitos virtuosos - Construcción de carácter",
+    "Eliminación de vicios - Identificación y corrección",
+    "Coherencia interna - Alineación de valores",
+    "Autosuficiencia - Autarquía estoica",
+
+    # Sabiduría aplicada
+    "Decisiones según naturaleza racional - Kata physin",
+    "Preferibles vs indiferentes - Adiaphora",
+    "Deber apropiado - Kathekonta",
+    "Sabiduría en adversidad - Enseñanzas de Epicteto",
+    "Acción recta - Katorthoma",
+
+    # Perspectiva y contexto
+    "Relatividad del juicio - Opiniones como construcciones",
+    "Zoom out cósmico - Pequeñez en el universo",
+    "Transitoriedad - Todo fluye y cambia",
+    "Interconexión universal - Simpatía cósmica",
+    "Ciclos naturales - Aceptación del ritmo de la vida"
+)
+
+
+# Parte estática del prompt de UN ejercicio: se compila una sola vez al importar
+# y va siempre primero, para que el prefijo sea idéntico entre llamadas y el
+# proveedor pueda aplicar su caché de prefijos.
+SINGLE_EXERCISE_SYSTEM_PROMPT = """Eres un maestro creativo que genera EJERCICIOS PRÁCTICOS ÚNICOS basados en filosofía estoica para desarrollar dominio del temperamento, autocontrol, virtud y claridad mental.
+
+Recibirás el contenido de un libro, el perfil del practicante y el enfoque del ejercicio. El ejercicio debe:
+1. Estar DIRECTAMENTE INSPIRADO en el contenido del libro: extrae ideas, principios y enseñanzas específicas del texto
+2. Centrarse en el enfoque indicado
+3. Ser relevante a los caminos de interés y abordar los desafíos del practicante
+4. Adaptarse a su nivel estoico
+5. Ser aplicable a la vida cotidiana HOY, con instrucciones específicas y accionables
+6. Incluir reflexión o autoevaluación
+
+NIVELES:
+- principiante: simple, 1 día, conceptos básicos (dicotomía del control, observar emociones), lenguaje accesible y ejemplos cotidianos
+- intermedio: 3-7 días de reflexión diaria, aplicación en conflictos reales, juicios y percepciones, resiliencia
+- avanzado: 1-2 semanas de dominio interior, desapego, virtud, premeditatio malorum, amor fati
+- maestro: 1 mes+, transformación profunda del carácter, aplicación universal, máxima exigencia
+
+VARIEDAD (CRÍTICO):
+- Cada ejercicio es uno de varios para el mismo practicante: debe ser COMPLETAMENTE DIFERENTE en nombre, objetivo, estructura y ejemplos
+- Varía el estilo de las instrucciones (algunas más narrativas, otras más directas), las metáforas y las situaciones
+- Busca ángulos distintos del mismo concepto
+
+FUENTES:
+- Cita a los autores que aparecen en el contenido (Marcus Aurelius, Epictetus, Seneca u otros) y el capítulo o concepto si está disponible
+- Formato de "source": "De [nombre_libro] - [autor], [capítulo/concepto]". Ejemplo: "De 24 Stoic Spiritual Exercises - Epictetus, Enchiridion IV"
+
+TONO: directo, práctico, motivador pero realista; conecta el libro con desafíos modernos.
+
+FORMATO: RESPONDE SOLO CON UN OBJETO JSON, SIN TEXTO ADICIONAL:
+{
+  "name": "Nombre descriptivo basado en el contenido del libro",
+  "level": "Nivel del practicante",
+  "objective": "Objetivo claro conectado con las enseñanzas del texto",
+  "instructions": "Instrucciones paso a paso: qué hacer, cuándo y cómo aplicarlo en la vida diaria",
+  "duration": "Duración según el nivel (ej: '1 día', '3 días', '1 semana', '1 mes')",
+  "reflection": "Pregunta de reflexión o autoevaluación",
+  "source": "De [libro] - [autor], [capítulo/concepto]"
+}"""
+
+_SINGLE_EXERCISE_SYSTEM_MESSAGE = SystemMessage(content=SINGLE_EXERCISE_SYSTEM_PROMPT)
+
+# Fuente de los ejercicios generados sin contexto RAG
+NO_CONTEXT_SOURCE = "principios fundamentales del estoicismo"
+
+
+def _value(item) -> str:
+    """Valor de un enum, o el propio dato como texto"""
+    return item.value if hasattr(item, 'value') else str(item)
+
+
+def format_book_context(context: str, source_file: str) -> str:
+    """
+    Bloque con los fragmentos del libro; sin fragmentos (no hay documentos o la
+    búsqueda no llegó a tiempo) se pide un ejercicio sobre los principios clásicos
+    """
+    if context:
+        return f'CONTENIDO DEL LIBRO "{source_file}":\n{context}'
+    return (
+        "CONTENIDO DEL LIBRO: no disponible. Basa el ejercicio en los PRINCIPIOS CLÁSICOS del estoicismo "
+        "(Dicotomía del Control de Epicteto, las Cuatro Virtudes Cardinales, Amor Fati de Marco Aurelio, "
+        "Memento Mori, Premeditatio Malorum) y cita al maestro estoico que lo enseñó.\n"
+        f'Usa "{source_file or NO_CONTEXT_SOURCE}" como libro en "source".'
+    )
+
+
+def format_profile_summary(user_profile: Dict) -> str:
+    """Resumen del perfil del practicante usado en los prompts de generación"""
+    stoic_paths = user_profile.get('stoic_paths', [])
+    daily_challenges = user_profile.get('daily_challenges', [])
+
+    return (
+        "PERFIL DEL PRACTICANTE:\n"
+        f"- Rango de edad: {_value(user_profile.get('age_range', 'adulto'))}\n"
+        f"- País: {user_profile.get('country', '')}\n"
+        f"- Creencia actual: {user_profile.get('belief', 'No especificada')}\n"
+        f"- Nivel de práctica espiritual: {_value(user_profile.get('practice_level', 'principiante'))}"
+        f" (frecuencia: {_value(user_profile.get('practice_frequency', 'ocasionalmente'))})\n"
+        f"- Nivel de conocimiento estoico: {_value(user_profile.get('stoic_level', 'principiante'))}\n"
+        f"- Caminos estoicos de interés: {', '.join(_value(p) for p in stoic_paths) if stoic_paths else 'No especificados'}\n"
+        f"- Desafíos/prácticas diarias: {', '.join(_value(c) for c in daily_challenges) if daily_challenges else 'No especificados'}"
+    )
+
+
+def build_single_exercise_messages(
+    user_profile: Dict,
+    exercise_number: int,
+    total_exercises: int,
+    context: str,
+    source_file: str,
+    focus: str
+) -> List[BaseMessage]:
+    """
+    Mensajes para generar UN ejercicio: el system estático seguido de un mensaje
+    de usuario mínimo.
+
+    Dentro del mensaje de usuario lo compartido por los N ejercicios de una petición
+    (libro y perfil) va antes que lo propio de cada llamada (número y enfoque).
+    """
+    stoic_level = _value(user_profile.get('stoic_level', 'principiante'))
+
+    user_message = (
+        f"{format_book_context(context, source_file)}\n\n"
+        f"{format_profile_summary(user_profile)}\n\n"
+        f"Ejercicio #{exercise_number} de {total_exercises}. Nivel: {stoic_level}.\n"
+        f"ENFOQUE: {focus}"
+    )
+    return [_SINGLE_EXERCISE_SYSTEM_MESSAGE, HumanMessage(content=user_message)]
@@ -0,0 +1,103 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from core.llm.embedding_cache import canonical_query
+from shared.utils.cache import MISSING, TTLCache
+
+
+class RetrievalCache:
+    """
+    Caché de resultados de get_stoic_context: (query, k) -> ids de los chunks.
+
+    Cada entrada guarda la versión del corpus con la que se calculó; si
+    ingest_pdf la ha incrementado desde entonces la entrada no se sirve.
+
+    Para acotar la memoria las entradas solo guardan ids: el texto sale de una
+    caché de chunks compartida por todas (los perfiles parecidos recuperan los
+    mismos chunks). Los chunks expulsados se vuelven a leer por id con
+    `fetch_chunks`, sin repetir la búsqueda vectorial.
+
+    Los contextos precalculados de los arquetipos (ya unidos en un texto) se
+    guardan enteros con put_context.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        chunk_maxsize: int,
+        fetch_chunks: Callable[[List[str]], List[Document]]
+    ):
+        # Sin TTL: la validez la decide la versión del corpus
+        self.results = TTLCache(maxsize=maxsize, ttl=float("inf"))
+        self.chunks = TTLCache(maxsize=chunk_maxsize, ttl=float("inf"))
+        self.fetch_chunks = fetch_chunks
+
+        self._lock = threading.Lock()
+        self._stale = 0
+        self._rehydrated = 0
+
+    @staticmethod
+    def _key(query: str, k: int) -> Tuple[str, int]:
+        return canonical_query(query), k
+
+    def get(self, query: str, k: int, version: int) -> Optional[Tuple[List[str], str]]:
+        """(textos de los chunks en orden, source_file) o None si no hay entrada válida"""
+        key = self._key(query, k)
+        entry = self.results.get(key)
+        if entry is MISSING:
+            return None
+
+        entry_version, chunk_ids, source_file, context_text = entry
+        if entry_version != version:
+            self.results.invalidate(key)
+            with self._lock:
+                self._stale += 1
+            return None
+
+        if context_text is not None:
+            return [context_text], source_file
+        texts = self._texts(chunk_ids)
+        if texts is None:
+            return None
+        return texts, source_file
+
+    def put(self, query: str, k: int, version: int, docs: List[Document], source_file: str):
+        """Guarda el resultado; sin ids (documentos sin persistir) no se cachea"""
+        if any(doc.id is None for doc in docs):
+            return
+        for doc in docs:
+            self.chunks.set(doc.id, doc.page_content)
+        self.results.set(self._key(query, k), (version, [doc.id for doc in docs], source_file, None))
+
+    def put_context(self, query: str, k: int, version: int, context_text: str, source_file: str):
+        """Guarda un contexto ya unido (arquetipo precalculado)"""
+        self.results.set(self._key(query, k), (version, None, source_file, context_text))
+
+    def _texts(self, chunk_ids: Iterable[str]) -> Optional[List[str]]:
+        texts = {chunk_id: self.chunks.get(chunk_id) for chunk_id in chunk_ids}
+        missing = [chunk_id for chunk_id, text in texts.items() if text is MISSING]
+        if missing:
+            for doc in self.fetch_chunks(missing):
+                self.chunks.set(doc.id, doc.page_content)
+                texts[doc.id] = doc.page_content
+            with self._lock:
+                self._rehydrated += len(missing)
+            if any(text is MISSING for text in texts.values()):
+                # Algún chunk ya no existe: repetir la búsqueda
+                return None
+        return [texts[chunk_id] for chunk_id in chunk_ids]
+
+    def invalidate(self):
+        self.results.invalidate()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stale, rehydrated = self._stale, self._rehydrated
+        return {
+            "results": self.results.stats(),
+            "chunks": self.chunks.stats(),
+            "stale": stale,
+            "rehydrated_chunks": rehydrated,
+        }
@@ -0,0 +1,279 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+
+class LlmPriority(IntEnum):
+    """Clases de prioridad del scheduler (menor valor = se atiende antes)"""
+    INTERACTIVE = 0  # SSE: el usuario está esperando
+    BACKGROUND = 1   # reposición, pregeneración
+
+
+_current_priority: ContextVar[LlmPriority] = ContextVar("llm_priority", default=LlmPriority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: LlmPriority):
+    """
+    Prioridad de las llamadas al LLM hechas dentro del bloque.
+
+    Se propaga a las tasks creadas dentro (p. ej. la generación en paralelo).
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_llm_priority() -> LlmPriority:
+    """Prioridad de las llamadas hechas desde el contexto actual"""
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """Cubo de tokens que se rellena a `per_minute` por minuto (0 = sin límite)"""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self._tokens = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos hasta que haya `amount` tokens (0 si ya los hay)"""
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill()
+        # Una petición mayor que el cubo entero se admite con el cubo lleno
+        missing = min(amount, self.capacity) - self._tokens
+        return max(0.0, missing * 60.0 / self.per_minute)
+
+    def consume(self, amount: float):
+        """Descuenta tokens; puede quedar en negativo (deuda) al corregir estimaciones"""
+        if self.per_minute <= 0:
+            return
+        self._refill()
+        self._tokens -= amount
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class LlmScheduler:
+    """
+    Scheduler de todo el proceso delante del chat model de LlmPipe.
+
+    Mantiene la misma interfaz (ainvoke, astream, with_structured_output, invoke)
+    y antes de cada llamada asíncrona espera turno:
+    - cubos de tokens de peticiones/minuto y tokens/minuto del proveedor
+    - como mucho `max_in_flight` llamadas a la vez
+    - por prioridad (interactivo antes que segundo plano) y, dentro de cada
+      clase, por orden de llegada
+
+    Los tokens se estiman antes de la llamada y se corrigen con usage_metadata.
+    queue_depth() permite avisar al cliente cuando hay cola (backpressure).
+    """
+
+    def __init__(
+        self,
+        llm,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_in_flight: int,
+        expected_output_tokens: int = 700
+    ):
+        self.llm = llm
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_in_flight = max_in_flight
+        self.expected_output_tokens = expected_output_tokens
+
+        # Heap de (prioridad, orden de llegada, future, tokens estimados)
+        self._waiters: List[tuple] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Protege cubos y contadores frente a invoke() desde hilos
+        self._lock = threading.Lock()
+
+        self._admitted = {p.name.lower(): 0 for p in LlmPriority}
+        self._queued_total = 0
+        self._wait_seconds = 0.0
+
+    # ---------- interfaz del chat model ----------
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        estimate = self._estimate(prompt)
+        await self._admit(estimate)
+        try:
+            response = await self.llm.ainvoke(prompt, *args, **kwargs)
+        finally:
+            self._release()
+        self._correct(estimate, getattr(response, "usage_metadata", None))
+        return response
+
+    async def astream(self, prompt, *args, **kwargs):
+        estimate = self._estimate(prompt)
+        await self._admit(estimate)
+        usage = None
+        try:
+            async for chunk in self.llm.astream(prompt, *args, **kwargs):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk
+        finally:
+            self._release()
+            self._correct(estimate, usage)
+
+    def with_structured_output(self, *args, **kwargs):
+        return _ScheduledRunnable(self, self.llm.with_structured_output(*args, **kwargs))
+
+    def invoke(self, prompt, *args, **kwargs):
+        """Camino síncrono (fallback sin contexto): no espera turno, pero consume cupo"""
+        estimate = self._estimate(prompt)
+        with self._lock:
+            self.requests.consume(1)
+            self.tokens.consume(estimate)
+        response = self.llm.invoke(prompt, *args, **kwargs)
+        self._correct(estimate, getattr(response, "usage_metadata", None))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    # ---------- admisión ----------
+
+    def _estimate(self, prompt) -> int:
+        if isinstance(prompt, str):
+            chars = len(prompt)
+        else:
+            chars = sum(len(getattr(m, "content", "") or "") for m in prompt)
+        # ~4 caracteres por token en español/inglés
+        return chars // 4 + self.expected_output_tokens
+
+    async def _admit(self, estimate: int):
+        priority = current_llm_priority()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        started = time.monotonic()
+
+        heapq.heappush(self._waiters, (priority, next(self._seq), future, estimate))
+        self._dispatch()
+        if not future.done():
+            self._queued_total += 1
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Concedido justo cuando se canceló: devolver la plaza
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                future.cancel()
+                self._dispatch()
+            raise
+
+        self._wait_seconds += time.monotonic() - started
+        self._admitted[priority.name.lower()] += 1
+
+    def _dispatch(self):
+        """Concede turno a los primeros de la cola mientras haya cupo"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters:
+            priority, _, future, estimate = self._waiters[0]
+            if future.done():
+                # Cancelado mientras esperaba
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self.max_in_flight:
+                return  # _release() volverá a despachar
+
+            with self._lock:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimate))
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(estimate)
+
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _correct(self, estimate: int, usage: Optional[Dict]):
+        """Ajusta el cubo de tokens con el consumo real que informa el proveedor"""
+        if not usage:
+            return
+        real = usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+        with self._lock:
+            self.tokens.consume(real - estimate)
+
+    # ---------- backpressure y métricas ----------
+
+    def queue_depth(self, priority: Optional[LlmPriority] = None) -> int:
+        """Llamadas esperando turno: todas, o las que irían por delante de `priority`"""
+        return sum(
+            1 for p, _, future, _ in self._waiters
+            if not future.done() and (priority is None or p <= priority)
+        )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            requests_available = self.requests.available
+            tokens_available = self.tokens.available
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": {
+                p.name.lower(): sum(1 for q, _, f, _ in self._waiters if q == p and not f.done())
+                for p in LlmPriority
+            },
+            "admitted": dict(self._admitted),
+            "queued_total": self._queued_total,
+            "wait_seconds_total": round(self._wait_seconds, 3),
+            "requests_per_minute": self.requests.per_minute,
+            "requests_available": round(requests_available, 1),
+            "tokens_per_minute": self.tokens.per_minute,
+            "tokens_available": round(tokens_available),
+        }
+
+
+class _ScheduledRunnable:
+    """Runnable (with_structured_output) cuyas llamadas pasan por el scheduler"""
+
+    def __init__(self, scheduler: LlmScheduler, runnable):
+        self.scheduler = scheduler
+        self.runnable = runnable
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        estimate = self.scheduler._estimate(prompt)
+        await self.scheduler._admit(estimate)
+        try:
+            result = await self.runnable.ainvoke(prompt, *args, **kwargs)
+        finally:
+            self.scheduler._release()
+        raw = result.get("raw") if isinstance(result, dict) else None
+        self.scheduler._correct(estimate, getattr(raw, "usage_metadata", None))
+        return result
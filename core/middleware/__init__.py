@@ -1,3 +1,3 @@
-from .jwt_middleware import get_current_user, get_optional_user, verify_token
+from .jwt_middleware import get_current_user, get_optional_user, verify_token, invalidate_cached_user
 
-__all__ = ["get_current_user", "get_optional_user", "verify_token"]
+__all__ = ["get_current_user", "get_optional_user", "verify_token", "invalidate_cached_user"]
@@ -3,47 +3,94 @@ from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from core.enviroment import env
+from core.db.pool import mysql_pool
+from core.db.executor import run_in_db_thread
+from shared.utils.cache import TTLCache, MISSING
+from shared.utils.singleflight import SingleFlight
 import mysql.connector
+import hashlib
+import time
 
 # Security scheme
 security = HTTPBearer()
 
 
+# Payloads de tokens ya verificados, indexados por hash del token
+token_cache = TTLCache(maxsize=env.TOKEN_CACHE_SIZE, ttl=env.TOKEN_CACHE_MAX_TTL)
+
+# Caché de filas de usuario (incluye caché negativa para ids inexistentes)
+user_cache = TTLCache(maxsize=env.USER_CACHE_SIZE, ttl=env.USER_CACHE_TTL)
+user_lookups = SingleFlight()
+
+
 def get_user_from_db(user_id: str) -> Optional[Dict]:
     """
     Busca un usuario en la base de datos MySQL por su ID.
 
+    Las filas se cachean USER_CACHE_TTL segundos; los usuarios inexistentes
+    se cachean USER_CACHE_NEGATIVE_TTL segundos. Los errores de MySQL no se cachean.
+
     Args:
         user_id: UUID del usuario
 
     Returns:
         Diccionario con los datos del usuario o None si no existe
     """
-    try:
-        connection = mysql.connector.connect(
-            host=env.MYSQL_HOST,
-            port=env.MYSQL_PORT,
-            user=env.MYSQL_USER,
-            password=env.MYSQL_PASSWORD,
-            database=env.MYSQL_DATABASE
-        )
+    cached = user_cache.get(user_id)
+    if cached is not MISSING:
+        return cached
+
+    # Peticiones concurrentes del mismo usuario comparten una sola consulta
+    return user_lookups.do(user_id, _load_user, user_id)
 
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, nombre, apellidos, email, email_verificado, avatar, auth_provider, is_admin, created_at, updated_at FROM users WHERE id = %s",
-            (user_id,)
-        )
 
-        user = cursor.fetchone()
-        cursor.close()
-        connection.close()
+def _load_user(user_id: str) -> Optional[Dict]:
+    """Consulta el usuario en MySQL y guarda el resultado en la caché"""
+    try:
+        # Conexión del pool compartido: close() la devuelve al pool
+        connection = mysql_pool.connect()
 
-        return user
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                "SELECT id, nombre, apellidos, email, email_verificado, avatar, auth_provider, is_admin, created_at, updated_at FROM users WHERE id = %s",
+                (user_id,)
+            )
+            user = cursor.fetchone()
+        finally:
+            cursor.close()
+            connection.close()
 
     except mysql.connector.Error as e:
         print(f"Error de MySQL al buscar usuario: {e}")
         return None
 
+    user_cache.set(user_id, user, ttl=None if user else env.USER_CACHE_NEGATIVE_TTL)
+    return user
+
+
+async def aget_user_from_db(user_id: str) -> Optional[Dict]:
+    """Variante async de get_user_from_db: la consulta corre en el executor de MySQL"""
+    # Un acierto de caché no necesita saltar al executor
+    cached = user_cache.get(user_id)
+    if cached is not MISSING:
+        return cached
+    return await user_lookups.ado(user_id, run_in_db_thread, get_user_from_db, user_id)
+
+
+def invalidate_cached_user(user_id: Optional[str] = None):
+    """
+    Descarta la fila cacheada de un usuario (o de todos si no se indica user_id).
+
+    Debe llamarse cuando cambian datos del usuario (verificación de email, rol, etc.).
+    """
+    user_cache.invalidate(str(user_id) if user_id is not None else None)
+
+
+def _token_key(token: str) -> str:
+    """Clave de caché: hash del token (nunca se guarda el token en claro)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
 
 def verify_token(token: str) -> Dict:
     """
@@ -52,6 +99,9 @@ def verify_token(token: str) -> Dict:
     IMPORTANTE: Esta función solo VALIDA tokens, no los genera.
     Los tokens deben venir de la API externa (Laravel) que maneja autenticación.
 
+    Los payloads ya verificados se cachean hasta el `exp` del propio token
+    (como mucho TOKEN_CACHE_MAX_TTL segundos), así la firma se comprueba una vez.
+
     Args:
         token: Token JWT a verificar
 
@@ -61,13 +111,17 @@ def verify_token(token: str) -> Dict:
     Raises:
         HTTPException 401: Si el token es inválido o ha expirado
     """
+    key = _token_key(token)
+    payload = token_cache.get(key)
+    if payload is not MISSING:
+        return payload
+
     try:
         payload = jwt.decode(
             token,
             env.JWT_SECRET,
             algorithms=[env.JWT_ALGORITHM]
         )
-        return payload
 
     except JWTError as e:
         raise HTTPException(
@@ -76,6 +130,14 @@ def verify_token(token: str) -> Dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    exp = payload.get("exp")
+    ttl = None
+    if isinstance(exp, (int, float)):
+        ttl = min(exp - time.time(), env.TOKEN_CACHE_MAX_TTL)
+    token_cache.set(key, payload, ttl=ttl)
+
+    return payload
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -114,7 +176,7 @@ async def get_current_user(
         )
 
     # 3️⃣ Buscar usuario en MySQL
-    user = get_user_from_db(str(user_id))
+    user = await aget_user_from_db(str(user_id))
 
     if not user:
         raise HTTPException(
@@ -175,7 +237,7 @@ async def get_optional_user(
         if user_id is None:
             return None
 
-        user = get_user_from_db(str(user_id))
+        user = await aget_user_from_db(str(user_id))
         if not user or not user['email_verificado']:
             return None
 
@@ -1,20 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from routes import admin_routes, exercise_routes, auth_routes
+from routes import admin_routes, exercise_routes, auth_routes, webhook_routes
 from core.enviroment import env
+from core.db.pool import mysql_pool
+from core.middleware.jwt_middleware import user_cache, token_cache, user_lookups
+from shared.utils.subscription import subscription_lookups, subscription_cache
+from shared.utils.quizz_user import quiz_lookups
+from shared.utils.generation_context import context_lookups
+from core.llm import llm_pipe
+from core.llm.exercise_parser import exercise_parser
+from controllers.refill_controller import refill_controller
 
 # Deshabilitar documentación en producción
 docs_url = "/docs" if env.APP_ENV == "dev" else None
 redoc_url = "/redoc" if env.APP_ENV == "dev" else None
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Modelo de embeddings y pgvector listos antes de la primera petición
+    await asyncio.to_thread(llm_pipe.warm_up)
+    # Workers de la cola de reposición de ejercicios (por worker de uvicorn)
+    await refill_controller.start()
+    yield
+    await refill_controller.stop()
+
+
 app = FastAPI(
     title="RAG Stoic Exercises API",
     description="API para generar ejercicios estoicos personalizados usando RAG",
     version="1.0.0",
     docs_url=docs_url,
     redoc_url=redoc_url,
-    root_path="/ia"  # Prefijo para funcionar bajo web.estoico.app/ia
+    root_path="/ia",  # Prefijo para funcionar bajo web.estoico.app/ia
+    lifespan=lifespan
 )
 
 # CORS
@@ -30,6 +53,7 @@ app.add_middleware(
 app.include_router(auth_routes.router)
 app.include_router(admin_routes.router)
 app.include_router(exercise_routes.router)
+app.include_router(webhook_routes.router)
 
 @app.get("/", tags=["Health"])
 async def root():
@@ -44,6 +68,47 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/health/pool", tags=["Health"])
+async def pool_health():
+    """Métricas del pool MySQL de este worker (para dimensionar MYSQL_POOL_SIZE)"""
+    return {"mysql": mysql_pool.stats()}
+
+
+@app.get("/health/cache", tags=["Health"])
+async def cache_health():
+    """Aciertos/fallos de las cachés en memoria de este worker"""
+    return {
+        "users": user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "subscriptions": subscription_cache.stats(),
+        "coalescing": {
+            "users": user_lookups.stats(),
+            "subscriptions": subscription_lookups.stats(),
+            "quizzes": quiz_lookups.stats(),
+            "generation_contexts": context_lookups.stats(),
+        },
+        "query_embeddings": llm_pipe.query_embeddings.stats(),
+        "embedding_batcher": llm_pipe.embedding_batcher.stats(),
+        "retrieval": llm_pipe.retrieval_cache.stats(),
+    }
+
+
+@app.get("/health/llm", tags=["Health"])
+async def llm_health():
+    """Scheduler del LLM (cola, cupos), hedging/presupuestos y tasas de reparación/reintento de este worker"""
+    return {
+        "scheduler": llm_pipe.scheduler.stats(),
+        "deadlines": llm_pipe.deadline_stats(),
+        "exercise_parser": exercise_parser.stats(),
+    }
+
+
+@app.get("/health/jobs", tags=["Health"])
+async def jobs_health():
+    """Estado de la cola de reposición de ejercicios de este worker"""
+    return {"refill": refill_controller.queue.stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -0,0 +1,12 @@
+-- Índices para el listado paginado de ejercicios (keyset sobre created_at, id).
+--
+-- idx_user_exercises_user_status_created: filtros por estado
+--   (GET /generate/exercises?status=..., pendientes del stream, contadores).
+-- idx_user_exercises_user_created: listado sin filtro de estado.
+--
+-- Aplicar sobre la base MySQL compartida con Laravel:
+--   mysql -h $MYSQL_HOST -u $MYSQL_USER -p $MYSQL_DATABASE < migrations/001_user_exercises_listing_indexes.sql
+
+ALTER TABLE user_exercises
+    ADD INDEX idx_user_exercises_user_status_created (user_id, status, created_at, id),
+    ADD INDEX idx_user_exercises_user_created (user_id, created_at, id);
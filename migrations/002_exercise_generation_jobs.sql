@@ -0,0 +1,28 @@
+-- Trabajos de reposición de ejercicios en segundo plano
+-- (POST /generate/exercises/{id}/complete, GET /generate/jobs/{job_id}).
+--
+-- active_user_id solo tiene valor mientras el trabajo está en cola o en curso:
+-- el índice único garantiza un único trabajo activo por usuario (idempotencia),
+-- también entre varios workers de uvicorn.
+--
+-- Aplicar sobre la base MySQL compartida con Laravel:
+--   mysql -h $MYSQL_HOST -u $MYSQL_USER -p $MYSQL_DATABASE < migrations/002_exercise_generation_jobs.sql
+
+CREATE TABLE exercise_generation_jobs (
+    id CHAR(36) NOT NULL,
+    user_id CHAR(36) NOT NULL,
+    status ENUM('queued', 'running', 'completed', 'failed') NOT NULL DEFAULT 'queued',
+    requested_count INT UNSIGNED NOT NULL,
+    generated_count INT UNSIGNED NOT NULL DEFAULT 0,
+    error VARCHAR(500) NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    active_user_id CHAR(36) GENERATED ALWAYS AS (
+        CASE WHEN status IN ('queued', 'running') THEN user_id END
+    ) STORED,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_generation_jobs_active_user (active_user_id),
+    KEY idx_generation_jobs_user_created (user_id, created_at),
+    KEY idx_generation_jobs_status_created (status, created_at)
+);
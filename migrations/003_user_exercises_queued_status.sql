@@ -0,0 +1,12 @@
+-- Estado 'queued' para los ejercicios pregenerados (PREFETCH_WATERMARK).
+--
+-- Un lote 'queued' no aparece en el listado ni cuenta como pendiente; se
+-- promociona a 'pending' cuando el usuario se queda sin ejercicios.
+-- El listado y la promoción usan idx_user_exercises_user_status_created (001).
+--
+-- Aplicar sobre la base MySQL compartida con Laravel (si Laravel valida el
+-- estado, añadir también 'queued' allí):
+--   mysql -h $MYSQL_HOST -u $MYSQL_USER -p $MYSQL_DATABASE < migrations/003_user_exercises_queued_status.sql
+
+ALTER TABLE user_exercises
+    MODIFY status ENUM('pending', 'in_progress', 'completed', 'queued') NOT NULL DEFAULT 'pending';
@@ -0,0 +1,16 @@
+-- Versión del corpus RAG por colección de pgvector.
+--
+-- LlmPipe.ingest_pdf la incrementa (de forma atómica) tras añadir los chunks de
+-- un PDF; la caché de resultados de get_stoic_context guarda la versión con la
+-- que se calculó cada entrada y descarta las de versiones anteriores, también
+-- en los demás workers de uvicorn.
+--
+-- Aplicar sobre la base MySQL compartida con Laravel:
+--   mysql -h $MYSQL_HOST -u $MYSQL_USER -p $MYSQL_DATABASE < migrations/004_rag_corpus_versions.sql
+
+CREATE TABLE rag_corpus_versions (
+    collection VARCHAR(100) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (collection)
+);
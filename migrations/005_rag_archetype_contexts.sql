@@ -0,0 +1,22 @@
+-- Contextos RAG precalculados de los perfiles arquetipo.
+--
+-- precompute_contexts.py recorre las combinaciones canónicas de nivel, caminos y
+-- desafíos (y las de los quizzes reales) y guarda aquí el contexto recuperado de
+-- pgvector. LlmPipe.get_stoic_context lo consulta antes que nada: si la query
+-- está precalculada con la versión actual del corpus no hace falta embedding ni
+-- búsqueda vectorial. Tras cada ingest_pdf se recalculan en segundo plano.
+--
+-- Aplicar sobre la base MySQL compartida con Laravel (después de la 004):
+--   mysql -h $MYSQL_HOST -u $MYSQL_USER -p $MYSQL_DATABASE < migrations/005_rag_archetype_contexts.sql
+
+CREATE TABLE rag_archetype_contexts (
+    collection VARCHAR(100) NOT NULL,
+    query_hash CHAR(64) NOT NULL,
+    k TINYINT UNSIGNED NOT NULL,
+    search_query VARCHAR(1000) NOT NULL,
+    corpus_version BIGINT UNSIGNED NOT NULL,
+    context_text MEDIUMTEXT NOT NULL,
+    source_file VARCHAR(255) NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (collection, query_hash, k)
+);
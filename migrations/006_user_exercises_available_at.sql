@@ -0,0 +1,24 @@
+-- Momento en que cada ejercicio pasa a ser visible (available_at).
+--
+-- Los ejercicios pregenerados ('queued', 003) se guardan con available_at NULL y
+-- promote_queued_exercises lo fija al promocionarlos, sin tocar created_at (que
+-- sigue siendo el momento en que se generaron). El listado paginado ordena y
+-- pagina por (available_at, id) en lugar de (created_at, id).
+--
+-- Las filas existentes toman available_at = created_at. El DEFAULT cubre las
+-- inserciones que no indiquen la columna (p. ej. desde Laravel).
+-- idx_user_exercises_user_status_created (001) se mantiene para la promoción.
+--
+-- Aplicar sobre la base MySQL compartida con Laravel (después de la 003):
+--   mysql -h $MYSQL_HOST -u $MYSQL_USER -p $MYSQL_DATABASE < migrations/006_user_exercises_available_at.sql
+
+ALTER TABLE user_exercises
+    ADD COLUMN available_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP AFTER created_at;
+
+UPDATE user_exercises
+SET available_at = IF(status = 'queued', NULL, created_at);
+
+ALTER TABLE user_exercises
+    DROP INDEX idx_user_exercises_user_created,
+    ADD INDEX idx_user_exercises_user_status_available (user_id, status, available_at, id),
+    ADD INDEX idx_user_exercises_user_available (user_id, available_at, id);
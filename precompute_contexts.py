@@ -0,0 +1,89 @@
+"""
+Precalcula el contexto RAG de los perfiles arquetipo.
+
+La query de get_stoic_context solo depende del nivel estoico, los caminos y los
+desafíos del quiz (con las variantes de Laravel unificadas). Este comando
+recorre esas combinaciones, hace la búsqueda en pgvector de cada una y guarda el
+contexto en rag_archetype_contexts con la versión actual del corpus; a partir de
+ahí get_stoic_context las sirve sin embedding ni búsqueda vectorial.
+
+- Arquetipos: cada nivel con hasta --max-paths caminos y hasta --max-challenges
+  desafíos canónicos.
+- --from-quizzes añade las combinaciones que tienen los quizzes reales (más
+  caminos o desafíos de los que cubre la enumeración).
+- No hace falta repetirlo tras subir PDFs: ingest_pdf recalcula en segundo plano
+  las queries que ya están en la tabla.
+
+Uso:
+    python precompute_contexts.py [--max-paths 2] [--max-challenges 1]
+        [--from-quizzes] [--k 5] [--dry-run]
+"""
+import argparse
+import json
+import time
+from typing import Dict, Iterator
+
+from core.db import repository
+from core.llm import llm_pipe
+from core.llm.archetypes import build_search_query, enumerate_archetypes
+
+_QUIZ_PROFILES_QUERY = """
+    SELECT DISTINCT stoic_level, stoic_paths, daily_challenges
+    FROM user_quiz_responses
+"""
+
+
+def _quiz_profiles() -> Iterator[Dict]:
+    for quiz in repository.fetch_all(_QUIZ_PROFILES_QUERY):
+        yield {
+            "stoic_level": quiz.get("stoic_level") or "principiante",
+            "stoic_paths": json.loads(quiz["stoic_paths"]) if quiz.get("stoic_paths") else [],
+            "daily_challenges": json.loads(quiz["daily_challenges"]) if quiz.get("daily_challenges") else [],
+        }
+
+
+def run(args) -> Dict:
+    profiles = list(enumerate_archetypes(args.max_paths, args.max_challenges))
+    if args.from_quizzes:
+        profiles.extend(_quiz_profiles())
+
+    # Perfiles distintos pueden dar la misma query (variantes, orden, repetidos)
+    queries = {}
+    for profile in profiles:
+        queries.setdefault(build_search_query(profile), profile)
+
+    summary = {"profiles": len(profiles), "queries": len(queries), "precomputed": 0, "failed": 0}
+    if args.dry_run:
+        for query in queries:
+            print(f"· {query}")
+        return summary
+
+    started = time.monotonic()
+    for n, (query, profile) in enumerate(queries.items(), 1):
+        try:
+            llm_pipe.precompute_context(profile, args.k)
+            summary["precomputed"] += 1
+        except Exception as e:
+            summary["failed"] += 1
+            print(f"✗ {query}: {e}")
+        if n % 100 == 0:
+            print(f"… {n}/{len(queries)} ({time.monotonic() - started:.0f}s)")
+
+    summary["seconds"] = round(time.monotonic() - started, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-paths", type=int, default=2, help="Caminos por arquetipo (1-4)")
+    parser.add_argument("--max-challenges", type=int, default=1, help="Desafíos por arquetipo")
+    parser.add_argument("--from-quizzes", action="store_true", help="Añadir las combinaciones de los quizzes reales")
+    parser.add_argument("--k", type=int, default=5, help="Chunks por contexto (el k de get_stoic_context)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo listar las queries")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
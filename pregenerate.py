@@ -0,0 +1,269 @@
+"""
+Pregeneración de ejercicios fuera de horas punta.
+
+Recorre los suscriptores activos (mismo criterio que get_user_subscription) con
+quiz y menos de --watermark ejercicios pendientes, sin lote pregenerado, y les
+genera el siguiente lote con RefillController (queda 'queued' si aún tienen
+pendientes). Así la mayor parte de la generación no compite con el tráfico
+interactivo.
+
+- Presupuesto global: como mucho --max-llm-calls llamadas al LLM, a un ritmo
+  de --rpm por minuto y --concurrency usuarios a la vez.
+- Checkpoint: tras cada página de usuarios se guarda el último user_id
+  procesado en --checkpoint; con --resume se continúa desde ahí.
+- --stop-at HH:MM deja de tomar usuarios a esa hora (fin de la ventana valle).
+- Pruebas en local: --fake-llm usa un LLM y un contexto RAG falsos, sin
+  llamar a OpenAI ni cargar el modelo de embeddings ni conectar a pgvector.
+  MySQL sí es real: los ejercicios falsos se guardan en la base del .env, así
+  que hay que nombrarla con --confirm-database (p. ej. un MySQL local con las
+  migraciones aplicadas, nunca la de producción).
+
+Uso (cron, p. ej. a las 03:00):
+    python pregenerate.py [--watermark 2] [--max-llm-calls 5000] [--rpm 300]
+        [--concurrency 4] [--stop-at 06:30] [--resume] [--dry-run]
+        [--fake-llm --confirm-database NOMBRE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.enviroment import env
+from core.db import repository
+from core.db.executor import run_in_db_thread
+from shared.utils.subscription import active_subscription_condition
+
+DEFAULT_CHECKPOINT = Path(".pregenerate_checkpoint.json")
+
+# Suscripción más reciente de cada usuario activa, con quiz, pocos pendientes y
+# sin lote pregenerado. Keyset sobre user_id para poder reanudar.
+_CANDIDATES_QUERY = f"""
+    SELECT s.user_id, COUNT(e.id) AS pending_count
+    FROM subscriptions s
+    JOIN (
+        SELECT user_id, MAX(created_at) AS created_at
+        FROM subscriptions
+        GROUP BY user_id
+    ) AS latest ON latest.user_id = s.user_id AND latest.created_at = s.created_at
+    LEFT JOIN user_exercises e
+        ON e.user_id = s.user_id AND e.status IN ('pending', 'in_progress')
+    WHERE {active_subscription_condition("s")}
+      AND s.user_id > %s
+      AND EXISTS (SELECT 1 FROM user_quiz_responses q WHERE q.user_id = s.user_id)
+      AND NOT EXISTS (
+          SELECT 1 FROM user_exercises qe
+          WHERE qe.user_id = s.user_id AND qe.status = 'queued'
+      )
+    GROUP BY s.user_id
+    HAVING pending_count < %s
+    ORDER BY s.user_id
+    LIMIT %s
+"""
+
+
+class BudgetExhausted(RuntimeError):
+    """Se agotó el presupuesto de llamadas al LLM de esta ejecución"""
+
+
+class BudgetedLLM:
+    """
+    Envuelve el LLM de LlmPipe: cuenta cada llamada contra el presupuesto y
+    espacia su inicio para no superar `rpm` llamadas por minuto
+    """
+
+    def __init__(self, llm, max_calls: int, rpm: float):
+        self._llm = llm
+        self.max_calls = max_calls
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self.calls = 0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _acquire(self):
+        async with self._lock:
+            if self.calls >= self.max_calls:
+                raise BudgetExhausted(f"Presupuesto de {self.max_calls} llamadas al LLM agotado")
+            self.calls += 1
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def ainvoke(self, *args, **kwargs):
+        await self._acquire()
+        return await self._llm.ainvoke(*args, **kwargs)
+
+    async def astream(self, *args, **kwargs):
+        await self._acquire()
+        async for chunk in self._llm.astream(*args, **kwargs):
+            yield chunk
+
+    def with_structured_output(self, *args, **kwargs):
+        return BudgetedLLM._Structured(self, self._llm.with_structured_output(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    class _Structured:
+        def __init__(self, budget: "BudgetedLLM", runnable):
+            self._budget = budget
+            self._runnable = runnable
+
+        async def ainvoke(self, *args, **kwargs):
+            await self._budget._acquire()
+            return await self._runnable.ainvoke(*args, **kwargs)
+
+
+def _load_checkpoint(path: Path, resume: bool) -> Dict:
+    if resume and path.exists():
+        return json.loads(path.read_text())
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "last_user_id": "",
+        "processed": 0,
+        "generated": 0,
+        "skipped": 0,
+        "failed": 0,
+        "llm_calls": 0,
+        "finished": False,
+    }
+
+
+def _save_checkpoint(path: Path, checkpoint: Dict):
+    """Escritura atómica: un corte a mitad nunca deja un checkpoint corrupto"""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(checkpoint, indent=2))
+    os.replace(tmp, path)
+
+
+def _deadline(stop_at: str) -> Optional[datetime]:
+    """Próxima vez que el reloj marque HH:MM (la ventana puede cruzar la medianoche)"""
+    if not stop_at:
+        return None
+    hour, minute = map(int, stop_at.split(":"))
+    now = datetime.now()
+    deadline = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return deadline if deadline > now else deadline + timedelta(days=1)
+
+
+async def _fetch_candidates(after_user_id: str, watermark: int, limit: int) -> List[Dict]:
+    return await run_in_db_thread(
+        repository.fetch_all, _CANDIDATES_QUERY, (after_user_id, watermark, limit)
+    )
+
+
+async def _process_user(controller, user_id: str, semaphore: asyncio.Semaphore, checkpoint: Dict):
+    async with semaphore:
+        try:
+            job = await controller.run_now(user_id)
+        except BudgetExhausted:
+            raise
+        except Exception as e:
+            checkpoint["failed"] += 1
+            print(f"✗ {user_id}: {e}")
+            return
+
+    if job is None:
+        # Ya tenía un trabajo activo (la API lo está reponiendo)
+        checkpoint["skipped"] += 1
+        return
+    checkpoint["processed"] += 1
+    checkpoint["generated"] += job["generated_count"]
+    print(f"✓ {user_id}: {job['generated_count']} ejercicios")
+
+
+async def run(args) -> Dict:
+    # Embeddings y vector store se crean al primer uso: con --fake-llm nunca
+    from core.llm import llm_pipe
+    from controllers.refill_controller import refill_controller
+
+    # El fake y el presupuesto van detrás del scheduler global (prioridad de segundo plano)
+    if args.fake_llm:
+        from core.llm.fake_llm import FakeChatModel, afake_stoic_context, fake_stoic_context
+        llm_pipe.scheduler.llm = FakeChatModel()
+        llm_pipe.get_stoic_context = fake_stoic_context
+        llm_pipe.aget_stoic_context = afake_stoic_context
+
+    budget = BudgetedLLM(llm_pipe.scheduler.llm, args.max_llm_calls, args.rpm)
+    llm_pipe.scheduler.llm = budget
+
+    checkpoint = _load_checkpoint(args.checkpoint, args.resume)
+    if checkpoint.get("finished"):
+        print("La ejecución del checkpoint ya terminó; usa otro --checkpoint o quita --resume")
+        return checkpoint
+    semaphore = asyncio.Semaphore(args.concurrency)
+    deadline = _deadline(args.stop_at)
+    # El presupuesto es por ejecución; el checkpoint acumula el total
+    previous_calls = checkpoint["llm_calls"]
+
+    try:
+        while deadline is None or datetime.now() < deadline:
+            users = await _fetch_candidates(checkpoint["last_user_id"], args.watermark, args.page_size)
+            if not users:
+                checkpoint["finished"] = True
+                break
+
+            if args.dry_run:
+                for user in users:
+                    print(f"· {user['user_id']} ({user['pending_count']} pendientes)")
+                checkpoint["last_user_id"] = users[-1]["user_id"]
+                continue
+
+            # Se deja terminar toda la página aunque se agote el presupuesto
+            results = await asyncio.gather(*(
+                _process_user(refill_controller, user["user_id"], semaphore, checkpoint)
+                for user in users
+            ), return_exceptions=True)
+            checkpoint["llm_calls"] = previous_calls + budget.calls
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                # Sin avanzar el checkpoint: los ya servidos tienen lote y no vuelven a salir
+                raise errors[0]
+
+            # Solo se avanza cuando toda la página terminó: al reanudar no se salta a nadie
+            checkpoint["last_user_id"] = users[-1]["user_id"]
+            _save_checkpoint(args.checkpoint, checkpoint)
+    except BudgetExhausted as e:
+        print(f"⏸ {e}; reanudar con --resume")
+    finally:
+        checkpoint["llm_calls"] = previous_calls + budget.calls
+        if not args.dry_run:
+            _save_checkpoint(args.checkpoint, checkpoint)
+
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--watermark", type=int, default=max(env.PREFETCH_WATERMARK, 1),
+                        help="Pregenerar a usuarios con menos pendientes que esto")
+    parser.add_argument("--max-llm-calls", type=int, default=5000)
+    parser.add_argument("--rpm", type=float, default=300, help="Llamadas al LLM por minuto (0 = sin límite)")
+    parser.add_argument("--concurrency", type=int, default=env.LLM_MAX_CONCURRENCY,
+                        help="Usuarios procesados a la vez")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--stop-at", default="", help="HH:MM a partir de la que no se toman más usuarios")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--fake-llm", action="store_true", help="LLM y contexto RAG falsos, para pruebas en local")
+    parser.add_argument("--confirm-database", default="",
+                        help="Con --fake-llm: nombre de la base MySQL (MYSQL_DATABASE) donde se guardarán los ejercicios falsos")
+    parser.add_argument("--dry-run", action="store_true", help="Solo listar los usuarios candidatos")
+    args = parser.parse_args()
+    if args.fake_llm and not args.dry_run and args.confirm_database != env.MYSQL_DATABASE:
+        parser.error(
+            f"--fake-llm guarda ejercicios falsos en MySQL ({env.MYSQL_HOST}/{env.MYSQL_DATABASE}); "
+            f"confirma la base con --confirm-database {env.MYSQL_DATABASE}"
+        )
+
+    checkpoint = asyncio.run(run(args))
+    print(json.dumps(checkpoint, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from shared.utils.quizz_user import get_quizz_user_by_id
-from shared.utils.subscription import get_user_subscription
+from shared.utils.generation_context import aload_user_generation_context, build_user_profile
 from core.middleware.jwt_middleware import require_user_role
-from core.db.exercise_repository import ExerciseRepository
+from core.db import database
+from core.db.exercise_repository import ExerciseRepository, AsyncExerciseRepository
+from core.llm.exercise_parser import ExerciseParseError
+from core.llm.scheduler import LlmPriority
+from controllers.refill_controller import refill_controller
 from typing import Dict, Optional
 import json
 import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/generate", tags=["Exercises"])
 
+# Página del listado cuando se envía cursor sin limit
+DEFAULT_PAGE_SIZE = 50
+
 
 @router.get("/exercises/stream")
-async def stream_exercises(current_user: Dict = Depends(require_user_role)):
-   
+async def stream_exercises(
+    deltas: bool = Query(
+        False,
+        description="Enviar eventos exercise_delta con el texto de cada campo mientras se genera"
+    ),
+    current_user: Dict = Depends(require_user_role)
+):
+    """
+    Genera (o recupera) los ejercicios pendientes del usuario por Server-Sent Events.
+
+    Eventos: status, profile, exercise, complete, error y, con deltas=true,
+    exercise_delta ({index, field, delta, done}) antes de cada exercise.
+    """
+
     # Obtener user_id del token JWT validado
     user_id = current_user["user_id"]
-    exercise_repo = ExerciseRepository()
+    exercise_repo = AsyncExerciseRepository()
 
     async def event_generator():
         try:
             # 0️⃣ Validar suscripción activa (PRIMERO - antes del quiz)
             yield f"event: status\ndata: {json.dumps({'message': 'Verificando suscripción...'})}\n\n"
             await asyncio.sleep(0)  # Forzar flush inmediato
-            
-            user_subscription = get_user_subscription(user_id)
-            if not user_subscription or not user_subscription.get("has_active_subscription", False):
+
+            # Suscripción, quiz y contadores en una sola consulta
+            context = await aload_user_generation_context(user_id)
+
+            if not context.has_active_subscription:
                 yield f"event: error\ndata: {json.dumps({'error': 'No tienes una suscripción activa. Por favor, suscríbete para generar ejercicios personalizados.'})}\n\n"
                 await asyncio.sleep(0)
                 return
@@ -33,23 +56,31 @@ async def stream_exercises(current_user: Dict = Depends(require_user_role)):
             # 1️⃣ Verificar ejercicios pendientes
             yield f"event: status\ndata: {json.dumps({'message': 'Verificando ejercicios pendientes...'})}\n\n"
             await asyncio.sleep(0)
-            
-            pending_count = exercise_repo.get_pending_exercises_count(user_id)
-            
+
+            pending_count = context.pending_count
+            pending_exercises = []
+
+            # Una conexión para las consultas seguidas; la sesión no cruza ningún
+            # yield ni la búsqueda RAG, así no retiene la conexión mientras tanto
+            async with database.asession():
+                # Activar ejercicios pregenerados antes de recurrir al LLM
+                if pending_count < 5 and context.queued_count > 0:
+                    pending_count += await exercise_repo.promote_queued_exercises(user_id, 5 - pending_count)
+
+                if pending_count >= 5:
+                    # Solo pendientes y en progreso, limitado a 5 (filtrado en SQL)
+                    pending_exercises = await exercise_repo.get_pending_exercises(user_id, limit=5)
+
             if pending_count >= 5:
                 # Ya tiene 5 ejercicios pendientes, devolver los existentes
                 yield f"event: status\ndata: {json.dumps({'message': f'Tienes {pending_count} ejercicios pendientes. Mostrando ejercicios existentes...'})}\n\n"
                 await asyncio.sleep(0)
-                
-                existing_exercises = exercise_repo.get_user_exercises(user_id)
-                # Filtrar solo pendientes y en progreso, limitar a 5
-                pending_exercises = [ex for ex in existing_exercises if ex['status'] in ('pending', 'in_progress')][:5]
-                
+
                 if pending_exercises:
                     # Enviar perfil
                     yield f"event: profile\ndata: {json.dumps({'summary': 'Ejercicios pendientes', 'topic': 'estoicismo'})}\n\n"
                     await asyncio.sleep(0)
-                    
+
                     for idx, exercise in enumerate(pending_exercises, 1):
                         exercise_data = {
                             "id": exercise['id'],
@@ -65,14 +96,14 @@ async def stream_exercises(current_user: Dict = Depends(require_user_role)):
                         }
                         yield f"event: exercise\ndata: {json.dumps(exercise_data, ensure_ascii=False)}\n\n"
                         await asyncio.sleep(0)
-                    
+
                     yield f"event: complete\ndata: {json.dumps({'message': 'Ejercicios cargados', 'total': len(pending_exercises)})}\n\n"
                     await asyncio.sleep(0)
                     return
 
             # 2️⃣ Calcular cuántos ejercicios generar
             exercises_to_generate = 5 - pending_count
-            
+
             yield f"event: status\ndata: {json.dumps({'message': f'Generando {exercises_to_generate} nuevos ejercicios...'})}\n\n"
             await asyncio.sleep(0)
 
@@ -80,8 +111,7 @@ async def stream_exercises(current_user: Dict = Depends(require_user_role)):
             yield f"event: status\ndata: {json.dumps({'message': 'Obteniendo perfil estoico del usuario...'})}\n\n"
             await asyncio.sleep(0)  # Forzar flush inmediato
 
-            user_quiz = get_quizz_user_by_id(user_id)
-            if not user_quiz:
+            if not context.quiz:
                 yield f"event: error\ndata: {json.dumps({'error': f'Quiz no encontrado para usuario {user_id}. Por favor, completa el cuestionario estoico primero.'})}\n\n"
                 await asyncio.sleep(0)
                 return
@@ -91,42 +121,15 @@ async def stream_exercises(current_user: Dict = Depends(require_user_role)):
             await asyncio.sleep(0)  # Forzar flush inmediato
 
             # Importar aquí para evitar dependencias circulares
-            from schemas.exercise_schema import StoicQuizRequest
             from core.llm import llm_pipe
 
-            # Convertir dict de BD a StoicQuizRequest
-            if isinstance(user_quiz, dict):
-                user_quiz = StoicQuizRequest(
-                    age_range=user_quiz["age_range"],
-                    gender=user_quiz.get("gender"),
-                    country=user_quiz.get("country"),
-                    religious_belief=user_quiz.get("religious_belief"),
-                    spiritual_practice_level=user_quiz["spiritual_practice_level"],
-                    spiritual_practice_frequency=user_quiz["spiritual_practice_frequency"],
-                    stoic_level=user_quiz.get("stoic_level") or "principiante",
-                    stoic_paths=user_quiz.get("stoic_paths") or [],
-                    daily_challenges=user_quiz.get("daily_challenges") or [],
-                    num_exercises=exercises_to_generate
-                )
-
-            # Construir perfil
-            user_profile = {
-                "age_range": user_quiz.age_range,
-                "gender": user_quiz.gender,
-                "country": user_quiz.country,
-                "belief": user_quiz.religious_belief,
-                "practice_level": user_quiz.spiritual_practice_level,
-                "practice_frequency": user_quiz.spiritual_practice_frequency,
-                "daily_challenges": user_quiz.daily_challenges,
-                "stoic_paths": user_quiz.stoic_paths,
-                "stoic_level": user_quiz.stoic_level,
-                "num_exercises": exercises_to_generate
-            }
+            user_quiz, user_profile = build_user_profile(context.quiz, exercises_to_generate)
 
             yield f"event: status\ndata: {json.dumps({'message': 'Buscando en los textos de Marco Aurelio, Epicteto y Séneca...'})}\n\n"
             await asyncio.sleep(0)  # Forzar flush inmediato
 
-            context_text, source_file = llm_pipe.get_stoic_context(user_profile, k=5)
+            # Con presupuesto: si pgvector no responde a tiempo se genera sin contexto
+            context_text, source_file = await llm_pipe.aget_stoic_context(user_profile, k=5)
 
             # 5️⃣ Enviar perfil
             stoic_paths_str = ', '.join([path.value for path in user_quiz.stoic_paths])
@@ -140,60 +143,100 @@ async def stream_exercises(current_user: Dict = Depends(require_user_role)):
             yield f"event: profile\ndata: {json.dumps({'summary': profile_summary, 'topic': 'estoicismo'})}\n\n"
             await asyncio.sleep(0)  # Forzar flush inmediato
 
-            # Obtener offset basado en ejercicios completados para evitar repeticiones
-            completed_count = exercise_repo.get_completed_exercises_count(user_id)
-            focus_offset = completed_count
-
-            # 6️⃣ Generar y enviar cada ejercicio UNO POR UNO en tiempo real
-            for i in range(1, exercises_to_generate + 1):
-                yield f"event: status\ndata: {json.dumps({'message': f'Creando ejercicio estoico {i} de {exercises_to_generate}...'})}\n\n"
-                await asyncio.sleep(0)  # Forzar flush del mensaje de status
-
-                # Generar un solo ejercicio
-                raw_response = llm_pipe.generate_single_exercise(
-                    user_profile=user_profile,
-                    exercise_number=i,
-                    total_exercises=exercises_to_generate,
-                    context_text=context_text,
-                    source_file=source_file,
-                    focus_offset=focus_offset  # Pasar offset para variar
-                )
-
-                # Limpiar y parsear JSON
-                clean_json = raw_response.strip()
-
-                if "```" in clean_json:
-                    parts = clean_json.split("```")
-                    if len(parts) >= 3:
-                        clean_json = parts[1]
-                    elif len(parts) == 2:
-                        clean_json = parts[1]
+            # Offset basado en ejercicios completados para evitar repeticiones
+            focus_offset = context.completed_count
 
-                    if clean_json.startswith("json") or clean_json.startswith("JSON"):
-                        clean_json = clean_json[4:]
+            # Backpressure: avisar si hay llamadas al LLM por delante esperando turno
+            queue_depth = llm_pipe.scheduler.queue_depth(LlmPriority.INTERACTIVE)
+            if queue_depth:
+                yield f"event: status\ndata: {json.dumps({'message': f'Alta demanda: {queue_depth} solicitudes por delante, tus ejercicios empezarán en breve...', 'queue_depth': queue_depth})}\n\n"
+                await asyncio.sleep(0)
 
-                clean_json = clean_json.strip()
+            # 6️⃣ Generar los ejercicios en paralelo y enviar cada uno en cuanto termina
+            yield f"event: status\ndata: {json.dumps({'message': f'Creando {exercises_to_generate} ejercicios estoicos...'})}\n\n"
+            await asyncio.sleep(0)  # Forzar flush del mensaje de status
 
-                if not clean_json.startswith("{"):
-                    json_start = clean_json.find("{")
-                    if json_start != -1:
-                        clean_json = clean_json[json_start:]
+            generation_kwargs = dict(
+                user_profile=user_profile,
+                total_exercises=exercises_to_generate,
+                context_text=context_text,
+                source_file=source_file,
+                focus_offset=focus_offset  # Pasar offset para variar
+            )
+            if deltas:
+                # Tokens del modelo: exercise_delta por cada campo que se va llenando
+                generation = llm_pipe.astream_exercises(**generation_kwargs)
+            else:
+                generation = (
+                    (i, "done", raw)
+                    async for i, raw in llm_pipe.agenerate_exercises(**generation_kwargs)
+                )
 
-                exercise_data = json.loads(clean_json)
+            async def finish(i, raw):
+                """Valida contra Exercise (re-pidiendo solo este ejercicio si no es válido) y lo guarda"""
+                try:
+                    exercise_data = await llm_pipe.aparse_exercise(raw, i, **generation_kwargs)
+                except ExerciseParseError as e:
+                    return i, None, str(e)
+                exercise_data["id"] = await exercise_repo.create_exercise(user_id, exercise_data)
+                return i, exercise_data, None
+
+            # Un reintento no debe retener la entrega de los demás ejercicios: cada
+            # uno se valida en su propia task y el bucle sigue vaciando la cola
+            events: asyncio.Queue = asyncio.Queue()
+            finishing = set()
+
+            async def produce():
+                async for i, kind, payload in generation:
+                    if kind == "delta":
+                        events.put_nowait(("delta", (i, payload)))
+                        continue
+                    task = asyncio.ensure_future(finish(i, payload))
+                    finishing.add(task)
+                    task.add_done_callback(lambda t: events.put_nowait(("finished", t)))
+
+            producer = asyncio.ensure_future(produce())
+            producer.add_done_callback(lambda t: events.put_nowait(("produced", t)))
+
+            failed = 0
+            producing = True
+            try:
+                while producing or finishing:
+                    kind, item = await events.get()
+
+                    if kind == "produced":
+                        producing = False
+                        item.result()  # propaga el error de la generación
+                        continue
+
+                    if kind == "delta":
+                        i, payload = item
+                        yield f"event: exercise_delta\ndata: {json.dumps({'index': i, **payload}, ensure_ascii=False)}\n\n"
+                        await asyncio.sleep(0)
+                        continue
 
-                # Guardar en BD
-                exercise_id = exercise_repo.create_exercise(user_id, exercise_data)
-                exercise_data["id"] = exercise_id
+                    finishing.discard(item)
+                    i, exercise_data, error = item.result()
+                    if exercise_data is None:
+                        failed += 1
+                        yield f"event: exercise_failed\ndata: {json.dumps({'index': i, 'error': error}, ensure_ascii=False)}\n\n"
+                        await asyncio.sleep(0)
+                        continue
 
-                # Enviar ejercicio inmediatamente
-                exercise_data["index"] = i
-                exercise_data["total"] = exercises_to_generate
+                    # Enviar ejercicio inmediatamente
+                    exercise_data["index"] = i
+                    exercise_data["total"] = exercises_to_generate
 
-                yield f"event: exercise\ndata: {json.dumps(exercise_data, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0)  # ⚡ CRÍTICO: Forzar flush inmediato del ejercicio al cliente
+                    yield f"event: exercise\ndata: {json.dumps(exercise_data, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(0)  # ⚡ CRÍTICO: Forzar flush inmediato del ejercicio al cliente
+            finally:
+                # Cliente desconectado o error: no dejar generaciones huérfanas
+                producer.cancel()
+                for task in finishing:
+                    task.cancel()
 
             # 7️⃣ Finalizar
-            yield f"event: complete\ndata: {json.dumps({'message': 'Ejercicios generados y guardados', 'total': exercises_to_generate})}\n\n"
+            yield f"event: complete\ndata: {json.dumps({'message': 'Ejercicios generados y guardados', 'total': exercises_to_generate - failed, 'failed': failed})}\n\n"
             await asyncio.sleep(0)  # Forzar flush final
 
         except Exception as e:
@@ -220,33 +263,45 @@ async def complete_exercise(
 ):
     """
     Marca un ejercicio como completado.
-    Solo genera 5 nuevos ejercicios cuando se completen los 5 pendientes.
+    Solo genera 5 nuevos ejercicios cuando se completen los 5 pendientes; la
+    generación corre en segundo plano y se consulta con GET /generate/jobs/{job_id}.
     """
     user_id = current_user["user_id"]
-    exercise_repo = ExerciseRepository()
-    
-    # Verificar que el ejercicio existe y pertenece al usuario
-    exercise = exercise_repo.get_exercise_by_id(exercise_id, user_id)
-    if not exercise:
-        raise HTTPException(status_code=404, detail="Ejercicio no encontrado")
+    exercise_repo = AsyncExerciseRepository()
     
-    if exercise['status'] == 'completed':
-        raise HTTPException(status_code=400, detail="El ejercicio ya está completado")
-    
-    # Marcar como completado
-    success = exercise_repo.mark_exercise_completed(exercise_id, user_id)
-    if not success:
-        raise HTTPException(status_code=500, detail="Error al completar el ejercicio")
-    
-    # Verificar cuántos pendientes quedan DESPUÉS de completar
-    pending_count = exercise_repo.get_pending_exercises_count(user_id)
+    async with database.asession():
+        # Verificar que el ejercicio existe y pertenece al usuario
+        exercise = await exercise_repo.get_exercise_by_id(exercise_id, user_id)
+        if not exercise:
+            raise HTTPException(status_code=404, detail="Ejercicio no encontrado")
+
+        if exercise['status'] == 'completed':
+            raise HTTPException(status_code=400, detail="El ejercicio ya está completado")
+
+        # Marcar como completado
+        success = await exercise_repo.mark_exercise_completed(exercise_id, user_id)
+        if not success:
+            raise HTTPException(status_code=500, detail="Error al completar el ejercicio")
+
+        # Estado DESPUÉS de completar: pendientes, suscripción, quiz y completados en una consulta
+        # (sin coalescer: una carga ya en curso no vería este ejercicio completado)
+        context = await aload_user_generation_context(user_id, coalesce=False)
+        pending_count = context.pending_count
     
+    # Si hay un lote pregenerado se activa al instante, sin esperar al LLM
+    # (solo con suscripción activa: sin ella tampoco se generarían)
+    promoted = 0
+    if pending_count == 0 and context.queued_count > 0 and context.has_active_subscription:
+        promoted = await exercise_repo.promote_queued_exercises(user_id, 5)
+        pending_count = promoted
+        context.pending_count = promoted
+        context.queued_count -= promoted
+
+    job = None
     # Solo generar nuevos ejercicios si se completaron los 5 (pending_count == 0)
-    new_exercises_generated = False
     if pending_count == 0:
         # Validar suscripción activa antes de generar nuevos ejercicios
-        user_subscription = get_user_subscription(user_id)
-        if not user_subscription or not user_subscription.get("has_active_subscription", False):
+        if not context.has_active_subscription:
             return {
                 "message": "Ejercicio completado exitosamente",
                 "exercise_id": exercise_id,
@@ -254,98 +309,73 @@ async def complete_exercise(
                 "new_exercises_generated": False,
                 "warning": "No se pudieron generar nuevos ejercicios porque no tienes una suscripción activa."
             }
-        
-        # Generar 5 nuevos ejercicios
+
+        # Encolar la generación de 5 nuevos ejercicios: la respuesta no espera al LLM
+        if context.quiz:
+            try:
+                job = await refill_controller.enqueue(user_id)
+            except Exception:
+                logger.exception("Error al encolar la generación de ejercicios del usuario %s", user_id)
+
+    elif refill_controller.should_prefetch(context):
+        # Quedan pocos: pregenerar el siguiente lote oculto en segundo plano
         try:
-            user_quiz = get_quizz_user_by_id(user_id)
-            if user_quiz:
-                from schemas.exercise_schema import StoicQuizRequest
-                from core.llm import llm_pipe
-                
-                if isinstance(user_quiz, dict):
-                    user_quiz = StoicQuizRequest(
-                        age_range=user_quiz["age_range"],
-                        gender=user_quiz.get("gender"),
-                        country=user_quiz.get("country"),
-                        religious_belief=user_quiz.get("religious_belief"),
-                        spiritual_practice_level=user_quiz["spiritual_practice_level"],
-                        spiritual_practice_frequency=user_quiz["spiritual_practice_frequency"],
-                        stoic_level=user_quiz.get("stoic_level") or "principiante",
-                        stoic_paths=user_quiz.get("stoic_paths") or [],
-                        daily_challenges=user_quiz.get("daily_challenges") or [],
-                        num_exercises=5  # Generar 5 nuevos
-                    )
-                
-                user_profile = {
-                    "age_range": user_quiz.age_range,
-                    "gender": user_quiz.gender,
-                    "country": user_quiz.country,
-                    "belief": user_quiz.religious_belief,
-                    "practice_level": user_quiz.spiritual_practice_level,
-                    "practice_frequency": user_quiz.spiritual_practice_frequency,
-                    "daily_challenges": user_quiz.daily_challenges,
-                    "stoic_paths": user_quiz.stoic_paths,
-                    "stoic_level": user_quiz.stoic_level,
-                    "num_exercises": 5
-                }
-                
-                # Obtener contexto RAG
-                context_text, source_file = llm_pipe.get_stoic_context(user_profile, k=5)
-                
-                # Obtener offset basado en ejercicios completados para evitar repeticiones
-                completed_count = exercise_repo.get_completed_exercises_count(user_id)
-                focus_offset = completed_count
-                
-                # Generar los 5 ejercicios
-                for i in range(1, 6):
-                    raw_response = llm_pipe.generate_single_exercise(
-                        user_profile=user_profile,
-                        exercise_number=i,
-                        total_exercises=5,
-                        context_text=context_text,
-                        source_file=source_file,
-                        focus_offset=focus_offset  # Pasar offset para variar
-                    )
-                    
-                    # Limpiar y parsear JSON
-                    clean_json = raw_response.strip()
-                    if "```" in clean_json:
-                        parts = clean_json.split("```")
-                        if len(parts) >= 3:
-                            clean_json = parts[1]
-                        if clean_json.startswith("json") or clean_json.startswith("JSON"):
-                            clean_json = clean_json[4:]
-                    
-                    clean_json = clean_json.strip()
-                    if not clean_json.startswith("{"):
-                        json_start = clean_json.find("{")
-                        if json_start != -1:
-                            clean_json = clean_json[json_start:]
-                    
-                    exercise_data = json.loads(clean_json)
-                    exercise_repo.create_exercise(user_id, exercise_data)
-                new_exercises_generated = True
-                
-        except Exception as e:
-            print(f"Error al generar nuevos ejercicios: {e}")
-    
-    return {
+            job = await refill_controller.enqueue(user_id)
+        except Exception:
+            logger.exception("Error al encolar la pregeneración de ejercicios del usuario %s", user_id)
+
+    response = {
         "message": "Ejercicio completado exitosamente",
         "exercise_id": exercise_id,
         "pending_count": pending_count,
-        "new_exercises_generated": new_exercises_generated,
-        "info": "Se generaron 5 nuevos ejercicios" if new_exercises_generated else f"Quedan {pending_count} ejercicios pendientes"
+        "new_exercises_generated": promoted > 0,
+        "info": f"Quedan {pending_count} ejercicios pendientes"
     }
+    if promoted:
+        response["info"] = f"Se activaron {promoted} nuevos ejercicios"
+    if job:
+        response["job_id"] = job["id"]
+        response["job_status"] = job["status"]
+        if pending_count == 0:
+            response["info"] = "Generando 5 nuevos ejercicios en segundo plano"
+    return response
+
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(
+    job_id: str,
+    current_user: Dict = Depends(require_user_role)
+):
+    """
+    Estado de un trabajo de generación en segundo plano:
+    queued -> running -> completed | failed, con el progreso en generated_count.
+    """
+    job = await refill_controller.get_job(job_id, current_user["user_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
 
 
 @router.get("/exercises")
 async def get_user_exercises(
     status: Optional[str] = None,
+    limit: Optional[int] = Query(
+        None, ge=1, le=100,
+        description=f"Tamaño de página (con cursor y sin limit: {DEFAULT_PAGE_SIZE})"
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
     current_user: Dict = Depends(require_user_role)
 ):
-    """Obtiene los ejercicios del usuario, opcionalmente filtrados por estado"""
+    """
+    Obtiene los ejercicios del usuario, opcionalmente filtrados por estado.
+
+    Sin limit ni cursor devuelve todos, como siempre. Con limit se pagina por
+    cursor (del más reciente al más antiguo): para la siguiente página se envía
+    el `next_cursor` de la respuesta; es null en la última. `total` es siempre
+    el número de ejercicios del usuario (con el filtro), no el de la página.
+    """
     user_id = current_user["user_id"]
-    exercise_repo = ExerciseRepository()
+    exercise_repo = AsyncExerciseRepository()
     
     # Validar status si se proporciona
     if status and status not in ['pending', 'in_progress', 'completed']:
@@ -353,8 +383,28 @@ async def get_user_exercises(
             status_code=400, 
             detail="Status inválido. Debe ser: pending, in_progress o completed"
         )
+
+    before = None
+    if cursor:
+        try:
+            before = ExerciseRepository.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        limit = limit or DEFAULT_PAGE_SIZE
     
-    exercises = exercise_repo.get_user_exercises(user_id, status)
+    # Las consultas comparten una conexión del pool
+    async with database.asession():
+        if limit is None:
+            exercises = await exercise_repo.get_user_exercises(user_id, status)
+            total = len(exercises)
+        else:
+            # Se pide una fila extra para saber si hay página siguiente
+            exercises = await exercise_repo.get_user_exercises(user_id, status, limit=limit + 1, before=before)
+            total = await exercise_repo.count_user_exercises(user_id, status)
+        pending_count = await exercise_repo.get_pending_exercises_count(user_id)
+
+    has_more = limit is not None and len(exercises) > limit
+    exercises = exercises[:limit]
     
     # Formatear ejercicios para la respuesta
     formatted_exercises = []
@@ -370,11 +420,13 @@ async def get_user_exercises(
             "source": ex.get('source'),
             "status": ex['status'],
             "completed_at": str(ex['completed_at']) if ex.get('completed_at') else None,
-            "created_at": str(ex['created_at']) if ex.get('created_at') else None
+            "created_at": str(ex['created_at']) if ex.get('created_at') else None,
+            "available_at": str(ex['available_at']) if ex.get('available_at') else None
         })
     
     return {
         "exercises": formatted_exercises,
-        "total": len(formatted_exercises),
-        "pending_count": exercise_repo.get_pending_exercises_count(user_id)
+        "total": total,
+        "pending_count": pending_count,
+        "next_cursor": ExerciseRepository.encode_cursor(exercises[-1]) if has_more else None
     }
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from typing import Dict
+
+from core.middleware.jwt_middleware import require_admin_role, invalidate_cached_user
+from shared.utils.subscription import invalidate_subscription_cache
+
+router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+
+
+@router.post("/subscriptions/{user_id}")
+async def subscription_changed(
+    user_id: str,
+    current_user: Dict = Depends(require_admin_role)
+):
+    """
+    Notifica un cambio en la suscripción de un usuario (alta, renovación, cancelación).
+
+    **Requiere autenticación JWT con rol ADMIN** (lo llama el backend de Laravel).
+
+    Descarta la suscripción cacheada para que la siguiente petición la lea de MySQL.
+    """
+    invalidate_subscription_cache(user_id)
+    return {"message": "Caché de suscripción invalidada", "user_id": user_id}
+
+
+@router.post("/users/{user_id}")
+async def user_changed(
+    user_id: str,
+    current_user: Dict = Depends(require_admin_role)
+):
+    """
+    Notifica un cambio en los datos de un usuario (email verificado, rol, perfil).
+
+    **Requiere autenticación JWT con rol ADMIN** (lo llama el backend de Laravel).
+    """
+    invalidate_cached_user(user_id)
+    return {"message": "Caché de usuario invalidada", "user_id": user_id}
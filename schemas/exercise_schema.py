@@ -187,6 +187,14 @@ class Exercise(BaseModel):
     )
 
 
+class ExerciseBatch(BaseModel):
+    """Salida estructurada del modo batch: todos los ejercicios en una sola llamada"""
+    exercises: List[Exercise] = Field(
+        ...,
+        description="Ejercicios generados, en el orden de los enfoques pedidos"
+    )
+
+
 class GenerateExercisesResponse(BaseModel):
     """Respuesta con ejercicios estoicos personalizados"""
     user_profile_summary: str = Field(
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: resolución de dependencias de /auth/me con y sin caché de tokens.
+
+Mide get_current_user + handler get_me sobre el mismo token, con la fila del
+usuario ya en caché para aislar el coste de verificar el JWT.
+
+Uso:
+    python scripts/bench_auth_me.py --iterations 20000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from core.enviroment import env
+from core.middleware import jwt_middleware
+from routes.auth_routes import get_me
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def _fake_user_row() -> dict:
+    now = datetime.now()
+    return {
+        "id": USER_ID,
+        "nombre": "Marco",
+        "apellidos": "Aurelio",
+        "email": "marco@example.com",
+        "email_verificado": True,
+        "avatar": None,
+        "auth_provider": "local",
+        "is_admin": False,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+async def _resolve(credentials: HTTPAuthorizationCredentials):
+    current_user = await jwt_middleware.get_current_user(credentials)
+    return await get_me(current_user)
+
+
+async def _run(iterations: int, use_token_cache: bool) -> float:
+    token = jwt.encode(
+        {"user_id": USER_ID, "exp": int(time.time()) + 3600},
+        env.JWT_SECRET,
+        algorithm=env.JWT_ALGORITHM,
+    )
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    jwt_middleware.token_cache.invalidate()
+    jwt_middleware.user_cache.set(USER_ID, _fake_user_row(), ttl=3600)
+
+    await _resolve(credentials)  # calentamiento
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if not use_token_cache:
+            jwt_middleware.token_cache.invalidate()
+        await _resolve(credentials)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    for label, use_cache in (("sin caché de tokens", False), ("con caché de tokens", True)):
+        elapsed = asyncio.run(_run(args.iterations, use_cache))
+        per_call_us = elapsed / args.iterations * 1e6
+        print(f"{label:22s} {per_call_us:8.2f} µs/req  ({args.iterations / elapsed:,.0f} req/s)")
+
+    print(f"token_cache: {jwt_middleware.token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
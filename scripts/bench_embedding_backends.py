@@ -0,0 +1,88 @@
+"""
+Benchmark: frases por segundo de cada backend de embeddings (torch, onnx,
+onnx_int8) en CPU.
+
+Mide los dos usos del modelo: ingesta (embed_documents de chunks en lotes de
+--batch-size) y consultas (embed_query de una en una), más la memoria que
+añade cargar cada backend. Con --pdf usa chunks reales; si no, queries de
+perfiles arquetipo repetidas.
+
+Uso:
+    python scripts/bench_embedding_backends.py [--backend torch onnx onnx_int8]
+        [--pdf libro.pdf] [--sentences 512] [--batch-size 32] [--model ...]
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.llm.archetypes import archetype_queries
+from core.llm.chunking import split_pdf
+from core.llm.embedding_backends import EMBEDDING_BACKENDS, build_embeddings
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss va en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rate(fn, items: list[str]) -> float:
+    started = time.perf_counter()
+    fn(items)
+    return len(items) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", nargs="+", choices=EMBEDDING_BACKENDS, default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--pdf", type=Path, action="append", help="PDF del que sacar los chunks de la ingesta")
+    parser.add_argument("--sentences", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--model", default=os.environ.get("EMBEDDING_MODEL"))
+    parser.add_argument("--export-dir", default=os.environ.get("EMBEDDING_EXPORT_DIR", ".embedding_models"))
+    parser.add_argument("--quantization", default=os.environ.get("EMBEDDING_QUANTIZATION", "avx2"))
+    args = parser.parse_args()
+    if not args.model:
+        parser.error("Indica --model o EMBEDDING_MODEL")
+
+    queries = archetype_queries(max_paths=1, max_challenges=1)
+    if args.pdf:
+        documents = [chunk for pdf in args.pdf for chunk in split_pdf(pdf)]
+    else:
+        documents = queries
+    documents = (documents * (args.sentences // len(documents) + 1))[:args.sentences]
+    queries = (queries * (args.sentences // len(queries) + 1))[:args.sentences]
+
+    def ingest(embeddings):
+        def run(items):
+            for start in range(0, len(items), args.batch_size):
+                embeddings.embed_documents(items[start:start + args.batch_size])
+        return run
+
+    def query(embeddings):
+        def run(items):
+            for item in items:
+                embeddings.embed_query(item)
+        return run
+
+    print(f"{'backend':>10} | {'ingesta frases/s':>16} | {'queries/s':>10} | {'RSS +MB':>8}")
+    for backend in args.backend:
+        # ru_maxrss es el pico del proceso: tras el primer backend la cifra es aproximada
+        # (para medirla exacta, un backend por ejecución)
+        rss_before = _max_rss_mb()
+        embeddings = build_embeddings(args.model, backend, args.export_dir, args.quantization)
+        embeddings.embed_documents(documents[:args.batch_size])  # calentar
+        rss_added = _max_rss_mb() - rss_before
+
+        ingest_rate = _rate(ingest(embeddings), documents)
+        query_rate = _rate(query(embeddings), queries)
+        print(f"{backend:>10} | {ingest_rate:>16.1f} | {query_rate:>10.1f} | {rss_added:>8.0f}")
+        del embeddings
+
+
+if __name__ == "__main__":
+    main()
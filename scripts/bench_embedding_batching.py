@@ -0,0 +1,91 @@
+"""
+Benchmark: embeddings de consultas concurrentes llamada a llamada (un forward
+de tamaño 1 por hilo) vs EmbeddingBatcher (un forward por lote).
+
+Para cada nivel de concurrencia lanza --requests consultas distintas (queries de
+perfiles arquetipo, sin caché) desde ese número de hilos, como hacen los SSE al
+arrancar a la vez, y mide consultas/s y latencia p50/p95 de cada camino.
+Solo necesita el modelo de embeddings local (EMBEDDING_MODEL o --model).
+
+Uso:
+    python scripts/bench_embedding_batching.py [--concurrency 1 8 32 64]
+        [--requests 256] [--window-ms 5] [--max-batch 32] [--model ...]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from core.llm.archetypes import archetype_queries
+from core.llm.embedding_batcher import EmbeddingBatcher
+
+
+def _measure(embeddings, queries: list[str], concurrency: int) -> dict:
+    latencies = []
+
+    def embed(query: str):
+        started = time.perf_counter()
+        embeddings.embed_query(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(embed, queries))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "qps": len(queries) / wall,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=256, help="Consultas por nivel de concurrencia")
+    parser.add_argument("--window-ms", type=float, default=5)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--model", default=os.environ.get("EMBEDDING_MODEL"))
+    args = parser.parse_args()
+    if not args.model:
+        parser.error("Indica --model o EMBEDDING_MODEL")
+
+    embeddings = HuggingFaceEmbeddings(model_name=args.model)
+    batcher = EmbeddingBatcher(embeddings, window=args.window_ms / 1000, max_batch=args.max_batch)
+
+    # Consultas distintas en cada medición: nada se beneficia de cachés
+    queries = archetype_queries(max_paths=2, max_challenges=2)
+    if len(queries) < args.requests * len(args.concurrency) * 2 + 8:
+        parser.error(f"--requests demasiado alto: solo hay {len(queries)} queries distintas")
+    embeddings.embed_documents(queries[:8])  # calentar el modelo
+    offset = 8
+
+    print(f"{'concurrencia':>12} | {'por llamada q/s':>15} {'p50':>8} {'p95':>8} | "
+          f"{'micro-batch q/s':>15} {'p50':>8} {'p95':>8} | {'x':>5}")
+    for concurrency in args.concurrency:
+        per_call_queries = queries[offset:offset + args.requests]
+        batched_queries = queries[offset + args.requests:offset + 2 * args.requests]
+        offset += 2 * args.requests
+
+        per_call = _measure(embeddings, per_call_queries, concurrency)
+        batched = _measure(batcher, batched_queries, concurrency)
+        print(
+            f"{concurrency:>12} | {per_call['qps']:>15.1f} {per_call['p50_ms']:>7.1f}ms {per_call['p95_ms']:>7.1f}ms | "
+            f"{batched['qps']:>15.1f} {batched['p50_ms']:>7.1f}ms {batched['p95_ms']:>7.1f}ms | "
+            f"{batched['qps'] / per_call['qps']:>5.2f}"
+        )
+
+    print(f"\nLotes: {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
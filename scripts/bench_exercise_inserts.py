@@ -0,0 +1,74 @@
+"""
+Benchmark: inserción de ejercicios fila a fila vs ExerciseRepository.create_exercises_batch.
+
+Inserta 5/50/500 ejercicios para un usuario existente por cada camino, mide el
+tiempo total y borra las filas creadas al terminar. Requiere MySQL accesible
+con la configuración del .env.
+
+Uso:
+    python scripts/bench_exercise_inserts.py --user-id <uuid> [--sizes 5 50 500] [--repeat 3]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.db.exercise_repository import ExerciseRepository
+
+SAMPLE_EXERCISE = {
+    "name": "Benchmark - Dicotomía del control",
+    "level": "principiante",
+    "objective": "Distinguir lo que depende de ti",
+    "instructions": "Anota tres situaciones del día y separa lo controlable de lo que no.",
+    "duration": "1 día",
+    "reflection": "¿Qué parte de tu inquietud dependía realmente de ti?",
+    "source": "De Enchiridion - Epicteto, I",
+}
+
+
+def _loop_insert(repo: ExerciseRepository, user_id: str, exercises) -> list:
+    return [repo.create_exercise(user_id, exercise) for exercise in exercises]
+
+
+def _batch_insert(repo: ExerciseRepository, user_id: str, exercises) -> list:
+    return repo.create_exercises_batch(user_id, exercises)
+
+
+def _cleanup(repo: ExerciseRepository, ids: list):
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        repo.execute(f"DELETE FROM user_exercises WHERE id IN ({placeholders})", tuple(chunk))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", required=True, help="UUID de un usuario existente (FK de user_exercises)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    repo = ExerciseRepository()
+
+    print(f"{'filas':>6} {'fila a fila (ms)':>18} {'batch (ms)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        exercises = [dict(SAMPLE_EXERCISE, name=f"{SAMPLE_EXERCISE['name']} #{i}") for i in range(size)]
+        timings = {"loop": [], "batch": []}
+
+        for _ in range(args.repeat):
+            for label, insert in (("loop", _loop_insert), ("batch", _batch_insert)):
+                started = time.perf_counter()
+                ids = insert(repo, args.user_id, exercises)
+                timings[label].append((time.perf_counter() - started) * 1000)
+                _cleanup(repo, ids)
+
+        loop_ms = statistics.median(timings["loop"])
+        batch_ms = statistics.median(timings["batch"])
+        print(f"{size:>6} {loop_ms:>18.1f} {batch_ms:>12.1f} {loop_ms / batch_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: generación de N ejercicios con una llamada por ejercicio vs una sola
+llamada batch con salida estructurada (EXERCISE_GENERATION_MODE=batch).
+
+Para el mismo perfil y el mismo contexto RAG mide tokens de prompt/completion
+(usage_metadata de OpenAI), coste estimado y tiempo total de cada modo.
+Requiere OPENAI_API_KEY y, salvo con --no-rag, PostgreSQL con pgvector.
+
+Uso:
+    python scripts/bench_generation_modes.py [--exercises 5] [--repeat 3]
+        [--input-price 0.15] [--output-price 0.60] [--no-rag]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.enviroment import env
+from core.llm.llm_pipe import llm_pipe
+
+SAMPLE_PROFILE = {
+    "age_range": "26-35",
+    "gender": None,
+    "country": "México",
+    "belief": "ninguna",
+    "practice_level": "principiante",
+    "practice_frequency": "ocasionalmente",
+    "daily_challenges": ["ansiedad", "procrastinacion"],
+    "stoic_paths": ["control_emocional", "disciplina"],
+    "stoic_level": "principiante",
+}
+
+SAMPLE_CONTEXT = (
+    "De las cosas existentes, unas dependen de nosotros y otras no dependen de nosotros. "
+    "Dependen de nosotros el juicio, el impulso, el deseo y la aversión; no dependen de "
+    "nosotros el cuerpo, la hacienda, la reputación y los cargos."
+)
+
+
+def _usage(message) -> tuple[int, int]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+async def _run_per_exercise(profile, total, context_text, source_file) -> dict:
+    """Mismo camino que agenerate_exercises en modo per_exercise, leyendo el uso de tokens"""
+    semaphore = asyncio.Semaphore(env.LLM_MAX_CONCURRENCY)
+
+    async def generate(exercise_number: int):
+        prompt = llm_pipe._build_single_exercise_prompt(
+            user_profile=profile,
+            exercise_number=exercise_number,
+            total_exercises=total,
+            context=context_text,
+            source_file=source_file,
+        )
+        async with semaphore:
+            return await llm_pipe.llm.ainvoke(prompt)
+
+    responses = await asyncio.gather(*(generate(i) for i in range(1, total + 1)))
+    usages = [_usage(resp) for resp in responses]
+    return {
+        "calls": total,
+        "exercises": total,
+        "input_tokens": sum(u[0] for u in usages),
+        "output_tokens": sum(u[1] for u in usages),
+    }
+
+
+async def _run_batch(profile, total, context_text, source_file) -> dict:
+    result = await llm_pipe._ainvoke_exercise_batch(profile, total, context_text, source_file)
+    parsed = result.get("parsed")
+    input_tokens, output_tokens = _usage(result.get("raw"))
+    return {
+        "calls": 1,
+        "exercises": len(parsed.exercises) if parsed else 0,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+    }
+
+
+async def _measure(run, *args) -> dict:
+    started = time.perf_counter()
+    stats = await run(*args)
+    stats["wall_ms"] = (time.perf_counter() - started) * 1000
+    return stats
+
+
+def _cost(stats: dict, input_price: float, output_price: float) -> float:
+    return (stats["input_tokens"] * input_price + stats["output_tokens"] * output_price) / 1_000_000
+
+
+async def _main(args):
+    if args.no_rag:
+        context_text, source_file = SAMPLE_CONTEXT, "Enchiridion - Epicteto"
+    else:
+        context_text, source_file = llm_pipe.get_stoic_context(SAMPLE_PROFILE)
+    print(f"Contexto RAG: {len(context_text)} caracteres ({source_file})")
+
+    modes = (("per_exercise", _run_per_exercise), ("batch", _run_batch))
+    results = {mode: [] for mode, _ in modes}
+    for _ in range(args.repeat):
+        for mode, run in modes:
+            results[mode].append(await _measure(run, SAMPLE_PROFILE, args.exercises, context_text, source_file))
+
+    print(
+        f"{'modo':>13} {'llamadas':>9} {'ejercicios':>11} {'prompt tok':>11} "
+        f"{'compl. tok':>11} {'coste USD':>10} {'tiempo (ms)':>12}"
+    )
+    for mode, _ in modes:
+        runs = results[mode]
+        median = lambda key: statistics.median(r[key] for r in runs)
+        cost = statistics.median(_cost(r, args.input_price, args.output_price) for r in runs)
+        print(
+            f"{mode:>13} {runs[0]['calls']:>9} {median('exercises'):>11.0f} {median('input_tokens'):>11.0f} "
+            f"{median('output_tokens'):>11.0f} {cost:>10.5f} {median('wall_ms'):>12.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exercises", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--input-price", type=float, default=0.15, help="USD por 1M tokens de prompt")
+    parser.add_argument("--output-price", type=float, default=0.60, help="USD por 1M tokens de completion")
+    parser.add_argument("--no-rag", action="store_true", help="Usar un contexto fijo en lugar de pgvector")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Paridad de un backend de embeddings (onnx / onnx_int8) con el de torch.
+
+Con los chunks de uno o varios PDFs (mismo troceado que ingest_pdf) y las
+queries de los perfiles arquetipo mide:
+- deriva coseno: 1 - cos(v_torch, v_backend) de cada chunk y cada query
+- recall@k frente a los k chunks que devuelve torch para cada query:
+  - mixto: queries con el backend contra los chunks embebidos con torch
+    (cambiar EMBEDDING_BACKEND sin volver a ingerir los PDFs)
+  - reingestado: queries y chunks con el backend
+
+Termina con código 1 si algún recall queda por debajo de --min-recall.
+
+Uso:
+    python scripts/embedding_parity.py --pdf libro.pdf [--pdf otro.pdf]
+        [--backend onnx_int8] [--queries 200] [--k 5] [--min-recall 0.95] [--model ...]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.llm.archetypes import archetype_queries
+from core.llm.chunking import split_pdf
+from core.llm.embedding_backends import EMBEDDING_BACKENDS, build_embeddings
+
+
+def _queries(count: int) -> list[str]:
+    """Queries de los perfiles arquetipo, repartidas por todo el espacio (no solo el primer nivel)"""
+    queries = archetype_queries(max_paths=2, max_challenges=1)
+    step = max(1, len(queries) // count)
+    return queries[::step][:count]
+
+
+def _normalized(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _drift(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    drift = 1.0 - np.sum(reference * candidate, axis=1)
+    return {
+        "mean": float(drift.mean()),
+        "p95": float(np.percentile(drift, 95)),
+        "max": float(drift.max()),
+    }
+
+
+def _top_k(queries: np.ndarray, chunks: np.ndarray, k: int) -> np.ndarray:
+    # Similitud coseno (la distancia por defecto de PGVector) con vectores normalizados
+    return np.argsort(-(queries @ chunks.T), axis=1)[:, :k]
+
+
+def _recall(expected: np.ndarray, got: np.ndarray) -> float:
+    k = expected.shape[1]
+    hits = [len(set(e) & set(g)) / k for e, g in zip(expected.tolist(), got.tolist())]
+    return float(np.mean(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", type=Path, action="append", required=True, help="PDF con el que construir el corpus")
+    parser.add_argument("--backend", choices=[b for b in EMBEDDING_BACKENDS if b != "torch"], default="onnx_int8")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--model", default=os.environ.get("EMBEDDING_MODEL"))
+    parser.add_argument("--export-dir", default=os.environ.get("EMBEDDING_EXPORT_DIR", ".embedding_models"))
+    parser.add_argument("--quantization", default=os.environ.get("EMBEDDING_QUANTIZATION", "avx2"))
+    args = parser.parse_args()
+    if not args.model:
+        parser.error("Indica --model o EMBEDDING_MODEL")
+
+    chunks = [chunk for pdf in args.pdf for chunk in split_pdf(pdf)]
+    queries = _queries(args.queries)
+    if len(chunks) <= args.k:
+        parser.error(f"El corpus tiene {len(chunks)} chunks; hacen falta más de k={args.k}")
+    print(f"Corpus: {len(chunks)} chunks, {len(queries)} queries, backend {args.backend}")
+
+    reference = build_embeddings(args.model, "torch")
+    candidate = build_embeddings(args.model, args.backend, args.export_dir, args.quantization)
+
+    ref_chunks = _normalized(reference.embed_documents(chunks))
+    ref_queries = _normalized([reference.embed_query(q) for q in queries])
+    cand_chunks = _normalized(candidate.embed_documents(chunks))
+    cand_queries = _normalized([candidate.embed_query(q) for q in queries])
+
+    expected = _top_k(ref_queries, ref_chunks, args.k)
+    recall_mixed = _recall(expected, _top_k(cand_queries, ref_chunks, args.k))
+    recall_reindexed = _recall(expected, _top_k(cand_queries, cand_chunks, args.k))
+
+    for name, drift in (("chunks", _drift(ref_chunks, cand_chunks)), ("queries", _drift(ref_queries, cand_queries))):
+        print(f"Deriva coseno {name:<8} media {drift['mean']:.5f}  p95 {drift['p95']:.5f}  máx {drift['max']:.5f}")
+    print(f"recall@{args.k} mixto (queries {args.backend}, chunks torch): {recall_mixed:.4f}")
+    print(f"recall@{args.k} reingestado (todo {args.backend}):          {recall_reindexed:.4f}")
+
+    if min(recall_mixed, recall_reindexed) < args.min_recall:
+        print(f"✗ recall por debajo de {args.min_recall}")
+        sys.exit(1)
+    print("✓ paridad dentro del umbral")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Mide los tokens de prompt por ejercicio del prompt actual (system estático +
+mensaje de usuario) frente al prompt de una revisión anterior de llm_pipe.py.
+
+El prompt "antes" se reconstruye sacando LlmPipe._build_single_exercise_prompt de
+la revisión indicada (por defecto el commit inicial del repositorio). No llama
+al LLM: solo tokeniza con tiktoken. Informa también de cuántos tokens forman el
+prefijo estable que el proveedor puede cachear entre los N ejercicios.
+
+Uso:
+    python scripts/measure_prompt_tokens.py [--exercises 5] [--context-chars 4000]
+        [--baseline-rev <rev>]
+"""
+import argparse
+import ast
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import tiktoken
+
+from core.enviroment import env
+from core.llm.prompts import FOCUS_AREAS, SINGLE_EXERCISE_SYSTEM_PROMPT, build_single_exercise_messages
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SAMPLE_PROFILE = {
+    "age_range": "26-35",
+    "country": "México",
+    "belief": "ninguna",
+    "practice_level": "principiante",
+    "practice_frequency": "ocasionalmente",
+    "daily_challenges": ["ansiedad", "procrastinacion"],
+    "stoic_paths": ["control_emocional", "disciplina"],
+    "stoic_level": "principiante",
+}
+
+SAMPLE_PARAGRAPH = (
+    "De las cosas existentes, unas dependen de nosotros y otras no dependen de nosotros. "
+    "Dependen de nosotros el juicio, el impulso, el deseo y la aversión; no dependen de "
+    "nosotros el cuerpo, la hacienda, la reputación y los cargos. "
+)
+
+# Tokens extra que añade el formato de chat por mensaje (aproximación de OpenAI)
+TOKENS_PER_MESSAGE = 4
+
+
+def _encoding():
+    try:
+        return tiktoken.encoding_for_model(env.OPENAI_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _baseline_builder(rev: str):
+    """Extrae _build_single_exercise_prompt de llm_pipe.py en la revisión `rev`"""
+    source = subprocess.run(
+        ["git", "show", f"{rev}:core/llm/llm_pipe.py"],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.FunctionDef) and node.name == "_build_single_exercise_prompt":
+            namespace = {"Dict": Dict, "FOCUS_AREAS": FOCUS_AREAS}
+            exec(textwrap.dedent(ast.get_source_segment(source, node)), namespace)
+            return namespace["_build_single_exercise_prompt"]
+
+    raise SystemExit(f"{rev} no tiene LlmPipe._build_single_exercise_prompt")
+
+
+def _common_prefix(a: list, b: list) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exercises", type=int, default=5)
+    parser.add_argument("--context-chars", type=int, default=4000, help="Tamaño aproximado del contexto RAG")
+    parser.add_argument("--baseline-rev", default=None, help="Revisión del prompt 'antes' (por defecto el commit inicial)")
+    args = parser.parse_args()
+
+    rev = args.baseline_rev or subprocess.run(
+        ["git", "rev-list", "--max-parents=0", "HEAD"],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout.split()[0]
+
+    encoding = _encoding()
+    context = (SAMPLE_PARAGRAPH * (args.context_chars // len(SAMPLE_PARAGRAPH) + 1))[:args.context_chars]
+    source_file = "Enchiridion - Epicteto"
+    baseline = _baseline_builder(rev)
+
+    before, after = [], []
+    for exercise_number in range(1, args.exercises + 1):
+        prompt = baseline(None, SAMPLE_PROFILE, exercise_number, args.exercises, context, source_file)
+        before.append(encoding.encode(prompt))
+
+        messages = build_single_exercise_messages(
+            SAMPLE_PROFILE, exercise_number, args.exercises, context, source_file,
+            FOCUS_AREAS[(exercise_number - 1) % len(FOCUS_AREAS)]
+        )
+        # Aproximación del prompt tal y como se serializa: mensajes en orden
+        tokens = []
+        for message in messages:
+            tokens += [-1] * TOKENS_PER_MESSAGE + encoding.encode(message.content)
+        after.append(tokens)
+
+    def report(label, prompts):
+        total = sum(len(p) for p in prompts)
+        shared = min(_common_prefix(prompts[0], p) for p in prompts[1:]) if len(prompts) > 1 else 0
+        print(
+            f"{label:>8} {total / len(prompts):>14.0f} {total:>12} "
+            f"{shared:>15} {total - shared * (len(prompts) - 1):>18}"
+        )
+
+    print(f"Modelo: {env.OPENAI_MODEL} | contexto: {len(context)} caracteres | antes: {rev[:10]}")
+    print(f"System estático: {len(encoding.encode(SINGLE_EXERCISE_SYSTEM_PROMPT))} tokens")
+    print(f"{'prompt':>8} {'tok/ejercicio':>14} {'tok totales':>12} {'prefijo común':>15} {'tok no cacheables':>18}")
+    report("antes", before)
+    report("después", after)
+
+
+if __name__ == "__main__":
+    main()
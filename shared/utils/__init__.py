@@ -1 +1 @@
-from .quizz_user import get_quizz_user_by_id
+from .quizz_user import get_quizz_user_by_id, aget_quizz_user_by_id
@@ -0,0 +1,214 @@
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+from core.db import repository
+from core.db.executor import run_in_db_thread
+from shared.utils.quizz_user import _normalize_quiz
+from shared.utils.cache import MISSING
+from shared.utils.singleflight import SingleFlight
+from shared.utils.subscription import active_subscription_condition, cache_subscription, subscription_cache
+
+# Columnas de la suscripción más reciente (alias s); misma lógica de "activa"
+# que get_user_subscription y los segundos que le quedan para su caché
+_SUBSCRIPTION_COLUMNS = f"""
+        s.id AS subscription_id,
+        s.user_id AS subscription_user_id,
+        s.plan_name,
+        s.status AS subscription_status,
+        s.current_period_start,
+        s.current_period_end,
+        s.trial_start,
+        s.trial_end,
+        s.cancelled_at,
+        s.ends_at,
+        CASE
+            WHEN {active_subscription_condition("s")}
+            THEN 1
+            ELSE 0
+        END AS has_active_subscription,
+        TIMESTAMPDIFF(SECOND, NOW(), s.current_period_end) AS seconds_to_period_end,
+        TIMESTAMPDIFF(SECOND, NOW(), s.ends_at) AS seconds_to_ends_at,
+"""
+
+_SUBSCRIPTION_JOIN = """
+    LEFT JOIN (
+        SELECT * FROM subscriptions
+        WHERE user_id = %s
+        ORDER BY created_at DESC
+        LIMIT 1
+    ) AS s ON TRUE
+"""
+
+
+def _context_query(with_subscription: bool) -> str:
+    """
+    Quiz y contadores de ejercicios (y la suscripción si no está en caché)
+    en un solo round trip
+    """
+    return f"""
+    SELECT
+        {_SUBSCRIPTION_COLUMNS if with_subscription else ""}
+        q.user_id AS quiz_user_id,
+        q.age_range,
+        q.gender,
+        q.country,
+        q.religious_belief,
+        q.spiritual_practice_level,
+        q.spiritual_practice_frequency,
+        q.stoic_level,
+        q.stoic_paths,
+        q.daily_challenges,
+
+        (
+            SELECT COUNT(*) FROM user_exercises
+            WHERE user_id = %s AND status IN ('pending', 'in_progress')
+        ) AS pending_count,
+        (
+            SELECT COUNT(*) FROM user_exercises
+            WHERE user_id = %s AND status = 'completed'
+        ) AS completed_count,
+        (
+            SELECT COUNT(*) FROM user_exercises
+            WHERE user_id = %s AND status = 'queued'
+        ) AS queued_count
+    FROM (SELECT 1) AS one
+    {_SUBSCRIPTION_JOIN if with_subscription else ""}
+    LEFT JOIN (
+        SELECT * FROM user_quiz_responses
+        WHERE user_id = %s
+        LIMIT 1
+    ) AS q ON TRUE
+"""
+
+
+_CONTEXT_QUERY = _context_query(with_subscription=True)
+_CONTEXT_QUERY_CACHED_SUBSCRIPTION = _context_query(with_subscription=False)
+
+context_lookups = SingleFlight()
+
+_QUIZ_COLUMNS = (
+    "age_range",
+    "gender",
+    "country",
+    "religious_belief",
+    "spiritual_practice_level",
+    "spiritual_practice_frequency",
+    "stoic_level",
+    "stoic_paths",
+    "daily_challenges",
+)
+
+
+@dataclass
+class UserGenerationContext:
+    """Todo lo que se necesita consultar antes de generar ejercicios para un usuario"""
+
+    user_id: str
+    subscription: Optional[Dict]
+    quiz: Optional[Dict]
+    pending_count: int
+    completed_count: int
+    queued_count: int = 0  # pregenerados, aún ocultos
+
+    @property
+    def has_active_subscription(self) -> bool:
+        return bool(self.subscription and self.subscription.get("has_active_subscription"))
+
+
+def load_user_generation_context(user_id: str) -> UserGenerationContext:
+    """
+    Carga suscripción, quiz y contadores de ejercicios pendientes/completados
+    del usuario con una sola consulta.
+
+    Comparte la caché de get_user_subscription: si la suscripción está cacheada
+    no se consulta, y si no, la leída la refresca.
+    """
+    if not user_id:
+        raise ValueError("user_id es requerido")
+
+    # Suscripción cacheada (ver get_user_subscription): la consulta no la vuelve a leer
+    subscription = subscription_cache.get(user_id)
+    if subscription is not MISSING:
+        row = repository.fetch_one(_CONTEXT_QUERY_CACHED_SUBSCRIPTION, (user_id, user_id, user_id, user_id))
+    else:
+        row = repository.fetch_one(_CONTEXT_QUERY, (user_id, user_id, user_id, user_id, user_id))
+        subscription = None
+        if row["subscription_id"] is not None:
+            subscription = {
+                "id": row["subscription_id"],
+                "user_id": row["subscription_user_id"],
+                "plan_name": row["plan_name"],
+                "status": row["subscription_status"],
+                "current_period_start": row["current_period_start"],
+                "current_period_end": row["current_period_end"],
+                "trial_start": row["trial_start"],
+                "trial_end": row["trial_end"],
+                "cancelled_at": row["cancelled_at"],
+                "ends_at": row["ends_at"],
+                "has_active_subscription": row["has_active_subscription"],
+                "seconds_to_period_end": row["seconds_to_period_end"],
+                "seconds_to_ends_at": row["seconds_to_ends_at"],
+            }
+        subscription = cache_subscription(user_id, subscription)
+
+    quiz = None
+    if row["quiz_user_id"] is not None:
+        quiz = _normalize_quiz({"user_id": row["quiz_user_id"], **{c: row[c] for c in _QUIZ_COLUMNS}})
+
+    return UserGenerationContext(
+        user_id=user_id,
+        subscription=subscription,
+        quiz=quiz,
+        pending_count=int(row["pending_count"] or 0),
+        completed_count=int(row["completed_count"] or 0),
+        queued_count=int(row["queued_count"] or 0),
+    )
+
+
+async def aload_user_generation_context(user_id: str, coalesce: bool = True) -> UserGenerationContext:
+    """
+    Variante async: ejecuta la consulta en el executor de MySQL.
+
+    Las cargas concurrentes del mismo usuario comparten una sola consulta; cada
+    llamador recibe su propia copia (los contadores se modifican después).
+    Con coalesce=False se lee siempre de nuevo: para leer justo después de una
+    escritura propia, que una consulta ya en curso no vería.
+    """
+    if not coalesce:
+        return await run_in_db_thread(load_user_generation_context, user_id)
+    context = await context_lookups.ado(user_id, run_in_db_thread, load_user_generation_context, user_id)
+    return replace(context)
+
+
+def build_user_profile(quiz: Dict, num_exercises: int):
+    """Convierte el quiz de BD en StoicQuizRequest y en el perfil que usa LlmPipe"""
+    # Importar aquí para evitar dependencias circulares
+    from schemas.exercise_schema import StoicQuizRequest
+
+    user_quiz = StoicQuizRequest(
+        age_range=quiz["age_range"],
+        gender=quiz.get("gender"),
+        country=quiz.get("country"),
+        religious_belief=quiz.get("religious_belief"),
+        spiritual_practice_level=quiz["spiritual_practice_level"],
+        spiritual_practice_frequency=quiz["spiritual_practice_frequency"],
+        stoic_level=quiz.get("stoic_level") or "principiante",
+        stoic_paths=quiz.get("stoic_paths") or [],
+        daily_challenges=quiz.get("daily_challenges") or [],
+        num_exercises=num_exercises
+    )
+
+    user_profile = {
+        "age_range": user_quiz.age_range,
+        "gender": user_quiz.gender,
+        "country": user_quiz.country,
+        "belief": user_quiz.religious_belief,
+        "practice_level": user_quiz.spiritual_practice_level,
+        "practice_frequency": user_quiz.spiritual_practice_frequency,
+        "daily_challenges": user_quiz.daily_challenges,
+        "stoic_paths": user_quiz.stoic_paths,
+        "stoic_level": user_quiz.stoic_level,
+        "num_exercises": num_exercises
+    }
+
+    return user_quiz, user_profile
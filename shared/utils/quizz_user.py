@@ -1,6 +1,11 @@
 from core.db import repository
+from core.db.executor import run_in_db_thread
+from shared.utils.singleflight import SingleFlight
 import json
 
+quiz_lookups = SingleFlight()
+
+
 def _normalize_quiz(quiz: dict) -> dict:
     if not quiz:
         return quiz
@@ -27,5 +32,15 @@ def get_quizz_user_by_id(user_id: str):
         LIMIT 1
     """
 
+    # Peticiones concurrentes del mismo usuario comparten una sola consulta
+    return quiz_lookups.do(user_id, _load_quiz, query, user_id)
+
+
+def _load_quiz(query: str, user_id: str):
     quiz = repository.fetch_one(query, (user_id,))
     return _normalize_quiz(quiz)
+
+
+async def aget_quizz_user_by_id(user_id: str):
+    """Variante async: ejecuta la consulta en el executor de MySQL"""
+    return await quiz_lookups.ado(user_id, run_in_db_thread, get_quizz_user_by_id, user_id)
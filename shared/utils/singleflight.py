@@ -0,0 +1,97 @@
+import asyncio
+import contextvars
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """Llamada en curso compartida por todos los que piden la misma clave"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalescencia de peticiones concurrentes idénticas (single-flight).
+
+    Mientras hay una consulta en curso para una clave, el resto de llamadas
+    con esa clave esperan su resultado en lugar de lanzar otra.
+
+    - do(): camino síncrono (entre hilos)
+    - ado(): camino async (entre corrutinas del mismo event loop)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def ado(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        task = self._tasks.get(key)
+        if task is not None:
+            with self._lock:
+                self._coalesced += 1
+        else:
+            # La consulta corre en su propia task: si el primer llamador se
+            # cancela (cliente desconectado) el resto sigue recibiendo el resultado.
+            # Y en un contexto vacío: no hereda la sesión MySQL del primer llamador,
+            # cuya conexión vuelve al pool al cerrar su asession()
+            task = contextvars.Context().run(asyncio.ensure_future, fn(*args, **kwargs))
+            self._tasks[key] = task
+            with self._lock:
+                self._executed += 1
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Evita el aviso de "exception never retrieved" si todos se cancelaron
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls) + len(self._tasks),
+            }
@@ -1,8 +1,39 @@
 from core.db import repository
+from core.db.executor import run_in_db_thread
+from shared.utils.singleflight import SingleFlight
+from shared.utils.cache import TTLCache, MISSING
+from core.enviroment import env
+
+subscription_lookups = SingleFlight()
+
+
+def active_subscription_condition(alias: str = "") -> str:
+    """
+    Criterio SQL de suscripción "activa", compartido por get_user_subscription,
+    el contexto de generación y la pregeneración (alias = alias de subscriptions)
+    """
+    t = f"{alias}." if alias else ""
+    return (
+        f"{t}status = 'active'"
+        f" AND ({t}current_period_end IS NULL OR {t}current_period_end > NOW())"
+        f" AND ({t}cancelled_at IS NULL OR {t}ends_at IS NULL OR {t}ends_at > NOW())"
+    )
+
+
+# Caché de suscripciones: cada entrada caduca, como tarde, cuando termina el periodo
+subscription_cache = TTLCache(
+    maxsize=env.SUBSCRIPTION_CACHE_SIZE,
+    ttl=env.SUBSCRIPTION_CACHE_TTL,
+)
+
 
 def get_user_subscription(user_id: str):
     """
     Obtiene la información de suscripción del usuario desde MySQL.
+
+    El resultado se cachea hasta lo que ocurra antes: SUBSCRIPTION_CACHE_TTL,
+    current_period_end o ends_at (si está cancelada), así nunca se sirve una
+    suscripción "activa" después de su fin real.
     
     Args:
         user_id: UUID del usuario
@@ -13,8 +44,12 @@ def get_user_subscription(user_id: str):
     if not user_id:
         raise ValueError("user_id es requerido")
 
+    cached = subscription_cache.get(user_id)
+    if cached is not MISSING:
+        return cached
+
     # Query basada en la estructura real de la tabla subscriptions
-    query = """
+    query = f"""
         SELECT 
             id,
             user_id,
@@ -27,22 +62,64 @@ def get_user_subscription(user_id: str):
             cancelled_at,
             ends_at,
             CASE 
-                WHEN status = 'active' 
-                    AND (current_period_end IS NULL OR current_period_end > NOW())
-                    AND (cancelled_at IS NULL OR ends_at IS NULL OR ends_at > NOW())
+                WHEN {active_subscription_condition()}
                 THEN 1 
                 ELSE 0 
-            END as has_active_subscription
+            END as has_active_subscription,
+            TIMESTAMPDIFF(SECOND, NOW(), current_period_end) as seconds_to_period_end,
+            TIMESTAMPDIFF(SECOND, NOW(), ends_at) as seconds_to_ends_at
         FROM subscriptions
         WHERE user_id = %s
         ORDER BY created_at DESC
         LIMIT 1
     """
 
+    # Peticiones concurrentes del mismo usuario comparten una sola consulta
+    return subscription_lookups.do(user_id, _load_subscription, query, user_id)
+
+
+def _load_subscription(query: str, user_id: str):
     subscription = repository.fetch_one(query, (user_id,))
-    
+    return cache_subscription(user_id, subscription)
+
+
+def cache_subscription(user_id: str, subscription):
+    """
+    Normaliza una fila de suscripción, la guarda en la caché y la devuelve.
+
+    La fila debe incluir seconds_to_period_end y seconds_to_ends_at
+    (calculados con el NOW() de MySQL para no depender de la zona horaria).
+    """
+    ttl = env.SUBSCRIPTION_CACHE_TTL
+
     if subscription:
         subscription["has_active_subscription"] = bool(subscription["has_active_subscription"])
-    
+        seconds_to_period_end = subscription.pop("seconds_to_period_end", None)
+        seconds_to_ends_at = subscription.pop("seconds_to_ends_at", None)
+
+        if subscription["has_active_subscription"]:
+            if seconds_to_period_end is not None:
+                ttl = min(ttl, seconds_to_period_end)
+            if subscription.get("cancelled_at") is not None and seconds_to_ends_at is not None:
+                ttl = min(ttl, seconds_to_ends_at)
+
+    subscription_cache.set(user_id, subscription, ttl=ttl)
     return subscription
 
+
+def invalidate_subscription_cache(user_id: str | None = None):
+    """
+    Descarta la suscripción cacheada de un usuario (o de todos si no se indica user_id).
+
+    Pensada para llamarse desde el webhook de cambios de suscripción. Solo afecta
+    al worker que la recibe; en el resto la entrada expira por TTL o fin de periodo.
+    """
+    subscription_cache.invalidate(user_id)
+
+
+async def aget_user_subscription(user_id: str):
+    """Variante async: ejecuta la consulta en el executor de MySQL"""
+    cached = subscription_cache.get(user_id)
+    if cached is not MISSING:
+        return cached
+    return await subscription_lookups.ado(user_id, run_in_db_thread, get_user_subscription, user_id)
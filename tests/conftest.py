@@ -0,0 +1,15 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# core.enviroment exige estas variables al importarse; los tests no se conectan a nada
+for name in (
+    "RAG_DB_CONN", "PGHOST", "PGUSER", "PGPASSWORD", "PGDATABASE",
+    "MYSQL_HOST", "MYSQL_USER", "MYSQL_PASSWORD", "MYSQL_DATABASE",
+    "OPENAI_API_KEY", "EMBEDDING_MODEL", "JWT_SECRET",
+    "MINIO_ENDPOINT", "MINIO_ACCESS_KEY", "MINIO_SECRET_KEY", "MINIO_BUCKET",
+):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("PGPORT", "5432")
@@ -0,0 +1,26 @@
+from core.llm.archetypes import archetype_queries, build_search_query, enumerate_archetypes
+from schemas.exercise_schema import DailyChallenge, StoicLevel, StoicPath
+
+
+def test_variants_and_order_give_the_same_query():
+    canonical = {
+        "stoic_level": StoicLevel.BEGINNER,
+        "stoic_paths": [StoicPath.INNER_PEACE, StoicPath.COURAGE],
+        "daily_challenges": [DailyChallenge.MORNING_MEDITATION],
+    }
+    variant = {
+        "stoic_level": "principiante",
+        "stoic_paths": [StoicPath.COURAGE_ALT.value, "Paz Interior", StoicPath.INNER_PEACE_ALT],
+        "daily_challenges": [DailyChallenge.MEDITATION, DailyChallenge.MEDITATION_ALT],
+    }
+    assert build_search_query(canonical) == build_search_query(variant)
+    assert build_search_query(canonical).startswith("estoicismo filosofía ")
+
+
+def test_archetype_queries_are_distinct_and_follow_the_enumeration():
+    queries = archetype_queries(max_paths=1, max_challenges=1)
+    profiles = list(enumerate_archetypes(max_paths=1, max_challenges=1))
+
+    assert len(queries) == len(set(queries))
+    assert queries[0] == build_search_query(profiles[0])
+    assert set(queries) == {build_search_query(p) for p in profiles}
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.llm.embedding_batcher import EmbeddingBatcher
+
+
+class _Embeddings:
+    """Embeddings de juguete: el vector es la longitud del texto"""
+
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+
+    def embed_documents(self, texts):
+        if self.gate:
+            self.gate.wait(1)
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_batches_and_deduplicates_concurrent_queries():
+    embeddings = _Embeddings(gate=threading.Event())
+    batcher = EmbeddingBatcher(embeddings, window=0.05)
+
+    futures = [batcher.submit(t) for t in ("a", "bb", "a")]
+    embeddings.gate.set()
+
+    assert [f.result(1) for f in futures] == [[1.0], [2.0], [1.0]]
+    assert embeddings.calls == [["a", "bb"]]
+
+
+def test_cancelled_future_is_skipped_and_batcher_keeps_working():
+    embeddings = _Embeddings()
+    batcher = EmbeddingBatcher(embeddings, window=0.05)
+
+    cancelled = batcher.submit("cancelado")
+    kept = batcher.submit("sigue")
+    assert cancelled.cancel()
+
+    assert kept.result(1) == [5.0]
+    assert embeddings.calls == [["sigue"]]
+    assert batcher.embed_query("otro") == [4.0]
+
+
+def test_cancelled_aembed_query_does_not_kill_the_thread():
+    gate = threading.Event()
+    batcher = EmbeddingBatcher(_Embeddings(gate=gate), window=0)
+
+    async def main():
+        # El primer lote queda bloqueado en el modelo; la segunda consulta espera
+        # en la cola y se cancela antes de que el hilo la procese
+        first = asyncio.ensure_future(batcher.aembed_query("primero"))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(batcher.aembed_query("cancelado"))
+        await asyncio.sleep(0.01)
+        second.cancel()
+        gate.set()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        return await first
+
+    assert asyncio.run(main()) == [7.0]
+    assert batcher.embed_query("despues") == [7.0]
+    assert batcher._thread.is_alive()
+
+
+def test_unexpected_error_fails_the_batch_and_keeps_the_thread():
+    class _Short(_Embeddings):
+        def embed_documents(self, texts):
+            return [] if "roto" in texts else super().embed_documents(texts)
+
+    batcher = EmbeddingBatcher(_Short(), window=0)
+
+    with pytest.raises(KeyError):
+        batcher.embed_query("roto")
+    assert batcher.embed_query("bien") == [4.0]
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from core.llm.embedding_cache import CachedQueryEmbeddings, DiskEmbeddingStore, canonical_query
+
+
+class _CountingEmbeddings(Embeddings):
+    """Modelo falso: vector derivado del texto y recuento de llamadas"""
+
+    def __init__(self, delay=0.0):
+        self.queries = []
+        self.delay = delay
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        time.sleep(self.delay)
+        return [float(len(text)), float(sum(map(ord, text)) % 997), 1.0]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+def test_canonical_query_normalizes_unicode_and_spaces():
+    composed = "filosof\u00eda"
+    decomposed = "filosofi\u0301a"
+    assert composed != decomposed
+    assert canonical_query(f"  estoicismo   {decomposed}\n") == f"estoicismo {composed}"
+
+
+def test_equivalent_queries_hit_the_memory_cache():
+    model = _CountingEmbeddings()
+    cached = CachedQueryEmbeddings(model, maxsize=8)
+
+    first = cached.embed_query("estoicismo  filosofía")
+    assert cached.embed_query("estoicismo filosofía ") == first
+    assert model.queries == ["estoicismo filosofía"]
+    assert cached.stats()["memory_hits"] == 1
+
+
+def test_concurrent_cold_queries_compute_once():
+    model = _CountingEmbeddings(delay=0.05)
+    cached = CachedQueryEmbeddings(model, maxsize=8)
+
+    threads = [threading.Thread(target=cached.embed_query, args=("coraje",)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert model.queries == ["coraje"]
+    assert cached.stats()["computed"] == 1
+
+
+def test_documents_bypass_the_cache():
+    model = _CountingEmbeddings()
+    cached = CachedQueryEmbeddings(model, maxsize=8)
+    cached.embed_documents(["chunk", "chunk"])
+    assert model.queries == ["chunk", "chunk"]
+    assert cached.stats()["lookups"] == 0
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    model = _CountingEmbeddings()
+    vector = CachedQueryEmbeddings(model, maxsize=8, directory=str(tmp_path), model_name="m").embed_query("templanza")
+
+    restarted = CachedQueryEmbeddings(model, maxsize=8, directory=str(tmp_path), model_name="m")
+    assert restarted.embed_query("templanza") == vector
+    assert model.queries == ["templanza"]
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_disk_index_is_discarded_when_the_model_changes(tmp_path):
+    store = DiskEmbeddingStore(str(tmp_path), "modelo-a")
+    store.put("q", [1.0, 2.0])
+
+    assert DiskEmbeddingStore(str(tmp_path), "modelo-a").get("q") == [1.0, 2.0]
+    assert DiskEmbeddingStore(str(tmp_path), "modelo-b").get("q") is None
+
+
+def test_disk_store_grows_past_the_initial_allocation(tmp_path):
+    store = DiskEmbeddingStore(str(tmp_path), "m")
+    rows = DiskEmbeddingStore._GROW_ROWS + 5
+    for i in range(rows):
+        store.put(f"q{i}", [float(i), 0.5])
+
+    reopened = DiskEmbeddingStore(str(tmp_path), "m")
+    assert len(reopened) == rows
+    assert reopened.get(f"q{rows - 1}") == [float(rows - 1), 0.5]
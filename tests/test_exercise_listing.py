@@ -0,0 +1,100 @@
+import asyncio
+import contextlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.db.exercise_repository import ExerciseRepository
+from routes import exercise_routes
+
+NOW = datetime(2026, 3, 1, 8, 0, 0)
+
+
+def _exercise(n):
+    return {
+        "id": f"id-{n:03d}", "exercise_name": f"e{n}", "exercise_level": "principiante",
+        "objective": "", "instructions": "", "duration": "5", "reflection": "", "source": None,
+        "status": "completed", "completed_at": None, "created_at": NOW,
+        "available_at": NOW - timedelta(minutes=n),
+    }
+
+
+class _FakeRepository:
+    """Listado de 7 ejercicios, del más reciente al más antiguo"""
+
+    exercises = [_exercise(n) for n in range(7)]
+
+    async def get_user_exercises(self, user_id, status=None, limit=None, before=None):
+        rows = self.exercises
+        if before:
+            rows = [r for r in rows if (r["available_at"], r["id"]) < before]
+        return rows[:limit] if limit else list(rows)
+
+    async def count_user_exercises(self, user_id, status=None):
+        return len(self.exercises)
+
+    async def get_pending_exercises_count(self, user_id):
+        return 0
+
+
+@pytest.fixture(autouse=True)
+def fake_db(monkeypatch):
+    monkeypatch.setattr(exercise_routes, "AsyncExerciseRepository", _FakeRepository)
+    monkeypatch.setattr(exercise_routes.database, "asession", lambda: _no_session())
+
+
+@contextlib.asynccontextmanager
+async def _no_session():
+    yield
+
+
+def _list(**kwargs):
+    kwargs = {"status": None, "limit": None, "cursor": None, **kwargs}
+    return asyncio.run(exercise_routes.get_user_exercises(current_user={"user_id": "u1"}, **kwargs))
+
+
+def test_without_limit_or_cursor_returns_everything():
+    response = _list()
+    assert len(response["exercises"]) == 7
+    assert response["total"] == 7
+    assert response["next_cursor"] is None
+
+
+def test_pages_report_the_real_total():
+    first = _list(limit=3)
+    assert [e["id"] for e in first["exercises"]] == ["id-000", "id-001", "id-002"]
+    assert first["total"] == 7
+
+    second = _list(limit=3, cursor=first["next_cursor"])
+    assert [e["id"] for e in second["exercises"]] == ["id-003", "id-004", "id-005"]
+    assert second["total"] == 7
+
+    last = _list(limit=3, cursor=second["next_cursor"])
+    assert [e["id"] for e in last["exercises"]] == ["id-006"]
+    assert last["next_cursor"] is None
+
+
+def test_cursor_without_limit_uses_the_default_page_size(monkeypatch):
+    monkeypatch.setattr(exercise_routes, "DEFAULT_PAGE_SIZE", 2)
+    first = _list(limit=2)
+    assert len(_list(cursor=first["next_cursor"])["exercises"]) == 2
+
+
+class _CapturingRepository(ExerciseRepository):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def fetch_one(self, query, params=None):
+        self.calls.append((" ".join(query.split()), params))
+        return {"count": 4}
+
+
+def test_count_uses_the_listing_filter():
+    repo = _CapturingRepository()
+    assert repo.count_user_exercises("u1") == 4
+    assert repo.count_user_exercises("u1", "completed") == 4
+
+    (all_query, all_params), (status_query, status_params) = repo.calls
+    assert "status <> 'queued'" in all_query and all_params == ("u1",)
+    assert "status = %s" in status_query and status_params == ("u1", "completed")
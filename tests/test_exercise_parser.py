@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from core.llm.exercise_parser import ExerciseParseError, ExerciseParser
+
+EXERCISE = {
+    "name": "Premeditatio malorum",
+    "level": "principiante",
+    "objective": "Anticipar la adversidad",
+    "instructions": "Imagina por la mañana lo que puede salir mal, {sin} dramatizar",
+    "duration": "1 semana",
+    "reflection": "¿Qué dependía de ti?",
+    "source": "Séneca",
+}
+
+
+@pytest.fixture
+def parser():
+    return ExerciseParser()
+
+
+def test_parses_clean_json(parser):
+    assert parser.parse(json.dumps(EXERCISE)) == EXERCISE
+    assert parser.stats()["repaired"] == 0
+
+
+@pytest.mark.parametrize("raw", [
+    "```json\n" + json.dumps(EXERCISE) + "\n```",
+    "Aquí tienes el ejercicio:\n" + json.dumps(EXERCISE) + "\nEspero que te sirva.",
+    json.dumps(EXERCISE)[:-1] + ",}",
+])
+def test_repairs_formatting_noise(parser, raw):
+    assert parser.parse(raw) == EXERCISE
+    assert parser.stats()["repaired"] == 1
+
+
+@pytest.mark.parametrize("raw", [
+    json.dumps(EXERCISE)[:-1],                      # falta la llave final
+    json.dumps(EXERCISE)[:-1] + ',\n  "extra": ',   # clave sin valor
+    json.dumps(EXERCISE)[:-1] + ', "extra"',        # clave sin dos puntos
+    json.dumps(EXERCISE)[:-1] + ",",                # coma final
+    "```json\n" + json.dumps(EXERCISE)[:-1],         # bloque sin cerrar
+])
+def test_repairs_truncated_object(parser, raw):
+    assert parser.parse(raw) == EXERCISE
+    assert parser.stats()["repaired"] == 1
+
+
+def test_repairs_truncated_array():
+    text, repaired = ExerciseParser.extract_json('{"a": {"b": ["x", "y"')
+    assert repaired
+    assert json.loads(text) == {"a": {"b": ["x", "y"]}}
+
+
+@pytest.mark.parametrize("raw", [
+    json.dumps(EXERCISE)[:60],                      # cortado a mitad de un string
+    '{"name": "A", "level": ',                      # cortado tras una clave
+    json.dumps(EXERCISE).split(', "reflection"')[0],  # faltan campos
+    "```json\n" + json.dumps(EXERCISE)[:80],         # bloque sin cerrar
+])
+def test_truncated_response_is_not_repaired(parser, raw):
+    with pytest.raises(ExerciseParseError):
+        parser.parse(raw)
+    assert parser.stats()["invalid"] == 1
+
+
+@pytest.mark.parametrize("raw", [
+    "",
+    "No puedo generar el ejercicio.",
+    json.dumps({k: v for k, v in EXERCISE.items() if k != "instructions"}),
+])
+def test_invalid_response_raises(parser, raw):
+    with pytest.raises(ExerciseParseError):
+        parser.parse(raw)
+
+
+def test_retry_and_exhausted_counters(parser):
+    with pytest.raises(ExerciseParseError):
+        parser.parse("nada")
+    parser.record_retry()
+    parser.parse(json.dumps(EXERCISE))
+
+    stats = parser.stats()
+    assert stats["parsed"] == 1
+    assert stats["invalid"] == 1
+    assert stats["retries"] == 1
+    assert stats["retry_rate"] == 0.5
@@ -0,0 +1,137 @@
+import asyncio
+import contextlib
+import json
+import sys
+
+import pytest
+
+import core.llm  # noqa: F401
+from core.llm.exercise_parser import ExerciseParseError
+from routes import exercise_routes
+from shared.utils.generation_context import UserGenerationContext
+
+llm_pipe = sys.modules["core.llm.llm_pipe"].llm_pipe
+
+QUIZ = {"stoic_paths": [], "daily_challenges": []}
+
+
+class _FakeRepository:
+    def __init__(self):
+        self.saved = []
+
+    async def create_exercise(self, user_id, exercise):
+        self.saved.append(exercise["exercise_name"])
+        return f"id-{len(self.saved)}"
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    """Stream con 3 ejercicios por generar; cada test define la generación y el parseo"""
+    context = UserGenerationContext(
+        user_id="u1",
+        subscription={"has_active_subscription": True},
+        quiz=QUIZ,
+        pending_count=2,
+        completed_count=0,
+    )
+
+    async def load_context(user_id, coalesce=True):
+        return context
+
+    async def stoic_context(profile, k=5):
+        return "contexto", "libro.pdf"
+
+    @contextlib.asynccontextmanager
+    async def no_session():
+        yield
+
+    profile = (_Quiz(), {})
+    monkeypatch.setattr(exercise_routes, "aload_user_generation_context", load_context)
+    monkeypatch.setattr(exercise_routes, "build_user_profile", lambda quiz, n: profile)
+    monkeypatch.setattr(exercise_routes.database, "asession", no_session)
+    monkeypatch.setattr(exercise_routes, "AsyncExerciseRepository", _FakeRepository)
+    monkeypatch.setattr(llm_pipe, "aget_stoic_context", stoic_context)
+    return monkeypatch
+
+
+class _Value:
+    value = "x"
+
+
+class _Quiz:
+    """Lo que usa el stream de StoicQuizRequest para el resumen del perfil"""
+
+    stoic_paths = []
+    age_range = spiritual_practice_level = stoic_level = _Value()
+
+
+def _events(monkeypatch):
+    async def collect():
+        response = await exercise_routes.stream_exercises(deltas=False, current_user={"user_id": "u1"})
+        events = []
+        async for chunk in response.body_iterator:
+            kind, data = chunk.strip().split("\n")
+            events.append((kind.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+        return events
+
+    return asyncio.run(collect())
+
+
+def _generation(delays):
+    async def generate(**kwargs):
+        async def one(i):
+            await asyncio.sleep(delays[i])
+            return i, f"raw{i}"
+
+        for task in asyncio.as_completed([one(i) for i in delays]):
+            yield await task
+
+    return generate
+
+
+def test_slow_retry_does_not_hold_back_other_exercises(stream):
+    stream.setattr(llm_pipe, "agenerate_exercises", _generation({1: 0.0, 2: 0.02, 3: 0.04}))
+
+    async def parse(raw, i, **kwargs):
+        if i == 1:
+            await asyncio.sleep(0.2)  # reintento del ejercicio 1
+        return {"exercise_name": f"e{i}"}
+
+    stream.setattr(llm_pipe, "aparse_exercise", parse)
+
+    events = _events(stream)
+    delivered = [data["index"] for kind, data in events if kind == "exercise"]
+    assert delivered == [2, 3, 1]
+    assert events[-1] == ("complete", {"message": "Ejercicios generados y guardados", "total": 3, "failed": 0})
+
+
+def test_failed_exercise_is_reported_and_the_rest_delivered(stream):
+    stream.setattr(llm_pipe, "agenerate_exercises", _generation({1: 0.0, 2: 0.01, 3: 0.02}))
+
+    async def parse(raw, i, **kwargs):
+        if i == 2:
+            raise ExerciseParseError("JSON inválido")
+        return {"exercise_name": f"e{i}"}
+
+    stream.setattr(llm_pipe, "aparse_exercise", parse)
+
+    events = _events(stream)
+    assert [d["index"] for k, d in events if k == "exercise"] == [1, 3]
+    assert [d for k, d in events if k == "exercise_failed"] == [{"index": 2, "error": "JSON inválido"}]
+    assert events[-1][1]["failed"] == 1
+
+
+def test_generation_error_ends_the_stream_with_an_error_event(stream):
+    async def broken(**kwargs):
+        yield 1, "raw1"
+        raise RuntimeError("proveedor caído")
+
+    async def parse(raw, i, **kwargs):
+        await asyncio.sleep(0.05)
+        return {"exercise_name": f"e{i}"}
+
+    stream.setattr(llm_pipe, "agenerate_exercises", broken)
+    stream.setattr(llm_pipe, "aparse_exercise", parse)
+
+    events = _events(stream)
+    assert events[-1] == ("error", {"error": "proveedor caído"})
@@ -0,0 +1,169 @@
+import asyncio
+import contextlib
+
+import pytest
+from mysql.connector.errors import IntegrityError
+
+from controllers import refill_controller as refill_module
+from controllers.refill_controller import RefillController
+from core.db.job_repository import GenerationJobRepository
+from routes import exercise_routes
+from shared.utils.generation_context import UserGenerationContext
+
+
+class _InMemoryJobRepository(GenerationJobRepository):
+    """exercise_generation_jobs en memoria, con la restricción de un trabajo activo por usuario"""
+
+    def __init__(self):
+        super().__init__()
+        self.jobs = {}
+
+    def execute(self, query, params=None):
+        job_id, user_id, requested_count = params
+        if self.get_active_job(user_id):
+            raise IntegrityError(msg="Duplicate entry for key 'uq_generation_jobs_active_user'")
+        self.jobs[job_id] = {"id": job_id, "user_id": user_id, "status": "queued", "requested_count": requested_count}
+        return 1
+
+    def get_job(self, job_id, user_id=None):
+        return self.jobs.get(job_id)
+
+    def get_active_job(self, user_id):
+        return next(
+            (j for j in self.jobs.values() if j["user_id"] == user_id and j["status"] in ("queued", "running")),
+            None,
+        )
+
+
+class _AsyncJobs:
+    def __init__(self, sync):
+        self.sync = sync
+        self.failed = []
+
+    async def create_job(self, user_id, requested_count):
+        return self.sync.create_job(user_id, requested_count)
+
+    async def fail_job(self, job_id, error):
+        self.sync.jobs[job_id]["status"] = "failed"
+        self.failed.append(job_id)
+
+
+def test_create_job_returns_the_active_job():
+    repo = _InMemoryJobRepository()
+
+    first = repo.create_job("u1", 5)
+    second = repo.create_job("u1", 5)
+
+    assert first["created"] is True
+    assert second["created"] is False
+    assert second["id"] == first["id"]
+    assert repo.create_job("u2", 5)["created"] is True
+
+
+def test_create_job_again_after_the_previous_one_finished():
+    repo = _InMemoryJobRepository()
+
+    first = repo.create_job("u1", 5)
+    repo.jobs[first["id"]]["status"] = "completed"
+
+    second = repo.create_job("u1", 5)
+    assert second["created"] is True
+    assert second["id"] != first["id"]
+
+
+def test_enqueue_submits_each_active_job_once():
+    controller = RefillController()
+    controller.jobs = _AsyncJobs(_InMemoryJobRepository())
+    submitted = []
+    controller.queue.submit = lambda fn, *args: submitted.append(args) or True
+
+    async def main():
+        return await asyncio.gather(*(controller.enqueue("u1") for _ in range(3)))
+
+    jobs = asyncio.run(main())
+    assert len({job["id"] for job in jobs}) == 1
+    assert submitted == [(jobs[0]["id"], "u1")]
+
+
+def test_enqueue_fails_the_job_when_the_queue_is_full():
+    controller = RefillController()
+    controller.jobs = _AsyncJobs(_InMemoryJobRepository())
+    controller.queue.submit = lambda fn, *args: False
+
+    job = asyncio.run(controller.enqueue("u1"))
+    assert job["status"] == "failed"
+    assert controller.jobs.failed == [job["id"]]
+
+
+class _QueuedExercises:
+    """Usuario con los pendientes completados y un lote pregenerado oculto"""
+
+    def __init__(self):
+        self.promoted = []
+
+    async def get_exercise_by_id(self, exercise_id, user_id):
+        return {"id": exercise_id, "status": "pending"}
+
+    async def mark_exercise_completed(self, exercise_id, user_id):
+        return True
+
+    async def promote_queued_exercises(self, user_id, limit):
+        self.promoted.append(limit)
+        return limit
+
+
+def _context(subscribed):
+    return UserGenerationContext(
+        user_id="u1",
+        subscription={"has_active_subscription": subscribed},
+        quiz={"id": "q1"},
+        pending_count=0,
+        completed_count=5,
+        queued_count=5,
+    )
+
+
+@contextlib.asynccontextmanager
+async def _no_session():
+    yield
+
+
+@pytest.mark.parametrize("subscribed", [True, False])
+def test_refill_promotes_queued_exercises_only_with_subscription(monkeypatch, subscribed):
+    async def load_context(user_id):
+        return _context(subscribed)
+
+    monkeypatch.setattr(refill_module, "aload_user_generation_context", load_context)
+    controller = RefillController()
+    controller.exercises = _QueuedExercises()
+
+    if subscribed:
+        assert asyncio.run(controller._refill("job-1", "u1")) == 0
+        assert controller.exercises.promoted == [5]
+    else:
+        with pytest.raises(RuntimeError):
+            asyncio.run(controller._refill("job-1", "u1"))
+        assert controller.exercises.promoted == []
+
+
+@pytest.mark.parametrize("subscribed", [True, False])
+def test_complete_exercise_promotes_queued_exercises_only_with_subscription(monkeypatch, subscribed):
+    repo = _QueuedExercises()
+
+    async def load_context(user_id, coalesce=True):
+        return _context(subscribed)
+
+    monkeypatch.setattr(exercise_routes, "AsyncExerciseRepository", lambda: repo)
+    monkeypatch.setattr(exercise_routes, "aload_user_generation_context", load_context)
+    monkeypatch.setattr(exercise_routes.database, "asession", _no_session)
+
+    response = asyncio.run(exercise_routes.complete_exercise("e1", current_user={"user_id": "u1"}))
+
+    if subscribed:
+        assert repo.promoted == [5]
+        assert response["pending_count"] == 5
+        assert response["new_exercises_generated"] is True
+    else:
+        assert repo.promoted == []
+        assert response["pending_count"] == 0
+        assert "warning" in response
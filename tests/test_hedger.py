@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from core.llm.deadlines import DeadlineExceeded, Hedger
+
+
+def _factory(delays):
+    """Cada llamada tarda el siguiente retardo de la lista y devuelve su número de intento"""
+    attempts = []
+
+    async def call():
+        attempt = len(attempts)
+        attempts.append(attempt)
+        await asyncio.sleep(delays[attempt])
+        return attempt
+
+    return call, attempts
+
+
+def test_fast_call_does_not_hedge():
+    hedger = Hedger("test", percentile=0.95, initial_delay=0.05)
+    call, attempts = _factory([0.0])
+
+    assert asyncio.run(hedger.run(call, deadline=1)) == 0
+    assert attempts == [0]
+    assert hedger.stats()["hedges_fired"] == 0
+
+
+def test_slow_primary_is_hedged_and_duplicate_wins():
+    hedger = Hedger("test", percentile=0.95, initial_delay=0.02)
+    call, attempts = _factory([1.0, 0.0])
+
+    assert asyncio.run(hedger.run(call, deadline=2)) == 1
+    stats = hedger.stats()
+    assert stats["hedges_fired"] == 1
+    assert stats["hedges_won"] == 1
+
+
+def test_hedge_disabled():
+    hedger = Hedger("test", percentile=0.95, initial_delay=0.01)
+    call, attempts = _factory([0.05, 0.0])
+
+    assert asyncio.run(hedger.run(call, deadline=1, hedge=False)) == 0
+    assert attempts == [0]
+
+
+def test_deadline_exceeded():
+    hedger = Hedger("test", percentile=0.95, initial_delay=0.01)
+    call, _ = _factory([1.0, 1.0])
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(hedger.run(call, deadline=0.05))
+    assert hedger.stats()["deadlines_exceeded"] == 1
+
+
+def test_failed_primary_falls_back_to_duplicate():
+    hedger = Hedger("test", percentile=0.95, initial_delay=0.01)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.03)
+            raise RuntimeError("primer intento")
+        await asyncio.sleep(0.05)
+        return "duplicado"
+
+    assert asyncio.run(hedger.run(call, deadline=1)) == "duplicado"
+
+
+def test_hedge_delay_uses_observed_percentile():
+    hedger = Hedger("test", percentile=0.5, initial_delay=9, min_samples=3)
+    assert hedger.hedge_delay() == 9
+    for seconds in (0.1, 0.2, 0.3):
+        hedger.latencies.record(seconds)
+    assert hedger.hedge_delay() == 0.2
+
+
+def test_stream_deadline_covers_whole_stream():
+    hedger = Hedger("test", percentile=0, initial_delay=0)
+
+    async def tokens():
+        yield "a"
+        await asyncio.sleep(1)
+        yield "b"
+
+    async def main():
+        received = []
+        with pytest.raises(DeadlineExceeded):
+            async for chunk in hedger.stream(tokens, deadline=0.05):
+                received.append(chunk)
+        return received
+
+    assert asyncio.run(main()) == ["a"]
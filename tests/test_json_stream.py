@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from core.llm.json_stream import IncrementalJsonParser
+
+
+def _collect(text: str, chunk: int = 1) -> dict:
+    """Alimenta el parser en trozos de `chunk` caracteres y junta el texto de cada campo"""
+    parser = IncrementalJsonParser()
+    fields = {}
+    done = set()
+    for start in range(0, len(text), chunk):
+        for field, delta, finished in parser.feed(text[start:start + chunk]):
+            assert field not in done, f"delta de {field} después de terminar"
+            fields[field] = fields.get(field, "") + delta
+            if finished:
+                done.add(field)
+    assert done == set(fields)
+    return fields
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 1000])
+def test_fields_match_json_loads_for_any_chunking(chunk):
+    exercise = {
+        "name": "Dicotomía del control",
+        "objective": "Distinguir lo que depende de ti \"y\" lo que no",
+        "instructions": "1. Anota\n2. Clasifica\t(\\ sin juzgar)",
+        "reflection": "¿Qué está en tu poder? 😀",
+    }
+    text = json.dumps(exercise)  # ensure_ascii: acentos y emoji llegan como \uXXXX
+    assert _collect(text, chunk) == exercise
+
+
+def test_ignores_prefix_and_non_string_values():
+    text = '```json\n{"name": "A", "tags": ["x", {"y": "}"}], "duration": 3, "level": "intermedio"}\n```'
+    assert _collect(text) == {"name": "A", "level": "intermedio"}
+
+
+def test_finished_after_closing_brace():
+    parser = IncrementalJsonParser()
+    parser.feed('{"name": "A"')
+    assert not parser.finished
+    parser.feed("} texto sobrante")
+    assert parser.finished
+
+
+def test_malformed_unicode_escape_is_emitted_raw():
+    assert _collect(r'{"name": "a\uZZ12b", "level": "x\u12_4"}') == {
+        "name": "a\\uZZ12b",
+        "level": "x\\u12_4",
+    }
+
+
+def test_unpaired_surrogates_become_replacement_character():
+    text = r'{"a": "\ud83dx", "b": "\ude00", "c": "\ud83d\n", "d": "\ud83d"}'
+    assert _collect(text) == {"a": "�x", "b": "�", "c": "�\n", "d": "�"}
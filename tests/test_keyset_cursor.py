@@ -0,0 +1,70 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from core.db.exercise_repository import ExerciseRepository
+
+
+class _CapturingRepository(ExerciseRepository):
+    """Guarda la query en lugar de ejecutarla"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def fetch_all(self, query, params=None):
+        self.calls.append((" ".join(query.split()), params))
+        return []
+
+    def execute(self, query, params=None):
+        self.calls.append((" ".join(query.split()), params))
+        return 0
+
+
+def test_cursor_round_trip():
+    exercise = {"id": "b6f3c1e2-0000-4000-8000-000000000001", "available_at": datetime(2026, 3, 1, 8, 30, 15)}
+    cursor = ExerciseRepository.encode_cursor(exercise)
+    assert ExerciseRepository.decode_cursor(cursor) == (exercise["available_at"], exercise["id"])
+
+
+@pytest.mark.parametrize("cursor", [
+    "no-es-base64!",
+    base64.urlsafe_b64encode(b"{}").decode(),
+    base64.urlsafe_b64encode(b'["no-es-fecha", "id"]').decode(),
+    base64.urlsafe_b64encode(b'["2026-03-01T08:30:15"]').decode(),
+])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        ExerciseRepository.decode_cursor(cursor)
+
+
+def test_first_page_hides_queued_and_orders_by_key():
+    repo = _CapturingRepository()
+    repo.get_user_exercises("u1", limit=20)
+
+    query, params = repo.calls[0]
+    assert "status <> 'queued'" in query
+    assert query.endswith("ORDER BY available_at DESC, id DESC LIMIT %s")
+    assert params == ("u1", 20)
+
+
+def test_next_page_continues_strictly_after_the_cursor():
+    repo = _CapturingRepository()
+    available_at = datetime(2026, 3, 1, 8, 30, 15)
+    repo.get_user_exercises("u1", status="completed", limit=20, before=(available_at, "abc"))
+
+    query, params = repo.calls[0]
+    assert "status IN (%s)" in query
+    assert "(available_at < %s OR (available_at = %s AND id < %s))" in query
+    assert params == ("u1", "completed", available_at, available_at, "abc", 20)
+
+
+def test_promotion_sets_available_at_and_keeps_created_at():
+    repo = _CapturingRepository()
+    repo.promote_queued_exercises("u1", 5)
+
+    query, params = repo.calls[0]
+    assert "SET status = 'pending', available_at = NOW()" in query
+    assert "created_at =" not in query
+    assert params == ("u1", 5)
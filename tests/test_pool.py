@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+from mysql.connector.errors import PoolError
+
+from core.db.pool import ConnectionPool
+
+
+class _FakeConnection:
+    """Conexión MySQL falsa: anota rollback/close y puede fallar el ping"""
+
+    def __init__(self, n):
+        self.n = n
+        self.in_transaction = False
+        self.closed = False
+        self.rollbacks = 0
+        self.alive = True
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OSError("conexión perdida")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(**kwargs):
+    created = []
+
+    def creator():
+        created.append(_FakeConnection(len(created)))
+        return created[-1]
+
+    kwargs.setdefault("size", 2)
+    kwargs.setdefault("max_overflow", 1)
+    kwargs.setdefault("timeout", 0.05)
+    return ConnectionPool(creator, **kwargs), created
+
+
+def test_connections_are_reused():
+    pool, created = _pool()
+
+    pool.connect().close()
+    conn = pool.connect()
+    assert conn.n == 0
+    conn.close()
+    assert len(created) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_overflow_connection_is_closed_on_return():
+    pool, created = _pool(size=1, max_overflow=1)
+
+    first, second = pool.connect(), pool.connect()
+    first.close()
+    second.close()
+
+    assert [c.closed for c in created] == [False, True]
+    stats = pool.stats()
+    assert stats["opened"] == 1
+    assert stats["idle"] == 1
+    assert stats["peak_in_use"] == 2
+
+
+def test_exhausted_pool_times_out():
+    pool, _ = _pool(size=1, max_overflow=0)
+    held = pool.connect()
+
+    with pytest.raises(PoolError):
+        pool.connect()
+    assert pool.stats()["timeouts"] == 1
+    held.close()
+
+
+def test_waiter_gets_the_returned_connection():
+    pool, _ = _pool(size=1, max_overflow=0, timeout=2)
+    held = pool.connect()
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.connect()))
+    waiter.start()
+    threading.Timer(0.05, held.close).start()
+    waiter.join()
+
+    assert got[0].n == 0
+    assert pool.stats()["checkout_wait_max_ms"] >= 40
+
+
+def test_open_transaction_is_rolled_back_on_return():
+    pool, created = _pool()
+    conn = pool.connect()
+    created[0].in_transaction = True
+    conn.close()
+
+    assert created[0].rollbacks == 1
+    with pytest.raises(PoolError):
+        conn.cursor()
+
+
+def test_dead_connection_is_replaced():
+    pool, created = _pool()
+    pool.connect().close()
+    created[0].alive = False
+
+    conn = pool.connect()
+    assert conn.n == 1
+    assert created[0].closed
+    assert pool.stats()["ping_failures"] == 1
+
+
+def test_old_connection_is_recycled():
+    pool, created = _pool(recycle=0)
+    pool.connect().close()
+
+    assert pool.connect().n == 1
+    assert created[0].closed
+    assert pool.stats()["recycled"] == 1
@@ -0,0 +1,87 @@
+import asyncio
+
+from core.llm.scheduler import LlmPriority, LlmScheduler, llm_priority
+
+
+class _SlowLlm:
+    """Chat model falso: anota el orden de las llamadas y tarda lo que se le pida"""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.order = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        self.order.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return prompt
+
+
+def test_respects_max_in_flight():
+    llm = _SlowLlm()
+    scheduler = LlmScheduler(llm, requests_per_minute=0, tokens_per_minute=0, max_in_flight=2)
+
+    async def main():
+        return await asyncio.gather(*(scheduler.ainvoke(f"p{i}") for i in range(6)))
+
+    assert asyncio.run(main()) == [f"p{i}" for i in range(6)]
+    assert llm.max_in_flight == 2
+    assert scheduler.stats()["admitted"]["interactive"] == 6
+
+
+def test_interactive_calls_jump_ahead_of_background():
+    llm = _SlowLlm()
+    scheduler = LlmScheduler(llm, requests_per_minute=0, tokens_per_minute=0, max_in_flight=1)
+
+    async def background(i):
+        with llm_priority(LlmPriority.BACKGROUND):
+            return await scheduler.ainvoke(f"bg{i}")
+
+    async def main():
+        tasks = [asyncio.ensure_future(background(i)) for i in range(3)]
+        await asyncio.sleep(0)  # bg0 en curso, bg1 y bg2 esperando
+        assert scheduler.queue_depth() == 2
+        assert scheduler.queue_depth(LlmPriority.INTERACTIVE) == 0
+        await scheduler.ainvoke("interactive")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert llm.order == ["bg0", "interactive", "bg1", "bg2"]
+
+
+def test_cancelled_waiter_gives_its_turn_back():
+    llm = _SlowLlm()
+    scheduler = LlmScheduler(llm, requests_per_minute=0, tokens_per_minute=0, max_in_flight=1)
+
+    async def main():
+        first = asyncio.ensure_future(scheduler.ainvoke("first"))
+        waiting = asyncio.ensure_future(scheduler.ainvoke("cancelled"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        assert await scheduler.ainvoke("last") == "last"
+        await first
+
+    asyncio.run(main())
+    assert llm.order == ["first", "last"]
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_request_rate_limit_delays_admission():
+    llm = _SlowLlm(delay=0)
+    # Cubo de 600/min: 600 de ráfaga y luego 10 por segundo
+    scheduler = LlmScheduler(llm, requests_per_minute=600, tokens_per_minute=0, max_in_flight=10)
+    scheduler.requests._tokens = 0
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await scheduler.ainvoke("p")
+        return loop.time() - started
+
+    assert asyncio.run(main()) >= 0.09
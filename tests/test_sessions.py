@@ -0,0 +1,105 @@
+import asyncio
+
+from core.db.connection import Database, _current_session
+from core.db.executor import run_in_db_thread
+
+
+class _FakeConnection:
+    def __init__(self, n):
+        self.n = n
+        self.in_transaction = False
+        self.rollbacks = 0
+        self.closed = False
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class _FakePool:
+    def __init__(self):
+        self.handed_out = []
+
+    def connect(self):
+        self.handed_out.append(_FakeConnection(len(self.handed_out)))
+        return self.handed_out[-1]
+
+
+def _database():
+    db = Database()
+    db.pool = _FakePool()
+    return db
+
+
+def test_without_session_each_query_takes_its_own_connection():
+    db = _database()
+    assert db.connect().n == 0
+    assert db.connect().n == 1
+
+
+def test_session_shares_one_connection():
+    db = _database()
+    with db.session():
+        first = db.connect()
+        first.close()
+        second = db.connect()
+        assert second.n == 0
+        second.close()
+        assert not db.pool.handed_out[0].closed
+
+    assert db.pool.handed_out[0].closed
+    assert _current_session.get() is None
+
+
+def test_nested_session_reuses_the_outer_one():
+    db = _database()
+    with db.session():
+        with db.session():
+            db.connect().close()
+        assert not db.pool.handed_out[0].closed
+        db.connect().close()
+
+    assert len(db.pool.handed_out) == 1
+
+
+def test_uncommitted_work_is_rolled_back_after_each_query():
+    db = _database()
+    with db.session():
+        conn = db.connect()
+        db.pool.handed_out[0].in_transaction = True
+        conn.close()
+        assert db.pool.handed_out[0].rollbacks == 1
+
+
+def test_session_is_reset_after_an_error():
+    db = _database()
+    try:
+        with db.session():
+            raise RuntimeError("fallo en el request")
+    except RuntimeError:
+        pass
+
+    assert _current_session.get() is None
+    assert db.pool.handed_out[0].closed
+
+
+def test_async_session_shares_one_connection_across_db_threads():
+    db = _database()
+
+    def query():
+        conn = db.connect()
+        try:
+            return conn.n
+        finally:
+            conn.close()
+
+    async def main():
+        async with db.asession():
+            ids = [await run_in_db_thread(query) for _ in range(3)]
+        return ids
+
+    assert asyncio.run(main()) == [0, 0, 0]
+    assert db.pool.handed_out[0].closed
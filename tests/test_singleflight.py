@@ -0,0 +1,121 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from core.db import repository
+from shared.utils import generation_context
+from shared.utils.singleflight import SingleFlight
+from shared.utils.subscription import invalidate_subscription_cache
+
+
+def test_do_shares_one_call_between_threads():
+    flight = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(5)
+
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        return "fila"
+
+    def caller(results):
+        barrier.wait()
+        results.append(flight.do("u1", load))
+
+    results = []
+    threads = [threading.Thread(target=caller, args=(results,)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["fila"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_do_propagates_the_error_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("caída")
+
+    with pytest.raises(RuntimeError):
+        flight.do("u1", fail)
+    assert flight.do("u1", lambda: "ok") == "ok"
+
+
+def test_ado_shares_one_call_between_coroutines():
+    flight = SingleFlight()
+    calls = []
+
+    async def load(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return user_id
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("u1", load, "u1") for _ in range(4)), flight.ado("u2", load, "u2"))
+
+    assert asyncio.run(main()) == ["u1"] * 4 + ["u2"]
+    assert calls == ["u1", "u2"]
+
+
+def test_cancelled_first_caller_does_not_fail_the_others():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return "fila"
+
+    async def main():
+        first = asyncio.ensure_future(flight.ado("u1", load))
+        second = asyncio.ensure_future(flight.ado("u1", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "fila"
+
+
+def test_ado_runs_in_an_empty_context():
+    flight = SingleFlight()
+    var = contextvars.ContextVar("session", default=None)
+
+    async def load():
+        return var.get()
+
+    async def main():
+        var.set("sesión del primer llamador")
+        return await flight.ado("u1", load)
+
+    assert asyncio.run(main()) is None
+
+
+def test_generation_context_loads_are_coalesced_into_copies(monkeypatch):
+    invalidate_subscription_cache()
+    calls = []
+
+    def fetch_one(query, params=None):
+        calls.append(query)
+        time.sleep(0.02)
+        return {
+            "subscription_id": None, "quiz_user_id": None,
+            "pending_count": 3, "completed_count": 0, "queued_count": 0,
+        }
+
+    monkeypatch.setattr(repository, "fetch_one", fetch_one)
+
+    async def main():
+        contexts = await asyncio.gather(*(generation_context.aload_user_generation_context("u1") for _ in range(3)))
+        uncoalesced = await generation_context.aload_user_generation_context("u1", coalesce=False)
+        return contexts, uncoalesced
+
+    contexts, _ = asyncio.run(main())
+    assert len(calls) == 2
+    contexts[0].pending_count = 0
+    assert [c.pending_count for c in contexts] == [0, 3, 3]
+    invalidate_subscription_cache()
@@ -0,0 +1,128 @@
+import asyncio
+import sys
+
+import pytest
+from langchain_core.documents import Document
+
+import core.llm  # noqa: F401  (registra el módulo; core.llm.llm_pipe es el singleton)
+from core.llm.retrieval_cache import RetrievalCache
+from shared.utils.cache import TTLCache
+
+llm_pipe_module = sys.modules["core.llm.llm_pipe"]
+LlmPipe = llm_pipe_module.LlmPipe
+
+PROFILE = {"stoic_paths": [], "daily_challenges": [], "stoic_level": "principiante"}
+
+
+class _Recorder:
+    """Anota las consultas de get_stoic_context a MySQL y pgvector"""
+
+    def __init__(self, version=1, precomputed=None):
+        self.calls = []
+        self.version = version
+        self.precomputed = precomputed
+
+    def get_version(self, collection):
+        self.calls.append("version")
+        return self.version
+
+    def get_context(self, collection, search_query, k):
+        self.calls.append("archetype")
+        return self.precomputed
+
+    def search(self, search_query, k):
+        self.calls.append("search")
+        return [Document(page_content="texto", id="c1")], "libro.pdf"
+
+
+def _pipe(recorder, version_ttl=0):
+    pipe = LlmPipe.__new__(LlmPipe)
+    pipe.collection_name = "stoic_texts"
+    pipe.corpus = recorder
+    pipe.archetypes = recorder
+    pipe._search = recorder.search
+    pipe.retrieval_cache = RetrievalCache(maxsize=8, chunk_maxsize=8, fetch_chunks=lambda ids: [])
+    pipe._corpus_versions = TTLCache(maxsize=4, ttl=version_ttl)
+    return pipe
+
+
+def test_cache_hit_only_reads_the_corpus_version():
+    recorder = _Recorder()
+    pipe = _pipe(recorder)
+
+    assert pipe.get_stoic_context(PROFILE) == ("texto", "libro.pdf")
+    assert recorder.calls == ["version", "archetype", "search"]
+
+    recorder.calls.clear()
+    assert pipe.get_stoic_context(PROFILE) == ("texto", "libro.pdf")
+    assert recorder.calls == ["version"]
+
+
+def test_cache_hit_with_cached_version_does_not_touch_mysql():
+    recorder = _Recorder()
+    pipe = _pipe(recorder, version_ttl=60)
+
+    pipe.get_stoic_context(PROFILE)
+    recorder.calls.clear()
+    assert pipe.get_stoic_context(PROFILE) == ("texto", "libro.pdf")
+    assert recorder.calls == []
+
+
+def test_precomputed_archetype_is_cached_in_memory():
+    recorder = _Recorder(precomputed={"context_text": "precalculado", "source_file": "libro.pdf"})
+    pipe = _pipe(recorder)
+
+    assert pipe.get_stoic_context(PROFILE) == ("precalculado", "libro.pdf")
+    assert pipe.get_stoic_context(PROFILE) == ("precalculado", "libro.pdf")
+    assert recorder.calls == ["version", "archetype", "version"]
+
+
+@pytest.mark.parametrize("precomputed", [None, {"context_text": "precalculado", "source_file": "libro.pdf"}])
+def test_new_corpus_version_is_not_served_from_cache(precomputed):
+    recorder = _Recorder(precomputed=precomputed)
+    pipe = _pipe(recorder)
+    pipe.get_stoic_context(PROFILE)
+
+    # Otro worker ingirió: la siguiente consulta ya ve la versión nueva
+    recorder.version = 2
+    recorder.calls.clear()
+    pipe.get_stoic_context(PROFILE)
+    assert recorder.calls[:2] == ["version", "archetype"]
+
+
+def test_cached_corpus_version_is_reread_when_it_expires():
+    recorder = _Recorder()
+    pipe = _pipe(recorder, version_ttl=60)
+    pipe.get_stoic_context(PROFILE)
+
+    # Con CORPUS_VERSION_TTL > 0 la versión nueva se ve al caducar la cacheada
+    recorder.version = 2
+    assert pipe._corpus_version() == 1
+    pipe._corpus_versions.invalidate()
+    recorder.calls.clear()
+    pipe.get_stoic_context(PROFILE)
+    assert recorder.calls[:2] == ["version", "archetype"]
+
+
+def test_async_path_reads_mysql_through_the_db_executor(monkeypatch):
+    recorder = _Recorder()
+    pipe = _pipe(recorder)
+    db_calls = []
+    run_in_db_thread = llm_pipe_module.run_in_db_thread
+
+    async def recording_run_in_db_thread(fn, *args):
+        db_calls.append(fn)
+        return await run_in_db_thread(fn, *args)
+
+    monkeypatch.setattr(llm_pipe_module, "run_in_db_thread", recording_run_in_db_thread)
+
+    assert asyncio.run(pipe._aget_stoic_context(PROFILE, 5)) == ("texto", "libro.pdf")
+    assert recorder.calls == ["version", "archetype", "search"]
+    assert db_calls == [pipe._corpus_version, recorder.get_context]
+
+    # Acierto de la caché: solo la versión del corpus, también por el executor
+    recorder.calls.clear()
+    db_calls.clear()
+    assert asyncio.run(pipe._aget_stoic_context(PROFILE, 5)) == ("texto", "libro.pdf")
+    assert recorder.calls == ["version"]
+    assert db_calls == [pipe._corpus_version]
@@ -0,0 +1,115 @@
+import pytest
+
+from core.db import repository
+from core.enviroment import env
+from shared.utils import generation_context
+from shared.utils.subscription import (
+    get_user_subscription,
+    invalidate_subscription_cache,
+    subscription_cache,
+)
+
+
+def _subscription_row(**overrides):
+    row = {
+        "id": "s1", "user_id": "u1", "plan_name": "mensual", "status": "active",
+        "current_period_start": None, "current_period_end": None,
+        "trial_start": None, "trial_end": None, "cancelled_at": None, "ends_at": None,
+        "has_active_subscription": 1, "seconds_to_period_end": None, "seconds_to_ends_at": None,
+    }
+    row.update(overrides)
+    return row
+
+
+def _context_row(subscription):
+    row = {
+        "quiz_user_id": None, "pending_count": 2, "completed_count": 7, "queued_count": 0,
+        **{column: None for column in generation_context._QUIZ_COLUMNS},
+    }
+    if subscription is not None:
+        row.update({
+            "subscription_id": subscription["id"],
+            "subscription_user_id": subscription["user_id"],
+            "subscription_status": subscription["status"],
+            **{k: v for k, v in subscription.items() if k not in ("id", "user_id", "status")},
+        })
+    return row
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Sustituye MySQL: devuelve `queries.row` y anota cada consulta"""
+    invalidate_subscription_cache()
+
+    class Recorder(list):
+        row = None
+
+    recorder = Recorder()
+
+    def fetch_one(query, params=None):
+        recorder.append((query, params))
+        return recorder.row
+
+    monkeypatch.setattr(repository, "fetch_one", fetch_one)
+    yield recorder
+    invalidate_subscription_cache()
+
+
+def _ttl(user_id):
+    expires_at, _ = subscription_cache._data[user_id]
+    return expires_at
+
+
+def test_subscription_is_cached(queries):
+    queries.row = _subscription_row()
+
+    first = get_user_subscription("u1")
+    assert get_user_subscription("u1") is first
+    assert len(queries) == 1
+    assert first["has_active_subscription"] is True
+    assert "seconds_to_period_end" not in first
+
+
+def test_entry_expires_at_the_billing_period_boundary(queries, monkeypatch):
+    monkeypatch.setattr(env, "SUBSCRIPTION_CACHE_TTL", 60)
+    queries.row = _subscription_row(seconds_to_period_end=5)
+    get_user_subscription("u1")
+    near_period_end = _ttl("u1")
+
+    invalidate_subscription_cache("u1")
+    queries.row = _subscription_row(seconds_to_period_end=3600)
+    get_user_subscription("u1")
+    assert near_period_end < _ttl("u1") - 50
+
+
+def test_cancelled_subscription_expires_at_ends_at(queries, monkeypatch):
+    monkeypatch.setattr(env, "SUBSCRIPTION_CACHE_TTL", 60)
+    queries.row = _subscription_row(cancelled_at="2026-01-01", seconds_to_period_end=3600, seconds_to_ends_at=0)
+    get_user_subscription("u1")
+    assert len(subscription_cache._data) == 0
+
+
+def test_invalidation_forces_a_new_read(queries):
+    queries.row = _subscription_row()
+    get_user_subscription("u1")
+    invalidate_subscription_cache("u1")
+    queries.row = _subscription_row(status="cancelled", has_active_subscription=0)
+
+    assert get_user_subscription("u1")["has_active_subscription"] is False
+    assert len(queries) == 2
+
+
+def test_generation_context_reads_and_refreshes_the_cache(queries):
+    queries.row = _context_row(_subscription_row())
+    context = generation_context.load_user_generation_context("u1")
+    assert context.has_active_subscription
+    assert "subscriptions" in queries[0][0]
+
+    # Segunda carga: la suscripción sale de la caché y la consulta no la lee
+    queries.row = _context_row(None)
+    context = generation_context.load_user_generation_context("u1")
+    assert context.has_active_subscription
+    assert context.pending_count == 2
+    assert "subscriptions" not in queries[1][0]
+    assert queries[1][1] == ("u1", "u1", "u1", "u1")
+    assert get_user_subscription("u1") is context.subscription
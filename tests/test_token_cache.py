@@ -0,0 +1,71 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from core.enviroment import env
+from core.middleware import jwt_middleware
+
+
+def _token(**claims):
+    return jwt.encode(claims, env.JWT_SECRET, algorithm=env.JWT_ALGORITHM)
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Cuenta las verificaciones de firma reales"""
+    jwt_middleware.token_cache.invalidate()
+    calls = []
+    decode = jwt_middleware.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_middleware.jwt, "decode", counting_decode)
+    yield calls
+    jwt_middleware.token_cache.invalidate()
+
+
+def test_signature_is_checked_once(decodes):
+    token = _token(user_id="u1", exp=int(time.time()) + 600)
+
+    assert jwt_middleware.verify_token(token)["user_id"] == "u1"
+    assert jwt_middleware.verify_token(token)["user_id"] == "u1"
+    assert len(decodes) == 1
+
+
+def test_cache_key_is_a_hash_of_the_token(decodes):
+    token = _token(user_id="u1", exp=int(time.time()) + 600)
+    jwt_middleware.verify_token(token)
+
+    keys = list(jwt_middleware.token_cache._data)
+    assert keys == [jwt_middleware._token_key(token)]
+    assert token not in keys
+
+
+def test_entry_does_not_outlive_the_token(decodes, monkeypatch):
+    monkeypatch.setattr(env, "TOKEN_CACHE_MAX_TTL", 3600)
+    token = _token(user_id="u1", exp=int(time.time()) + 2)
+    jwt_middleware.verify_token(token)
+
+    expires_at, _ = jwt_middleware.token_cache._data[jwt_middleware._token_key(token)]
+    assert expires_at - time.monotonic() <= 2
+
+
+def test_entry_is_capped_by_the_max_ttl(decodes, monkeypatch):
+    monkeypatch.setattr(env, "TOKEN_CACHE_MAX_TTL", 5)
+    token = _token(user_id="u1", exp=int(time.time()) + 3600)
+    jwt_middleware.verify_token(token)
+
+    expires_at, _ = jwt_middleware.token_cache._data[jwt_middleware._token_key(token)]
+    assert expires_at - time.monotonic() <= 5
+
+
+def test_invalid_tokens_are_not_cached(decodes):
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            jwt_middleware.verify_token("no.es.un.jwt")
+    assert len(decodes) == 2
+    assert jwt_middleware.token_cache.stats()["size"] == 0
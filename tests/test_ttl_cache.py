@@ -0,0 +1,123 @@
+import time
+
+import mysql.connector
+
+from core.middleware import jwt_middleware
+from shared.utils.cache import MISSING, TTLCache
+
+
+def test_missing_is_distinct_from_a_cached_none():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get("u1") is MISSING
+    cache.set("u1", None)
+    assert cache.get("u1") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_with_their_own_ttl():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+
+    assert cache.get("short") is MISSING
+    assert cache.get("long") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_non_positive_ttl_is_not_cached():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is MISSING
+
+
+def test_invalidate_one_or_all():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is MISSING and cache.get("b") == 2
+    cache.invalidate()
+    assert cache.get("b") is MISSING
+
+
+class _Cursor:
+    def __init__(self, row):
+        self.row = row
+
+    def execute(self, query, params):
+        pass
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    def __init__(self, row):
+        self.row = row
+
+    def cursor(self, dictionary=False):
+        return _Cursor(self.row)
+
+    def close(self):
+        pass
+
+
+def _patch_db(monkeypatch, row=None, error=None):
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if error:
+            raise error
+        return _Connection(row)
+
+    monkeypatch.setattr(jwt_middleware.mysql_pool, "connect", connect)
+    jwt_middleware.invalidate_cached_user()
+    return calls
+
+
+def test_user_rows_are_cached_until_invalidated(monkeypatch):
+    calls = _patch_db(monkeypatch, row={"id": "u1", "email": "a@b.c"})
+
+    assert jwt_middleware.get_user_from_db("u1")["email"] == "a@b.c"
+    assert jwt_middleware.get_user_from_db("u1")["email"] == "a@b.c"
+    assert len(calls) == 1
+
+    jwt_middleware.invalidate_cached_user("u1")
+    jwt_middleware.get_user_from_db("u1")
+    assert len(calls) == 2
+
+
+def test_unknown_user_is_cached_with_the_negative_ttl(monkeypatch):
+    calls = _patch_db(monkeypatch, row=None)
+    monkeypatch.setattr(jwt_middleware.env, "USER_CACHE_NEGATIVE_TTL", 0.01)
+
+    assert jwt_middleware.get_user_from_db("nadie") is None
+    assert jwt_middleware.get_user_from_db("nadie") is None
+    assert len(calls) == 1
+    time.sleep(0.02)
+    jwt_middleware.get_user_from_db("nadie")
+    assert len(calls) == 2
+
+
+def test_mysql_errors_are_not_cached(monkeypatch):
+    calls = _patch_db(monkeypatch, error=mysql.connector.Error("caída"))
+
+    assert jwt_middleware.get_user_from_db("u1") is None
+    assert jwt_middleware.get_user_from_db("u1") is None
+    assert len(calls) == 2